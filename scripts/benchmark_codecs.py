@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Data store codec micro-benchmark
+
+Compares encode/decode time and file size of every codec available in this
+environment on a synthetic profile set shaped like data/user_profiles.json.
+
+Run from the project root:
+    python scripts/benchmark_codecs.py [--users 10000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from data_store import available_codecs  # noqa: E402
+
+WORDS = [f"word{i}" for i in range(2000)]
+
+
+def make_profiles(users, seed=42):
+    """Build a {user_id: profile} dict with realistic field sizes."""
+    rng = random.Random(seed)
+    profiles = {}
+    for i in range(users):
+        word_freq = {w: rng.randint(1, 120) for w in rng.sample(WORDS, 200)}
+        ngram_freq = {
+            f"{rng.choice(WORDS)} {rng.choice(WORDS)}": rng.randint(1, 20)
+            for _ in range(100)
+        }
+        profiles[str(10**17 + i)] = {
+            "username": f"user{i}",
+            "display_name": f"User {i}",
+            "message_count": rng.randint(1, 5000),
+            "word_freq": word_freq,
+            "ngram_freq": ngram_freq,
+            "signature_phrases": list(ngram_freq)[:10],
+            "recent_quotes": [" ".join(rng.sample(WORDS, 12)) for _ in range(10)],
+            "facts": [
+                {"text": " ".join(rng.sample(WORDS, 5)), "ts": time.time()}
+                for _ in range(5)
+            ],
+            "avg_length": rng.random() * 20,
+            "urdu_ratio": rng.random(),
+            "funny_ratio": rng.random(),
+            "active_hours": {str(h): rng.randint(0, 50) for h in range(24)},
+            "_urdu_count": rng.randint(0, 500),
+            "_funny_count": rng.randint(0, 500),
+        }
+    return profiles
+
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Building {args.users} synthetic profiles...")
+    profiles = make_profiles(args.users)
+
+    rows = []
+    for name, codec in available_codecs().items():
+        encode_s, raw = best_of(args.repeat, codec.encode, profiles)
+        decode_s, decoded = best_of(args.repeat, codec.decode, raw)
+        assert decoded == profiles, f"{name} did not round-trip"
+        rows.append((name, encode_s, decode_s, len(raw)))
+
+    baseline = next(size for name, _, _, size in rows if name == "json-pretty")
+    print(
+        f"\n{'codec':<12} {'encode ms':>10} {'decode ms':>10} "
+        f"{'size MB':>9} {'vs pretty':>10}"
+    )
+    for name, encode_s, decode_s, size in rows:
+        print(
+            f"{name:<12} {encode_s * 1000:>10.1f} {decode_s * 1000:>10.1f} "
+            f"{size / 1e6:>9.2f} {size / baseline:>9.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
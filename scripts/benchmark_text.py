@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Message text-normalization micro-benchmark
+
+Times the per-message text work done by on_message (profile tokenizing,
+quote sanitizing and two low-signal checks) with the old per-call regex
+helpers against text_processing.normalize_message, and checks both produce
+the same results on the corpus.
+
+Run from the project root:
+    python scripts/benchmark_text.py [--messages 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import text_processing  # noqa: E402
+
+WORDS = [
+    "yaar", "chai", "kya", "scene", "hai", "bhai", "lol", "bruh", "exam",
+    "kal", "match", "dekha", "biryani", "quetta", "game", "pagal", "nahi",
+    "acha", "haha", "sahi", "chal", "ok", "aaj", "movie", "thanks",
+]  # fmt: skip
+EXTRAS = [
+    "<:chai:123456789012345678>",
+    "<a:dance:876543210987654321>",
+    ":fire:",
+    "<@123456789012345678>",
+    "<@!223456789012345678>",
+    "@everyone",
+    "https://tenor.com/view/some-gif-123",
+    "!!!",
+    "😂",
+]
+
+
+def make_messages(count, seed=42):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        parts = rng.choices(WORDS, k=rng.randint(1, 18))
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(EXTRAS))
+        messages.append(" ".join(parts))
+    return messages
+
+
+# --- Previous implementation (src/main_bot.py before text_processing) ---
+
+
+def legacy_tokenize(content):
+    content = re.sub(r"<a?:[A-Za-z0-9_~]+:\d+>", "", content)
+    content = re.sub(r"https?://\S+", "", content)
+    content = re.sub(r"<@!?\d+>", "", content)
+    content = re.sub(r"[^\w\s]", " ", content.lower())
+    return [w for w in content.split() if len(w) >= 3]
+
+
+def legacy_sanitize(content):
+    content = re.sub(r"<a?:[A-Za-z0-9_~]+:\d+>", "[emoji]", content)
+    content = re.sub(r":[A-Za-z0-9_~]+:", "[emoji]", content)
+    return re.sub(r"\s+", " ", content).strip()
+
+
+def legacy_compact(content):
+    text = legacy_sanitize(content).lower()
+    text = re.sub(r"<@!?\d+>|@\S+", "", text)
+    text = re.sub(r"https?://\S+", "", text).strip()
+    text_without_emoji = text.replace("[emoji]", "").strip()
+    return re.sub(r"[^a-z0-9]+", "", text_without_emoji)
+
+
+def legacy_per_message(messages):
+    for content in messages:
+        legacy_tokenize(content)
+        legacy_sanitize(content)
+        legacy_compact(content)  # profile quote check
+        legacy_sanitize(content)  # auto-reply history
+        legacy_compact(content)  # auto-reply low-signal check
+
+
+def fused_per_message(messages):
+    normalize = text_processing.normalize_message
+    normalize.cache_clear()
+    for content in messages:
+        normalize(content).tokens
+        normalize(content).sanitized
+        normalize(content).compact
+        normalize(content).sanitized
+        normalize(content).compact
+
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    for content in messages:
+        result = text_processing.normalize_message(content)
+        assert list(result.tokens) == legacy_tokenize(content), content
+        assert result.sanitized == legacy_sanitize(content), content
+        assert result.compact == legacy_compact(content), content
+
+    legacy_s = best_of(args.repeat, legacy_per_message, messages)
+    fused_s = best_of(args.repeat, fused_per_message, messages)
+    print(f"{len(messages)} messages, best of {args.repeat}")
+    print(f"{'path':<8} {'total ms':>9} {'us/msg':>8}")
+    for name, seconds in (("legacy", legacy_s), ("fused", fused_s)):
+        print(f"{name:<8} {seconds * 1000:>9.1f} {seconds * 1e6 / len(messages):>8.2f}")
+    print(f"speedup  {legacy_s / fused_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
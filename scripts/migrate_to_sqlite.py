@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the JSON data files into SQLite.
+
+Copies data/bot_data.json and data/user_profiles.json into the database
+used by STORAGE_BACKEND=sqlite. The bot also imports the JSON files on its
+first start with that backend; this script lets you do it ahead of time
+and check the counts.
+
+Run from the project root:
+    python scripts/migrate_to_sqlite.py [--force]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import settings  # noqa: E402
+from data_store import migrate_json_to_sqlite  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="overwrite an existing database",
+    )
+    args = parser.parse_args()
+
+    bot_data_file = settings.bot_data_file
+    profiles_file = bot_data_file.parent / "user_profiles.json"
+    try:
+        counts = migrate_json_to_sqlite(
+            bot_data_file, profiles_file, settings.sqlite_db_file, force=args.force
+        )
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ Migrated into {settings.sqlite_db_file}")
+    for namespace, count in sorted(counts.items()):
+        print(f"   {namespace}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,77 @@
-from typing import Any
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Hashable, Sequence
 
 import aiohttp
+import asyncio
 import json
+import math
 import random
 import html
 import re
+import time
+from urllib.parse import urlsplit
 
 try:
     from config import settings
+    from http_session import HttpSessions
+    from key_scheduler import KeyScheduler
+    from keyword_matcher import KeywordMatcher
     from logging_config import get_logger
-    from retry_utils import HttpStatusError, RetryError, retry_async
+    from priority_scheduler import PriorityScheduler, StaleWorkError
+    from retry_utils import (
+        CircuitOpenError,
+        HttpStatusError,
+        RateLimitedError,
+        RetryError,
+        get_breaker,
+        retry_async,
+    )
 except ImportError:
     from .config import settings
+    from .http_session import HttpSessions
+    from .key_scheduler import KeyScheduler
+    from .keyword_matcher import KeywordMatcher
     from .logging_config import get_logger
-    from .retry_utils import HttpStatusError, RetryError, retry_async
+    from .priority_scheduler import PriorityScheduler, StaleWorkError
+    from .retry_utils import (
+        CircuitOpenError,
+        HttpStatusError,
+        RateLimitedError,
+        RetryError,
+        get_breaker,
+        retry_async,
+    )
 
 logger = get_logger(__name__)
 
+# Shared connection pool for every outbound call; opened in on_ready and
+# closed in QuettaTeaBot.close.
+http_sessions = HttpSessions(
+    limit=settings.http_pool_limit,
+    limit_per_host=settings.http_pool_per_host,
+    keepalive_timeout=settings.http_keepalive_timeout,
+)
+
 _GEMINI_MODEL = "gemini-3.1-flash-lite"
 _GEMINI_URL = (
     f"https://generativelanguage.googleapis.com/v1beta/models/"
     f"{_GEMINI_MODEL}:generateContent"
 )
-_PROTECTED_CLASS_SLUR_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"\bhabshi\w*\b",
-        r"\bkhusra\w*\b",
-        r"\bchakka\w*\b",
-    )
-]
-_UNSAFE_OUTPUT_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"\bmar\s+ja\b",
-        r"\bkill\s+yourself\b",
-        r"\bkys\b",
-        r"\bsuicide\b",
-        r"\bshamshan\b",
-        r"\bqabar\b",
-        r"\bmaar\s+dunga\b",
-        r"\bmarwa\s+dunga\b",
-        r"\bkat[lq]\s+dunga\b",
-        r"\bshoot\s+kar\b",
-    )
+# Matched as word prefixes ("habshi", "habshiyon", ...).
+_PROTECTED_CLASS_SLUR_PREFIXES = ["habshi", "khusra", "chakka"]
+# Matched as whole words/phrases after whitespace is collapsed.
+_UNSAFE_OUTPUT_PHRASES = [
+    "mar ja",
+    "kill yourself",
+    "kys",
+    "suicide",
+    "shamshan",
+    "qabar",
+    "maar dunga",
+    "marwa dunga",
+    "katl dunga",
+    "katq dunga",
+    "shoot kar",
 ]
 
 
@@ -76,30 +104,282 @@ def _get_gemini_key() -> str | None:
     return key
 
 
+class SingleFlight:
+    """Coalesce concurrent identical calls into one in-flight task.
+
+    ``do(key, func, ...)`` starts ``func`` only if no call with the same
+    ``key`` is running; otherwise it awaits the running one. The task is
+    shielded, so a caller that gives up (``wait_for`` in autocomplete, a
+    losing hedge) does not cancel it for the others; once the last caller
+    has given up it is cancelled, so an unwanted HTTP request doesn't keep
+    holding a pooled connection. ``stats`` reports how many calls started
+    a request and how many joined one.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[Any]] = {}
+        self._waiters: Counter[asyncio.Future[Any]] = Counter()
+        self.started = 0
+        self.joined = 0
+
+    def _done(self, key: Hashable, task: asyncio.Future[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here even if every caller gave up
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.started += 1
+        else:
+            self.joined += 1
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "started": self.started,
+            "joined": self.joined,
+            "in_flight": len(self._inflight),
+        }
+
+
+single_flight = SingleFlight()
+
+
+class HostRateLimiter:
+    """Space requests to rate-limited hosts, whoever makes them.
+
+    ``min_intervals`` maps a host to the minimum seconds between requests.
+    ``acquire(host)`` reserves the next free time for that host and sleeps
+    until it, so every caller (prefetch pools, hedged fallbacks, retries)
+    shares one schedule. If the reservation would be more than ``max_wait``
+    seconds away it returns False without reserving, and the caller skips
+    the request instead of queueing behind it.
+    """
+
+    def __init__(self, min_intervals: dict[str, float], *, max_wait: float = 10.0):
+        self.min_intervals = min_intervals
+        self.max_wait = max_wait
+        self._next: dict[str, float] = {}
+        self.waited = 0
+        self.skipped = 0
+
+    async def acquire(self, host: str) -> bool:
+        interval = self.min_intervals.get(host)
+        if interval is None:
+            return True
+        now = time.monotonic()
+        start = max(now, self._next.get(host, now))
+        if start - now > self.max_wait:
+            self.skipped += 1
+            return False
+        self._next[host] = start + interval
+        if start > now:
+            self.waited += 1
+            await asyncio.sleep(start - now)
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {"waited": self.waited, "skipped": self.skipped}
+
+
+# OpenTDB allows one request per 5 seconds per IP.
+host_limiter = HostRateLimiter({"opentdb.com": 5.0})
+
+
+class HedgedFetch:
+    """Run interchangeable sources so a hanging primary can't hold up the
+    fallback.
+
+    ``run`` starts the first source and, if it hasn't produced a result
+    after ``delay()`` (the p95 of its recent winning latencies, clamped to
+    ``[min_delay, max_delay]``), starts the next one alongside it. A source
+    that returns None or raises hands over to the next one immediately.
+    ``race=True`` starts every source at once. The first non-None result
+    wins, the other tasks are cancelled, and ``stats`` records which source
+    won.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        min_delay: float = 0.25,
+        max_delay: float = 3.0,
+        default_delay: float = 1.0,
+        latency_window: int = 50,
+        min_samples: int = 5,
+    ):
+        self.name = name
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._latencies: dict[str, deque[float]] = {}
+        self._window = latency_window
+        self._primary: str | None = None
+        self.wins: Counter[str] = Counter()
+        self.hedged = 0
+        self.exhausted = 0
+
+    def delay(self) -> float:
+        """How long the primary gets before the next source is started."""
+        latencies = self._latencies.get(self._primary or "", ())
+        if len(latencies) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(latencies)
+        p95 = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+        return min(self.max_delay, max(self.min_delay, p95))
+
+    async def run(
+        self,
+        sources: Sequence[tuple[str, Callable[[], Awaitable[Any]]]],
+        *,
+        race: bool = False,
+    ) -> Any:
+        if not sources:
+            return None
+        self._primary = sources[0][0]
+        loop = asyncio.get_running_loop()
+        waiting = list(sources)
+        running: dict[asyncio.Future[Any], tuple[str, float]] = {}
+
+        def launch() -> None:
+            label, source = waiting.pop(0)
+            running[asyncio.ensure_future(source())] = (label, loop.time())
+
+        launch()
+        while race and waiting:
+            launch()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=self.delay() if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.hedged += 1
+                    launch()
+                    continue
+                for task in done:
+                    label, started = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception:
+                        logger.warning(
+                            "Hedged source failed",
+                            exc_info=True,
+                            extra={"fetch": self.name, "source": label},
+                        )
+                        result = None
+                    if result is not None:
+                        self.wins[label] += 1
+                        self._latencies.setdefault(
+                            label, deque(maxlen=self._window)
+                        ).append(loop.time() - started)
+                        return result
+                    if waiting:
+                        launch()
+            self.exhausted += 1
+            return None
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "wins": dict(self.wins),
+            "hedged": self.hedged,
+            "exhausted": self.exhausted,
+            "delay_ms": round(self.delay() * 1000),
+        }
+
+
+_hedges: dict[str, HedgedFetch] = {}
+
+
+def _hedge(name: str) -> HedgedFetch:
+    hedge = _hedges.get(name)
+    if hedge is None:
+        hedge = _hedges[name] = HedgedFetch(name)
+    return hedge
+
+
+def hedge_stats() -> dict[str, dict[str, Any]]:
+    return {name: hedge.stats() for name, hedge in _hedges.items()}
+
+
+def _signature(*parts: Any) -> tuple[Any, ...]:
+    """Hashable request key; dict parts are frozen into sorted item tuples."""
+    return tuple(
+        tuple(sorted(part.items())) if isinstance(part, dict) else part
+        for part in parts
+    )
+
+
 async def _fetch_json(
     url: str,
     headers: dict[str, str] | None = None,
     params: dict[str, str] | None = None,
     timeout: int = 15,
 ) -> Any:
+    return await single_flight.do(
+        _signature("json", url, headers, params),
+        _get_json,
+        url,
+        headers,
+        params,
+        timeout,
+    )
+
+
+async def _get_json(
+    url: str,
+    headers: dict[str, str] | None,
+    params: dict[str, str] | None,
+    timeout: int,
+) -> Any:
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+
     async def _request() -> Any:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url,
-                headers=headers,
-                params=params,
-                timeout=aiohttp.ClientTimeout(total=timeout),
-            ) as resp:
-                text = await resp.text()
-                if resp.status in (429, 500, 502, 503, 504):
-                    raise HttpStatusError(resp.status, text)
-                if resp.status != 200:
-                    logger.warning(
-                        "Non-success HTTP status",
-                        extra={"url": url, "status": resp.status, "body": text[:300]},
-                    )
-                    return None
-                return await resp.json()
+        async with http_sessions.get().get(
+            url,
+            headers=headers,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=breaker.timeout(timeout)),
+        ) as resp:
+            text = await resp.text()
+            if resp.status in (429, 500, 502, 503, 504):
+                raise HttpStatusError(resp.status, text)
+            if resp.status != 200:
+                logger.warning(
+                    "Non-success HTTP status",
+                    extra={"url": url, "status": resp.status, "body": text[:300]},
+                )
+                return None
+            return await resp.json()
 
     try:
         return await retry_async(
@@ -108,7 +388,11 @@ async def _fetch_json(
             delay=0.8,
             backoff=2.0,
             log_message=f"HTTP GET retry for {url}",
+            breaker=breaker,
+            pace=lambda: host_limiter.acquire(host),
         )
+    except (CircuitOpenError, RateLimitedError):
+        return None
     except RetryError:
         logger.error("Failed to fetch JSON after retries", extra={"url": url})
         return None
@@ -119,23 +403,35 @@ async def _fetch_text(
     headers: dict[str, str] | None = None,
     timeout: int = 15,
 ) -> str | None:
+    return await single_flight.do(
+        _signature("text", url, headers), _get_text, url, headers, timeout
+    )
+
+
+async def _get_text(
+    url: str,
+    headers: dict[str, str] | None,
+    timeout: int,
+) -> str | None:
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+
     async def _request() -> str | None:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=timeout),
-            ) as resp:
-                text = await resp.text()
-                if resp.status in (429, 500, 502, 503, 504):
-                    raise HttpStatusError(resp.status, text)
-                if resp.status != 200:
-                    logger.warning(
-                        "Non-success HTTP status",
-                        extra={"url": url, "status": resp.status, "body": text[:300]},
-                    )
-                    return None
-                return text
+        async with http_sessions.get().get(
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=breaker.timeout(timeout)),
+        ) as resp:
+            text = await resp.text()
+            if resp.status in (429, 500, 502, 503, 504):
+                raise HttpStatusError(resp.status, text)
+            if resp.status != 200:
+                logger.warning(
+                    "Non-success HTTP status",
+                    extra={"url": url, "status": resp.status, "body": text[:300]},
+                )
+                return None
+            return text
 
     try:
         return await retry_async(
@@ -144,7 +440,11 @@ async def _fetch_text(
             delay=0.8,
             backoff=2.0,
             log_message=f"HTTP GET retry for {url}",
+            breaker=breaker,
+            pace=lambda: host_limiter.acquire(host),
         )
+    except (CircuitOpenError, RateLimitedError):
+        return None
     except RetryError:
         logger.error("Failed to fetch text after retries", extra={"url": url})
         return None
@@ -203,12 +503,23 @@ async def fetch_joke() -> str | None:
 
 # ==================== QOTD API ====================
 async def fetch_qotd() -> str | None:
+    return await _hedge("qotd").run(
+        [("quotable", _qotd_from_quotable), ("opentdb", _qotd_from_opentdb)]
+    )
+
+
+async def _qotd_from_quotable() -> str | None:
     data = await _fetch_json("https://api.quotable.io/quotes/random?limit=1")
-    if data and len(data) > 0:
-        try:
-            return f"Reflect on this: \"{data[0]['content']}\" - What are your thoughts?"
-        except Exception:
-            logger.exception("QOTD API error")
+    if not data:
+        return None
+    try:
+        return f"Reflect on this: \"{data[0]['content']}\" - What are your thoughts?"
+    except Exception:
+        logger.exception("QOTD API error")
+        return None
+
+
+async def _qotd_from_opentdb() -> str | None:
     data = await _fetch_json("https://opentdb.com/api.php?amount=1&category=9")
     if not data or data.get("response_code") != 0:
         return None
@@ -223,9 +534,21 @@ async def fetch_qotd() -> str | None:
 
 # ==================== WOULD YOU RATHER API ====================
 async def fetch_wyr() -> str | None:
+    return await _hedge("wyr").run(
+        [("truthordare", _wyr_from_truthordare), ("boredapi", _wyr_from_boredapi)]
+    )
+
+
+async def _wyr_from_truthordare() -> str | None:
     data = await _fetch_json("https://api.truthordarebot.xyz/v1/wyr")
     if data and "question" in data:
         return data["question"]
+    return None
+
+
+async def _wyr_from_boredapi() -> str | None:
+    # Sequential on purpose: concurrent identical URLs would be coalesced
+    # into one response by single_flight.
     data1 = await _fetch_json("https://www.boredapi.com/api/activity")
     data2 = await _fetch_json("https://www.boredapi.com/api/activity")
     if not data1 or not data2 or "activity" not in data1 or "activity" not in data2:
@@ -242,17 +565,28 @@ async def fetch_wyr() -> str | None:
 
 # ==================== CONVERSATION STARTER API ====================
 async def fetch_conversation_starter() -> str | None:
+    return await _hedge("conversation_starter").run(
+        [("adviceslip", _starter_from_advice), ("uselessfacts", _starter_from_fact)]
+    )
+
+
+async def _starter_from_advice() -> str | None:
     text = await _fetch_text(
         "https://api.adviceslip.com/advice",
         headers={"Accept": "application/json"},
     )
-    if text:
-        try:
-            data = json.loads(text)
-            if "slip" in data:
-                return f"Let's talk about: {data['slip']['advice']}"
-        except Exception:
-            logger.exception("Conversation API error")
+    if not text:
+        return None
+    try:
+        data = json.loads(text)
+        if "slip" in data:
+            return f"Let's talk about: {data['slip']['advice']}"
+    except Exception:
+        logger.exception("Conversation API error")
+    return None
+
+
+async def _starter_from_fact() -> str | None:
     data = await _fetch_json("https://uselessfacts.jsph.pl/random.json?language=en")
     if not data or "text" not in data:
         return None
@@ -265,9 +599,22 @@ async def fetch_conversation_starter() -> str | None:
 
 # ==================== COMPLIMENT API ====================
 async def fetch_compliment() -> str | None:
+    return await _hedge("compliment").run(
+        [
+            ("compliments", _compliment_from_compliments_api),
+            ("affirmations", _compliment_from_affirmations),
+        ]
+    )
+
+
+async def _compliment_from_compliments_api() -> str | None:
     data = await _fetch_json("https://compliments-api.herokuapp.com/compliment")
     if isinstance(data, dict) and "compliment" in data:
         return data["compliment"]
+    return None
+
+
+async def _compliment_from_affirmations() -> str | None:
     data = await _fetch_json("https://www.affirmations.dev/")
     if isinstance(data, dict) and "affirmation" in data:
         return data["affirmation"]
@@ -323,6 +670,12 @@ _BANNED_OUTPUT_PHRASES = [
     "let me help",
     "great question",
 ]
+_OUTPUT_FILTER = (
+    KeywordMatcher()
+    .add("banned", _BANNED_OUTPUT_PHRASES)
+    .add("unsafe", _UNSAFE_OUTPUT_PHRASES, word_start=True, word_end=True)
+    .add("slur", _PROTECTED_CLASS_SLUR_PREFIXES, word_start=True)
+)
 _THEATRICAL_PATTERNS = [
     re.compile(r'\*[^*]+\*'),
     re.compile(r'"[^"]{30,}"'),
@@ -333,7 +686,7 @@ def _validate_reply(text: str | None, max_words: int = 16) -> str | None:
     if not text:
         return None
     lowered = text.lower()
-    if any(phrase in lowered for phrase in _BANNED_OUTPUT_PHRASES):
+    if "banned" in _OUTPUT_FILTER.scan(lowered):
         return None
     for pattern in _THEATRICAL_PATTERNS:
         if pattern.search(text):
@@ -347,9 +700,8 @@ def _validate_reply(text: str | None, max_words: int = 16) -> str | None:
 
 
 def _is_unsafe_ai_output(text: str) -> bool:
-    return any(pattern.search(text) for pattern in _UNSAFE_OUTPUT_PATTERNS) or any(
-        pattern.search(text) for pattern in _PROTECTED_CLASS_SLUR_PATTERNS
-    )
+    hits = _OUTPUT_FILTER.scan(" ".join(text.lower().split()))
+    return "unsafe" in hits or "slur" in hits
 
 
 def _blocked_reply_reason(reason: str | None) -> str:
@@ -357,19 +709,115 @@ def _blocked_reply_reason(reason: str | None) -> str:
     return f"gemini blocked this reply: {clean_reason}"
 
 
+def _emoji_hint(server_emojis: Sequence[str]) -> str:
+    """Prompt line of the first 20 emoji (callers may pass a cached one)."""
+    return ", ".join(server_emojis[:20]) if server_emojis else "none available"
+
+
 _HISTORY_CHAR_BUDGET = 1500
 _PERSONA_HISTORY_CHAR_BUDGET = 2500
 
 
 # ==================== GEMINI REQUEST ====================
 
+class _GeminiRateLimited(Exception):
+    """429 from Gemini; not retried on the same key."""
+
+    def __init__(self, retry_after: float | None):
+        self.retry_after = retry_after
+        super().__init__(f"rate limited (retry after {retry_after})")
+
+
+_RETRY_DELAY_RE = re.compile(r'"retryDelay"\s*:\s*"(\d+(?:\.\d+)?)s"')
+
+
+def _retry_after_seconds(headers: Any, body: str) -> float | None:
+    """Cooldown hinted by a 429: Retry-After header or the body's retryDelay."""
+    header = headers.get("Retry-After") if headers else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    match = _RETRY_DELAY_RE.search(body or "")
+    return float(match.group(1)) if match else None
+
+
+_GEMINI_QUEUE_TIMEOUT = 10.0  # seconds to wait for a key with capacity
+_key_scheduler: KeyScheduler | None = None
+
+
+def _get_key_scheduler(num_keys: int) -> KeyScheduler:
+    """The process-wide KeyScheduler, rebuilt if the number of keys changed."""
+    global _key_scheduler
+    if _key_scheduler is None or _key_scheduler.num_keys != num_keys:
+        _key_scheduler = KeyScheduler(
+            num_keys,
+            requests_per_minute=settings.gemini_requests_per_minute,
+            tokens_per_minute=settings.gemini_tokens_per_minute,
+        )
+    return _key_scheduler
+
+
+def gemini_key_stats() -> dict[str, Any] | None:
+    return _key_scheduler.stats() if _key_scheduler is not None else None
+
+
+# name -> (rank, max concurrent, seconds it may wait for a slot). The
+# non-interactive caps add up to less than gemini_max_concurrency, so
+# mention replies always have slots left however much background work
+# is queued.
+_GEMINI_PRIORITIES = {
+    "interactive": (0, settings.gemini_max_concurrency, 15.0),  # mentions, VC
+    "ambient": (1, 2, 8.0),  # unprompted chat replies, dead-chat starters
+    "bulk": (2, 1, 30.0),  # /tldr summaries
+    "background": (3, 1, 120.0),  # profile fact extraction
+}
+_gemini_scheduler = PriorityScheduler(
+    settings.gemini_max_concurrency, _GEMINI_PRIORITIES
+)
+
+
+def gemini_queue_stats() -> dict[str, Any]:
+    return _gemini_scheduler.stats()
+
+
+def hold_gemini_slot(ttl: float) -> bool:
+    """Park an interactive Gemini slot for a reply expected within ``ttl``
+    seconds (speculative mode); False if none is idle."""
+    return _gemini_scheduler.hold("interactive", ttl)
+
+
 async def _gemini_request(
     system: str,
     user: str,
     max_tokens: int = 200,
     temperature: float = 0.7,
+    *,
+    priority: str = "interactive",
 ) -> str | None:
-    """Shared Gemini API call with automatic key rotation on 429."""
+    """Shared Gemini API call, admitted by ``priority`` class (see
+    ``_GEMINI_PRIORITIES``); returns None if it went stale in the queue."""
+    try:
+        async with _gemini_scheduler.slot(priority):
+            return await _gemini_send(system, user, max_tokens, temperature, priority)
+    except StaleWorkError:
+        logger.warning("Gemini request dropped as stale", extra={"priority": priority})
+        return None
+
+
+async def _gemini_send(
+    system: str,
+    user: str,
+    max_tokens: int,
+    temperature: float,
+    priority: str = "interactive",
+) -> str | None:
+    """One Gemini call; keys are handed out by the KeyScheduler.
+
+    Each priority class has its own breaker: a 400-token /tldr and a
+    40-token reply have very different latencies, so sharing one p95 would
+    let the short replies train a timeout the long ones can't meet."""
     payload: dict[str, Any] = {
         "system_instruction": {
             "parts": [{"text": system}]
@@ -391,78 +839,121 @@ async def _gemini_request(
         logger.warning("No Gemini API keys configured.")
         return None
 
-    global _gemini_key_index
-
-    # Start from current index, try each key once
-    num_keys = len(keys)
-    start_index = _gemini_key_index % num_keys
-
-    for i in range(num_keys):
-        key_index = (start_index + i) % num_keys
-        key = keys[key_index]
-
-        async def _request(k=key):
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    _GEMINI_URL,
-                    params={"key": k},
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=aiohttp.ClientTimeout(total=8),
-                ) as resp:
-                    text = await resp.text()
-                    if resp.status == 429:
-                        raise HttpStatusError(resp.status, text)
-                    if resp.status in (500, 502, 503, 504):
-                        raise HttpStatusError(resp.status, text)
-                    if resp.status != 200:
-                        logger.error(
-                            "Gemini API error",
-                            extra={"status": resp.status, "body": text[:300]},
-                        )
-                        return None
-                    data = json.loads(text)
-                    candidates = data.get("candidates")
-                    if not candidates:
-                        block_reason = data.get("promptFeedback", {}).get("blockReason")
-                        logger.warning(
-                            "Gemini returned no candidates (likely safety filter)",
-                            extra={"block_reason": block_reason, "body": text[:300]},
-                        )
-                        return _blocked_reply_reason(block_reason)
-                    result = candidates[0]["content"]["parts"][0]["text"].strip()
-                    if _is_unsafe_ai_output(result):
-                        logger.warning(
-                            "Gemini output blocked by local guard",
-                            extra={"reply": result[:120]},
-                        )
-                        return "local guard blocked this reply: unsafe output"
-                    return result
+    scheduler = _get_key_scheduler(len(keys))
+    # Rough prompt size (~4 chars per token) plus the most we let it write;
+    # corrected from usageMetadata once the response arrives.
+    reserved = (len(system) + len(user)) // 4 + max_tokens
+    usage: dict[str, int] = {}
+    breaker = get_breaker(f"gemini:{priority}")
+
+    async def _request(k: str) -> str | None:
+        async with http_sessions.get().post(
+            _GEMINI_URL,
+            params={"key": k},
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=breaker.timeout(8)),
+        ) as resp:
+            text = await resp.text()
+            if resp.status == 429:
+                raise _GeminiRateLimited(_retry_after_seconds(resp.headers, text))
+            if resp.status in (500, 502, 503, 504):
+                raise HttpStatusError(resp.status, text)
+            if resp.status != 200:
+                logger.error(
+                    "Gemini API error",
+                    extra={"status": resp.status, "body": text[:300]},
+                )
+                return None
+            data = json.loads(text)
+            total = data.get("usageMetadata", {}).get("totalTokenCount")
+            if isinstance(total, int):
+                usage["total"] = total
+            candidates = data.get("candidates")
+            if not candidates:
+                block_reason = data.get("promptFeedback", {}).get("blockReason")
+                logger.warning(
+                    "Gemini returned no candidates (likely safety filter)",
+                    extra={"block_reason": block_reason, "body": text[:300]},
+                )
+                return _blocked_reply_reason(block_reason)
+            result = candidates[0]["content"]["parts"][0]["text"].strip()
+            if _is_unsafe_ai_output(result):
+                logger.warning(
+                    "Gemini output blocked by local guard",
+                    extra={"reply": result[:120]},
+                )
+                return "local guard blocked this reply: unsafe output"
+            return result
 
+    # Each key is tried at most once; a 429 benches it in the scheduler and
+    # moves straight on instead of retrying the same key.
+    tried: set[int] = set()
+    while len(tried) < len(keys):
+        try:
+            key_index = await asyncio.wait_for(
+                scheduler.acquire(reserved, exclude=tried), _GEMINI_QUEUE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "No Gemini key had capacity in time",
+                extra={"waited_s": _GEMINI_QUEUE_TIMEOUT, "tried": len(tried)},
+            )
+            return None
+        tried.add(key_index)
+        usage.clear()
+        started = time.monotonic()
         try:
             result = await retry_async(
                 _request,
+                keys[key_index],
                 retries=1,
                 delay=0.5,
                 backoff=1.5,
                 log_message=f"Gemini request retry (key {key_index + 1})",
+                breaker=breaker,
             )
-            if result is not None:
-                # Advance index so next request starts from the next key (round-robin)
-                _gemini_key_index = (key_index + 1) % num_keys
-                return result
+        except CircuitOpenError:
+            # Gemini itself is failing; no other key will do better.
+            scheduler.release(key_index)
+            return None
+        except _GeminiRateLimited as exc:
+            scheduler.rate_limited(key_index, exc.retry_after)
+            logger.warning(
+                "Gemini key rate-limited, cooling down",
+                extra={"key_index": key_index + 1, "retry_after": exc.retry_after},
+            )
+            continue
         except RetryError:
-            if i < num_keys - 1:
-                logger.warning(
-                    "Gemini key exhausted, rotating to next key",
-                    extra={"key_index": key_index + 1},
-                )
-                continue
-            logger.error("All Gemini keys exhausted after retries")
+            scheduler.release(key_index, ok=False)
+            logger.warning(
+                "Gemini key failed after retries",
+                extra={"key_index": key_index + 1},
+            )
+            continue
+        except asyncio.CancelledError:
+            # The caller gave up (e.g. a newer message made the reply stale);
+            # hand the key back without counting it against its health.
+            scheduler.release(key_index)
+            raise
         except Exception as e:
-            logger.exception("Gemini request error", extra={"key_index": key_index + 1, "error": str(e)})
+            scheduler.release(key_index, ok=False)
+            logger.exception(
+                "Gemini request error",
+                extra={"key_index": key_index + 1, "error": str(e)},
+            )
             return None
+        scheduler.release(
+            key_index,
+            ok=result is not None,
+            latency=time.monotonic() - started,
+            tokens_used=usage.get("total"),
+            tokens_reserved=reserved,
+        )
+        if result is not None:
+            return result
 
+    logger.error("All Gemini keys exhausted")
     return None
 
 
@@ -482,6 +973,7 @@ async def fetch_ai_dead_chat_starter() -> str | None:
         user="the chat has been quiet for a while. say something casual.",
         max_tokens=30,
         temperature=1.2,
+        priority="ambient",
     ))
 
 
@@ -512,23 +1004,26 @@ async def fetch_ai_summary(messages_text: str) -> str | None:
         ),
         max_tokens=400,
         temperature=0.5,
+        priority="bulk",
     )
 
 
 # ==================== AI PERSONA REPLY ====================
 async def fetch_ai_persona_reply(
     recent_messages: list[str],
-    server_emojis: list[str],
+    server_emojis: Sequence[str],
     last_message: str,
     user_context: str,
     *,
     avoid_phrases: list[str] | None = None,
     facts: list[str] | None = None,
+    emoji_hint: str | None = None,
 ) -> str | None:
     if not _get_gemini_keys():
         return None
 
-    emoji_hint = ", ".join(server_emojis[:20]) if server_emojis else "none available"
+    if emoji_hint is None:
+        emoji_hint = _emoji_hint(server_emojis)
     trimmed_history = _trim_history_to_budget(recent_messages, _PERSONA_HISTORY_CHAR_BUDGET)
     context_block = _build_context_block(trimmed_history)
 
@@ -585,15 +1080,31 @@ async def fetch_ai_persona_reply(
         ),
         max_tokens=60,
         temperature=0.88,
+        priority="ambient",
     ))
 
 
 # ==================== AI COMEBACK REPLY ====================
+def _sender_block(user_context: str | None, facts: list[str] | None) -> str:
+    """Profile summary and relevant facts about whoever the bot is answering."""
+    block = f"ABOUT THEM (background only): {user_context}\n" if user_context else ""
+    if facts:
+        block += (
+            "WHAT YOU KNOW ABOUT THEM (use at most one if it fits naturally):\n- "
+            + "\n- ".join(facts)
+            + "\n"
+        )
+    return f"{block}\n" if block else ""
+
+
 async def fetch_ai_comeback_reply(
     bot_original: str,
     their_reply: str,
     sender_name: str,
-    server_emojis: list[str],
+    server_emojis: Sequence[str],
+    *,
+    user_context: str | None = None,
+    facts: list[str] | None = None,
 ) -> str | None:
     """Generate a savage comeback when someone replies to the bot's message."""
     if not _get_gemini_keys():
@@ -623,6 +1134,7 @@ async def fetch_ai_comeback_reply(
         "- [they said 'shut up'] -> no i don't think i will 💀\n"
         "- [weak comeback] -> that's your best? genuinely concerning\n"
         "- [they got defensive] -> i said what i said\n\n"
+        f"{_sender_block(user_context, facts)}"
         f"Available server emojis: {emoji_hint}\n\n"
         "Reply with ONLY the comeback text."
     )
@@ -645,10 +1157,11 @@ async def fetch_ai_comeback_reply(
 # ==================== AI UNHINGED REPLY (boises channels only) ====================
 async def fetch_ai_unhinged_reply(
     recent_messages: list[str],
-    server_emojis: list[str],
+    server_emojis: Sequence[str],
     last_message: str,
     *,
     avoid_phrases: list[str] | None = None,
+    priority: str = "ambient",
 ) -> str | None:
     """Savage, high-profanity reply for boises channels only."""
     if not _get_gemini_keys():
@@ -698,6 +1211,7 @@ async def fetch_ai_unhinged_reply(
         ),
         max_tokens=60,
         temperature=1.1,
+        priority=priority,
     )
     # Skip _validate_reply for unhinged mode — no word limit, no phrase filter
     if not result or len(result.strip()) < 2:
@@ -725,6 +1239,7 @@ async def extract_user_facts(recent_quotes: list[str]) -> list[str]:
         user=f"User messages:\n{quotes_block}\n\nJSON array:",
         max_tokens=120,
         temperature=0.2,
+        priority="background",
     )
 
     if not raw:
@@ -742,15 +1257,17 @@ async def extract_user_facts(recent_quotes: list[str]) -> list[str]:
 # ==================== AI CHAT REPLY ====================
 async def fetch_ai_chat_reply(
     recent_messages: list[str],
-    server_emojis: list[str],
+    server_emojis: Sequence[str],
     last_message: str,
     *,
     avoid_phrases: list[str] | None = None,
+    emoji_hint: str | None = None,
 ) -> str | None:
     if not _get_gemini_keys():
         return None
 
-    emoji_hint = ", ".join(server_emojis[:20]) if server_emojis else "none available"
+    if emoji_hint is None:
+        emoji_hint = _emoji_hint(server_emojis)
     trimmed_history = _trim_history_to_budget(recent_messages, _HISTORY_CHAR_BUDGET)
     context_block = _build_context_block(trimmed_history)
 
@@ -792,6 +1309,7 @@ async def fetch_ai_chat_reply(
         ),
         max_tokens=40,
         temperature=0.85,
+        priority="ambient",
     ))
 
 
@@ -799,10 +1317,12 @@ async def fetch_ai_chat_reply(
 async def fetch_ai_mention_reply(
     mention_message: str,
     sender_name: str,
-    server_emojis: list[str],
+    server_emojis: Sequence[str],
     recent_messages: list[str],
     *,
     bot_name: str = "QuettaTeaBot",
+    user_context: str | None = None,
+    facts: list[str] | None = None,
 ) -> str | None:
     if not _get_gemini_keys():
         return None
@@ -827,6 +1347,7 @@ async def fetch_ai_mention_reply(
         "STYLE: Roman Urdu + English mix, lowercase, 6-14 words, no asterisks.\n"
         "NEVER: repeat yourself, ask for clarification when context is clear, be theatrical, "
         "start with lol/bro/omg, or always use the same emoji.\n"
+        f"{_sender_block(user_context, facts)}"
         f"Available server emojis: {emoji_hint}\n\n"
         "Output only the reply."
     )
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Burst:
+    latest: Any = None
+    started: float | None = None  # loop time of the burst's first item
+    timer: asyncio.TimerHandle | None = None
+    task: asyncio.Task[None] | None = None
+    sending: asyncio.Task[Any] | None = None  # handler past the point of no return
+
+
+class BurstDebouncer:
+    """Collapse a burst of items per key into one call on the latest item.
+
+    ``submit(key, item)`` (re)starts a ``window``-second quiet timer for the
+    key; when it fires, ``handler(item)`` runs once on the newest item. A
+    steady stream still fires ``max_wait`` seconds after the burst began.
+    A submit that arrives while the previous handler is still working
+    cancels it, since its decision was made on stale state, unless the
+    handler has entered ``sending(key)`` to deliver its result.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        *,
+        window: float = 2.5,
+        max_wait: float = 8.0,
+    ):
+        self._handler = handler
+        self.window = window
+        self.max_wait = max_wait
+        self._bursts: dict[Hashable, _Burst] = {}
+        self.submitted = 0
+        self.fired = 0
+        self.cancelled = 0
+
+    def submit(self, key: Hashable, item: Any) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = self._bursts[key] = _Burst()
+        self.submitted += 1
+        burst.latest = item
+        task = burst.task
+        if task is not None and not task.done() and burst.sending is not task:
+            task.cancel()
+            self.cancelled += 1
+        if burst.started is None:
+            burst.started = now
+        if burst.timer is not None:
+            burst.timer.cancel()
+        delay = min(self.window, burst.started + self.max_wait - now)
+        burst.timer = loop.call_later(max(0.0, delay), self._fire, key)
+
+    def _fire(self, key: Hashable) -> None:
+        burst = self._bursts[key]
+        item, burst.latest = burst.latest, None
+        burst.timer = None
+        burst.started = None
+        self.fired += 1
+        burst.task = asyncio.create_task(self._run(key, item))
+
+    async def _run(self, key: Hashable, item: Any) -> None:
+        try:
+            await self._handler(item)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Debounced handler failed", extra={"key": key})
+        finally:
+            burst = self._bursts.get(key)
+            if (
+                burst is not None
+                and burst.task is asyncio.current_task()
+                and burst.timer is None
+            ):
+                del self._bursts[key]
+
+    @asynccontextmanager
+    async def sending(self, key: Hashable) -> AsyncIterator[None]:
+        """Mark the handler for ``key`` as delivering; newer submits no
+        longer cancel it."""
+        burst = self._bursts.get(key)
+        task = asyncio.current_task()
+        if burst is not None:
+            burst.sending = task
+        try:
+            yield
+        finally:
+            if burst is not None and burst.sending is task:
+                burst.sending = None
+
+    async def close(self) -> None:
+        bursts, self._bursts = self._bursts, {}
+        tasks = []
+        for burst in bursts.values():
+            if burst.timer is not None:
+                burst.timer.cancel()
+            if burst.task is not None and not burst.task.done():
+                burst.task.cancel()
+                tasks.append(burst.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "fired": self.fired,
+            "cancelled_stale": self.cancelled,
+            "pending": sum(1 for b in self._bursts.values() if b.timer is not None),
+        }
@@ -13,11 +13,44 @@ class Settings(BaseSettings):
         / "data"
         / "bot_data.json"
     )
+    # Seconds to coalesce bot_data saves before writing; 0 writes every save.
+    data_flush_interval: float = 0.0
+    # "json" rewrites whole files; "journal" appends per-change records;
+    # "sharded" writes one file per namespace (split into data_shard_buckets
+    # by key hash when > 0); "sqlite" keeps one row per entry.
+    storage_backend: str = "json"
+    data_shard_buckets: int = 0
+    # File encoding: json (compact), json-pretty, orjson, msgpack or auto.
+    data_codec: str = "json"
+    sqlite_db_file: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parent.parent
+        / "data"
+        / "bot_data.sqlite3"
+    )
+    # User profiles are written in batches of dirty records: after this many
+    # seconds, or as soon as profile_flush_batch users are waiting.
+    profile_flush_interval: float = 30.0
+    profile_flush_batch: int = 50
+    # Profiles kept in memory when the SQLite backend can load the rest on
+    # demand; file backends always keep every profile loaded.
+    profile_cache_size: int = 500
+    # Shared outbound HTTP pool: total and per-host connection caps, and
+    # how long idle connections are kept for reuse.
+    http_pool_limit: int = 50
+    http_pool_per_host: int = 8
+    http_keepalive_timeout: float = 30.0
     api_ninjas_key: Optional[SecretStr] = None
     gemini_api_key_1: Optional[SecretStr] = None
     gemini_api_key_2: Optional[SecretStr] = None
     gemini_api_key_3: Optional[SecretStr] = None
     gemini_api_key_4: Optional[SecretStr] = None
+    # Per-key Gemini budget the key scheduler spreads requests over.
+    gemini_requests_per_minute: int = 15
+    gemini_tokens_per_minute: int = 250_000
+    # Gemini calls in flight at once, across all keys and priority classes.
+    gemini_max_concurrency: int = 6
+    # Warm up reply context when someone the bot is talking to starts typing.
+    speculative_replies: bool = False
     yt_dlp_cookies_file: Optional[str] = None
     yt_dlp_cookies_browser: Optional[str] = None
     yt_dlp_js_runtime: str = "node"
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+MAX_PROMPT_EMOJIS = 75
+HINT_EMOJIS = 20
+
+
+@dataclass(frozen=True, slots=True)
+class GuildEmojis:
+    """Static custom emoji of one guild, in the shapes the AI paths use.
+
+    ``tokens_by_name`` maps lowercase name -> ``<:name:id>``; ``tokens`` is
+    the name-sorted token list offered to the model (capped at
+    ``MAX_PROMPT_EMOJIS``); ``hint`` is the prompt line built from the first
+    ``HINT_EMOJIS`` of them.
+    """
+
+    tokens_by_name: dict[str, str]
+    tokens: tuple[str, ...]
+    hint: str
+
+    @classmethod
+    def from_emojis(cls, emojis: Iterable[Any]) -> "GuildEmojis":
+        tokens_by_name = {
+            e.name.lower(): f"<:{e.name}:{e.id}>" for e in emojis if not e.animated
+        }
+        tokens = tuple(token for _, token in sorted(tokens_by_name.items()))
+        tokens = tokens[:MAX_PROMPT_EMOJIS]
+        hint = ", ".join(tokens[:HINT_EMOJIS]) if tokens else "none available"
+        return cls(tokens_by_name, tokens, hint)
+
+
+class EmojiCache:
+    """Per-guild ``GuildEmojis``, built on first use.
+
+    Call ``invalidate`` from ``on_guild_emojis_update`` (and when leaving a
+    guild); the next ``get`` rebuilds from ``guild.emojis``.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: dict[int, GuildEmojis] = {}
+
+    def get(self, guild: Any) -> GuildEmojis:
+        table = self._guilds.get(guild.id)
+        if table is None:
+            table = self._guilds[guild.id] = GuildEmojis.from_emojis(guild.emojis)
+        return table
+
+    def invalidate(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+
+    def __len__(self) -> int:
+        return len(self._guilds)
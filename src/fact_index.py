@@ -0,0 +1,118 @@
+import heapq
+import math
+import re
+import time
+from typing import Iterable
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class FactIndex:
+    """Incremental inverted index over one user's facts, scored with BM25.
+
+    Facts are added and discarded as the profile changes, so a query costs
+    O(query terms + matching postings) instead of re-tokenizing every fact.
+    Scores are multiplied by an exponential recency decay on the fact's
+    timestamp (``half_life_days``). ``search`` tops up with the newest
+    facts when fewer than ``limit`` match, like the overlap scorer did.
+    """
+
+    def __init__(
+        self,
+        stop_words: Iterable[str] = (),
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        half_life_days: float = 30.0,
+    ):
+        self._stop_words = frozenset(stop_words)
+        self._k1 = k1
+        self._b = b
+        self._half_life = half_life_days * 86400
+        self._docs: dict[int, tuple[str, float, int]] = {}  # id -> text, ts, len
+        self._ids_by_text: dict[str, list[int]] = {}
+        self._postings: dict[str, dict[int, int]] = {}  # term -> {id: tf}
+        self._total_length = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def tokenize(self, text: str) -> list[str]:
+        return [t for t in _TOKEN_RE.findall(text.lower()) if t not in self._stop_words]
+
+    def add(self, text: str, ts: float = 0.0) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        terms = self.tokenize(text)
+        self._docs[doc_id] = (text, ts, len(terms))
+        self._ids_by_text.setdefault(text, []).append(doc_id)
+        self._total_length += len(terms)
+        for term in terms:
+            postings = self._postings.setdefault(term, {})
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+        return doc_id
+
+    def discard(self, text: str) -> bool:
+        """Remove the oldest indexed fact with this text, if any."""
+        ids = self._ids_by_text.get(text)
+        if not ids:
+            return False
+        doc_id = ids.pop(0)
+        if not ids:
+            del self._ids_by_text[text]
+        _, _, length = self._docs.pop(doc_id)
+        self._total_length -= length
+        for term in set(self.tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        return True
+
+    def search(
+        self, query: str, limit: int = 3, *, now: float | None = None
+    ) -> list[str]:
+        if not self._docs or limit <= 0:
+            return []
+        now = time.time() if now is None else now
+        n_docs = len(self._docs)
+        avg_length = self._total_length / n_docs or 1.0
+        scores: dict[int, float] = {}
+        for term in set(self.tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                length = self._docs[doc_id][2]
+                norm = self._k1 * (1 - self._b + self._b * length / avg_length)
+                weight = idf * tf * (self._k1 + 1) / (tf + norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        ranked = heapq.nlargest(
+            limit,
+            scores,
+            key=lambda doc_id: (
+                scores[doc_id] * self._decay(self._docs[doc_id][1], now),
+                self._docs[doc_id][1],
+            ),
+        )
+        if len(ranked) < limit:
+            chosen = set(ranked)
+            newest = heapq.nlargest(
+                limit - len(ranked),
+                (doc_id for doc_id in self._docs if doc_id not in chosen),
+                key=lambda doc_id: (self._docs[doc_id][1], doc_id),
+            )
+            ranked.extend(newest)
+        return [self._docs[doc_id][0] for doc_id in ranked]
+
+    def _decay(self, ts: float, now: float) -> float:
+        if self._half_life <= 0:
+            return 1.0
+        age = max(0.0, now - ts)
+        return 0.5 ** (age / self._half_life)
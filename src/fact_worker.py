@@ -0,0 +1,137 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Extractor = Callable[[list[str]], Awaitable[list[str]]]
+ResultHandler = Callable[[str, list[str]], Any]
+
+
+class FactExtractionWorker:
+    """Run fact extraction in background tasks instead of the message handler.
+
+    ``submit`` only enqueues a user id, so the caller never waits on the
+    model. Each user is queued at most once: a repeat submission just
+    replaces the quotes the queued job will use. At most ``concurrency``
+    extractions run at a time, and submissions beyond ``max_queue`` are
+    dropped (the next message cadence will submit again). Results are
+    passed to ``on_result(user_id, facts)`` (sync or async) on the loop.
+    """
+
+    def __init__(
+        self,
+        extract: Extractor,
+        on_result: ResultHandler,
+        *,
+        max_queue: int = 100,
+        concurrency: int = 2,
+    ):
+        self._extract = extract
+        self._on_result = on_result
+        self._max_queue = max(1, max_queue)
+        self._concurrency = max(1, concurrency)
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._pending: dict[str, list[str]] = {}
+        self._workers: list[asyncio.Task] = []
+        self._in_flight = 0
+        self._submitted = 0
+        self._deduped = 0
+        self._dropped = 0
+        self._completed = 0
+        self._failed = 0
+        self._last_latency_ms = 0.0
+        self._max_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._workers)
+
+    def start(self) -> None:
+        """Spawn the worker tasks; must be called with a running loop."""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._workers = [
+            loop.create_task(self._run(), name=f"fact-worker-{i}")
+            for i in range(self._concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs are discarded."""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def submit(self, user_id: str, quotes: list[str]) -> bool:
+        """Queue an extraction for ``user_id``; returns False if not queued."""
+        if user_id in self._pending:
+            self._pending[user_id] = list(quotes)
+            self._deduped += 1
+            return False
+        if len(self._pending) >= self._max_queue:
+            self._dropped += 1
+            logger.debug("Fact extraction queue full", extra={"user_id": user_id})
+            return False
+        self._pending[user_id] = list(quotes)
+        self._queue.put_nowait(user_id)
+        self._submitted += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            user_id = await self._queue.get()
+            quotes = self._pending.pop(user_id, None)
+            try:
+                if quotes is not None:
+                    await self._process(user_id, quotes)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, user_id: str, quotes: list[str]) -> None:
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            facts = await self._extract(quotes)
+        except Exception:
+            self._failed += 1
+            logger.exception("Fact extraction failed", extra={"user_id": user_id})
+            return
+        finally:
+            self._in_flight -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._last_latency_ms = elapsed_ms
+            self._max_latency_ms = max(self._max_latency_ms, elapsed_ms)
+            self._total_latency_ms += elapsed_ms
+        self._completed += 1
+        if facts:
+            try:
+                result = self._on_result(user_id, facts)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Merging extracted facts failed")
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        await self._queue.join()
+
+    def stats(self) -> dict[str, Any]:
+        finished = self._completed + self._failed
+        avg = self._total_latency_ms / finished if finished else 0.0
+        return {
+            "queue_depth": len(self._pending),
+            "in_flight": self._in_flight,
+            "submitted": self._submitted,
+            "deduped": self._deduped,
+            "dropped": self._dropped,
+            "completed": self._completed,
+            "failed": self._failed,
+            "last_latency_ms": round(self._last_latency_ms, 2),
+            "avg_latency_ms": round(avg, 2),
+            "max_latency_ms": round(self._max_latency_ms, 2),
+        }
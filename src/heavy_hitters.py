@@ -0,0 +1,82 @@
+import heapq
+from operator import itemgetter
+from typing import Iterable
+
+
+def top_counts(
+    items: dict[str, int] | Iterable[tuple[str, int]], n: int
+) -> list[tuple[str, int]]:
+    """Return the ``n`` highest-count pairs, largest first, in O(len * log n)."""
+    if isinstance(items, dict):
+        items = items.items()
+    return heapq.nlargest(n, items, key=itemgetter(1))
+
+
+class SpaceSaving:
+    """Bounded approximate top-k counter (the Space-Saving algorithm).
+
+    Counts live in a plain ``dict`` (updated in place, so it can sit inside
+    a persisted profile). Once ``capacity`` keys are tracked, a new key
+    evicts the current minimum and inherits its estimate as an error term
+    ``ε``. Eviction goes by the estimate ``count + ε`` (an upper bound), so
+    every key with a true count above ``total / capacity`` is guaranteed to
+    be kept, while the dict and ``top`` hold only ``count``, the part that
+    was actually observed (a lower bound). A lazy min-heap makes each
+    update O(log k) amortized instead of re-sorting the dict.
+    """
+
+    def __init__(self, capacity: int, counts: dict[str, int] | None = None):
+        self.capacity = max(1, capacity)
+        self.counts = counts if counts is not None else {}
+        # Overestimate inherited on eviction; absent means exact.
+        self._errors: dict[str, int] = {}
+        if len(self.counts) > self.capacity:
+            kept = top_counts(self.counts, self.capacity)
+            self.counts.clear()
+            self.counts.update(kept)
+        self._rebuild()
+
+    def estimate(self, key: str) -> int:
+        """Upper bound on ``key``'s true count (0 if it isn't tracked)."""
+        if key not in self.counts:
+            return 0
+        return self.counts[key] + self._errors.get(key, 0)
+
+    def error(self, key: str) -> int:
+        return self._errors.get(key, 0)
+
+    def _rebuild(self) -> None:
+        self._heap = [(self.estimate(key), key) for key in self.counts]
+        heapq.heapify(self._heap)
+
+    def _evict_min(self) -> int:
+        # Entries whose estimate no longer matches the dict are stale; skip them.
+        while True:
+            estimate, key = heapq.heappop(self._heap)
+            if key in self.counts and self.estimate(key) == estimate:
+                del self.counts[key]
+                self._errors.pop(key, None)
+                return estimate
+
+    def add(self, key: str, amount: int = 1) -> int:
+        """Count ``key`` and return its estimated (upper-bound) total."""
+        counts = self.counts
+        if key in counts:
+            counts[key] += amount
+        elif len(counts) < self.capacity:
+            counts[key] = amount
+        else:
+            self._errors[key] = self._evict_min()
+            counts[key] = amount
+        estimate = self.estimate(key)
+        heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._rebuild()
+        return estimate
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        """Highest observed counts (``count``, not the inflated estimate)."""
+        return top_counts(self.counts, n)
+
+    def __len__(self) -> int:
+        return len(self.counts)
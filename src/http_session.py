@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HttpSessions:
+    """One pooled ``aiohttp.ClientSession`` shared by every outbound call.
+
+    The connector caps total and per-host connections, keeps idle
+    connections alive for ``keepalive_timeout`` seconds and caches DNS for
+    ``dns_ttl`` seconds, so repeat calls to the same API skip DNS, TCP and
+    TLS setup. ``get`` opens the session lazily and replaces it if it was
+    closed or belongs to another event loop (each test gets its own loop);
+    a replaced session is closed rather than left for the garbage collector.
+    A trace hook counts new vs reused connections for ``stats``.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = 50,
+        limit_per_host: int = 8,
+        keepalive_timeout: float = 30.0,
+        dns_ttl: int = 300,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._requests = 0
+        self._connections_created = 0
+        self._connections_reused = 0
+        self._retiring: set[asyncio.Future[Any]] = set()
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(*_: Any) -> None:
+            self._requests += 1
+
+        async def on_connection_create_end(*_: Any) -> None:
+            self._connections_created += 1
+
+        async def on_connection_reuseconn(*_: Any) -> None:
+            self._connections_reused += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def get(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._session
+        if session is None or session.closed or self._loop is not loop:
+            if session is not None and not session.closed:
+                self._retire(session, self._loop)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector, trace_configs=[self._trace_config()]
+            )
+            self._session = session
+            self._loop = loop
+        return session
+
+    def _retire(
+        self, session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop | None
+    ) -> None:
+        """Close a session that belongs to another event loop.
+
+        It can't be awaited from here. If its loop is still running the close
+        is handed to that loop; otherwise the loop is gone and the session is
+        closed from the current one, which releases the pool it owned.
+        """
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        task = asyncio.ensure_future(self._close_quietly(session))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    @staticmethod
+    async def _close_quietly(session: aiohttp.ClientSession) -> None:
+        try:
+            await session.close()
+        except Exception:
+            logger.warning("Failed to close a stale HTTP session", exc_info=True)
+
+    async def open(self) -> None:
+        self.get()
+
+    async def close(self) -> None:
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def stats(self) -> dict[str, Any]:
+        connections = self._connections_created + self._connections_reused
+        return {
+            "requests": self._requests,
+            "connections_created": self._connections_created,
+            "connections_reused": self._connections_reused,
+            "reuse_rate": (
+                round(self._connections_reused / connections, 3)
+                if connections
+                else None
+            ),
+            "open": self._session is not None and not self._session.closed,
+        }
@@ -0,0 +1,246 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Collection
+
+
+class TokenBucket:
+    """Classic token bucket: ``capacity`` tokens, refilled continuously over
+    ``period`` seconds. Taking more than is available leaves a debt that the
+    refill pays off first."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, period: float, now: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (capped at capacity) can be taken."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= amount
+
+    def give(self, amount: float, now: float) -> None:
+        """Return ``amount`` taken earlier but not spent (up to capacity)."""
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+@dataclass(slots=True)
+class _KeyState:
+    requests: TokenBucket
+    tokens: TokenBucket
+    cooldown_until: float = 0.0
+    latency: float | None = None  # EWMA of successful request time, seconds
+    failures: int = 0  # consecutive
+    in_flight: int = 0
+    served: int = 0
+    rate_limited: int = 0
+
+
+class KeyScheduler:
+    """Pick which API key serves the next request.
+
+    Each key has a requests-per-minute and a tokens-per-minute bucket, a
+    cooldown set when it returns 429, an EWMA of recent latency and a count
+    of consecutive failures. ``acquire`` hands out the healthiest key that
+    has budget right now; when none does, callers wait in a FIFO queue and
+    are served in arrival order as budgets refill or cooldowns end. A waiter
+    is only passed over for a key it has excluded, never for budget.
+    """
+
+    def __init__(
+        self,
+        num_keys: int,
+        *,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        cooldown: float = 60.0,
+        latency_alpha: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        now = clock()
+        self.num_keys = num_keys
+        self.cooldown = cooldown
+        self._alpha = latency_alpha
+        self._clock = clock
+        self._keys = [
+            _KeyState(
+                TokenBucket(requests_per_minute, 60.0, now),
+                TokenBucket(tokens_per_minute, 60.0, now),
+            )
+            for _ in range(num_keys)
+        ]
+        self._waiters: deque[tuple[float, Collection[int], asyncio.Future[int]]] = (
+            deque()
+        )
+        self._timer: asyncio.TimerHandle | None = None
+        self.queued = 0
+
+    def _delay(self, index: int, cost: float, now: float) -> float:
+        state = self._keys[index]
+        return max(
+            state.cooldown_until - now,
+            state.requests.wait_time(1, now),
+            state.tokens.wait_time(cost, now),
+        )
+
+    def _health(self, index: int) -> float:
+        """Lower is healthier."""
+        state = self._keys[index]
+        latency = state.latency if state.latency is not None else 1.0
+        return latency * (1 + state.in_flight) * (1 + state.failures)
+
+    def try_acquire(self, cost: float, exclude: Collection[int] = ()) -> int | None:
+        """Reserve the healthiest key with budget now, or return None."""
+        now = self._clock()
+        ready = [
+            i
+            for i in range(self.num_keys)
+            if i not in exclude and self._delay(i, cost, now) <= 0
+        ]
+        if not ready:
+            return None
+        index = min(ready, key=self._health)
+        state = self._keys[index]
+        state.requests.take(1, now)
+        state.tokens.take(cost, now)
+        state.in_flight += 1
+        return index
+
+    async def acquire(self, cost: float, exclude: Collection[int] = ()) -> int:
+        """Wait (in arrival order) for a key with budget and reserve it."""
+        if not self._waiters:
+            index = self.try_acquire(cost, exclude)
+            if index is not None:
+                return index
+        future: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self._waiters.append((cost, exclude, future))
+        self.queued += 1
+        self._dispatch()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._unreserve(future.result(), cost)
+            raise
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Keys an earlier waiter is queued for stay theirs; later waiters may
+        # only take keys every waiter ahead of them has excluded.
+        claimed: set[int] = set()
+        remaining: deque[tuple[float, Collection[int], asyncio.Future[int]]] = deque()
+        for waiter in self._waiters:
+            cost, exclude, future = waiter
+            if future.done():
+                continue
+            if len(claimed) < self.num_keys:
+                index = self.try_acquire(cost, claimed.union(exclude))
+                if index is not None:
+                    future.set_result(index)
+                    continue
+            claimed.update(i for i in range(self.num_keys) if i not in exclude)
+            remaining.append(waiter)
+        self._waiters = remaining
+        now = self._clock()
+        delays = [
+            self._delay(i, cost, now)
+            for cost, exclude, _ in remaining
+            for i in range(self.num_keys)
+            if i not in exclude
+        ]
+        if delays:
+            self._timer = asyncio.get_running_loop().call_later(
+                max(0.01, min(delays)), self._dispatch
+            )
+
+    def _unreserve(self, index: int, cost: float) -> None:
+        """Hand back a key that was granted but never used (the caller was
+        cancelled): refund its budget without touching its health."""
+        state = self._keys[index]
+        now = self._clock()
+        state.in_flight = max(0, state.in_flight - 1)
+        state.requests.give(1, now)
+        state.tokens.give(cost, now)
+        if self._waiters:
+            self._dispatch()
+
+    def release(
+        self,
+        index: int,
+        *,
+        ok: bool = True,
+        latency: float | None = None,
+        tokens_used: float | None = None,
+        tokens_reserved: float = 0.0,
+    ) -> None:
+        """Return a key after a request, recording how it went.
+
+        ``tokens_used`` (from the response's usage metadata) corrects the
+        estimate that was reserved in ``acquire``.
+        """
+        state = self._keys[index]
+        state.in_flight = max(0, state.in_flight - 1)
+        if ok:
+            state.failures = 0
+            state.served += 1
+            if latency is not None:
+                state.latency = (
+                    latency
+                    if state.latency is None
+                    else self._alpha * latency + (1 - self._alpha) * state.latency
+                )
+        else:
+            state.failures += 1
+        if tokens_used is not None:
+            state.tokens.take(tokens_used - tokens_reserved, self._clock())
+        if self._waiters:
+            self._dispatch()
+
+    def rate_limited(self, index: int, retry_after: float | None = None) -> None:
+        """The key got a 429: bench it for ``retry_after`` (or ``cooldown``)."""
+        state = self._keys[index]
+        state.in_flight = max(0, state.in_flight - 1)
+        state.rate_limited += 1
+        state.cooldown_until = self._clock() + (
+            retry_after if retry_after is not None else self.cooldown
+        )
+        if self._waiters:
+            self._dispatch()
+
+    def stats(self) -> dict[str, Any]:
+        now = self._clock()
+        return {
+            "waiting": sum(1 for *_, f in self._waiters if not f.done()),
+            "queued_total": self.queued,
+            "keys": [
+                {
+                    "served": s.served,
+                    "rate_limited": s.rate_limited,
+                    "in_flight": s.in_flight,
+                    "cooling_down": round(max(0.0, s.cooldown_until - now), 1),
+                    "latency_ms": (
+                        round(s.latency * 1000) if s.latency is not None else None
+                    ),
+                }
+                for s in self._keys
+            ],
+        }
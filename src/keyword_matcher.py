@@ -0,0 +1,102 @@
+from collections import deque
+from typing import Iterable
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """Aho-Corasick matcher over labeled keyword sets.
+
+    ``add`` registers keywords under a label; the automaton is compiled on
+    the first ``scan`` (or an explicit ``build``), with a full transition
+    table per state so scanning is one dict lookup per character. ``scan``
+    returns every label with at least one hit, so a message is walked once
+    no matter how many keyword sets there are.
+
+    Matching is case-sensitive; callers pass lowercased text. Keywords
+    added with ``word_start``/``word_end`` only count when the match is not
+    preceded/followed by a word character (like ``\\b`` in a regex).
+    """
+
+    def __init__(self) -> None:
+        self._keywords: list[tuple[str, str, bool, bool]] = []
+        self._delta: list[dict[str, int]] | None = None
+        self._labels: list[frozenset[str]] = []
+        self._bounded: list[tuple[tuple[str, int, bool, bool], ...]] = []
+
+    def add(
+        self,
+        label: str,
+        keywords: Iterable[str],
+        *,
+        word_start: bool = False,
+        word_end: bool = False,
+    ) -> "KeywordMatcher":
+        for keyword in keywords:
+            if keyword:
+                self._keywords.append((keyword, label, word_start, word_end))
+        self._delta = None
+        return self
+
+    def build(self) -> None:
+        goto: list[dict[str, int]] = [{}]
+        labels: list[set[str]] = [set()]
+        bounded: list[list[tuple[str, int, bool, bool]]] = [[]]
+        for keyword, label, word_start, word_end in self._keywords:
+            state = 0
+            for char in keyword:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    goto.append({})
+                    labels.append(set())
+                    bounded.append([])
+                    nxt = goto[state][char] = len(goto) - 1
+                state = nxt
+            if word_start or word_end:
+                bounded[state].append((label, len(keyword), word_start, word_end))
+            else:
+                labels[state].add(label)
+
+        # Breadth-first, so a state's failure target is finished before it.
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            target = fail[state]
+            labels[state] |= labels[target]
+            bounded[state] += bounded[target]
+            delta[state] = {**delta[target], **goto[state]}
+            for char, nxt in goto[state].items():
+                fail[nxt] = delta[target].get(char, 0)
+                queue.append(nxt)
+
+        self._delta = delta
+        self._labels = [frozenset(s) for s in labels]
+        self._bounded = [tuple(b) for b in bounded]
+
+    def scan(self, text: str) -> set[str]:
+        """Return the labels of every keyword found in ``text``."""
+        if self._delta is None:
+            self.build()
+        delta = self._delta
+        labels = self._labels
+        bounded = self._bounded
+        assert delta is not None
+        hits: set[str] = set()
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = delta[state].get(char, 0)
+            if labels[state]:
+                hits |= labels[state]
+            if bounded[state]:
+                for label, length, word_start, word_end in bounded[state]:
+                    start = end - length
+                    if word_start and start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if word_end and end < len(text) and _is_word_char(text[end]):
+                        continue
+                    hits.add(label)
+        return hits
@@ -1,5 +1,5 @@
-from collections import deque
-import re as _re
+from functools import lru_cache
+from typing import NamedTuple
 from tts_player import setup_tts_commands
 from api_helpers import (
     fetch_trivia_question,
@@ -16,12 +16,21 @@ from api_helpers import (
     fetch_ai_dead_chat_starter,
     fetch_ai_unhinged_reply,
     extract_user_facts,
+    gemini_key_stats,
+    gemini_queue_stats,
+    hold_gemini_slot,
+    hedge_stats,
+    host_limiter,
+    http_sessions,
+    single_flight,
 )
 from question_bank import (
     COMPLIMENTS,
     PETS,
     QOTD_QUESTIONS,
+    RIDDLES,
     ROASTS,
+    TRIVIA_QUESTIONS,
     URDU_POETRY,
     WYR_QUESTIONS,
 )
@@ -38,13 +47,37 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 
 try:
+    from burst_debouncer import BurstDebouncer
     from config import settings
-    from data_store import JsonDataStore
+    from emoji_cache import EmojiCache, GuildEmojis
+    from data_store import SqliteDataStore, open_data_store
+    from fact_index import FactIndex
+    from fact_worker import FactExtractionWorker
+    from heavy_hitters import top_counts
     from logging_config import configure_logging, get_logger
+    from profile_store import ProfileCache, ProfileWriter, UserProfile
+    import text_processing as textproc
+    from keyword_matcher import KeywordMatcher
+    from prefetch_pool import PrefetchPool
+    from reply_similarity import RecentReplies
+    from speculative import SpeculativeWarmer
+    from retry_utils import breaker_stats
 except ImportError:
+    from .burst_debouncer import BurstDebouncer
     from .config import settings
-    from .data_store import JsonDataStore
+    from .emoji_cache import EmojiCache, GuildEmojis
+    from .data_store import SqliteDataStore, open_data_store
+    from .fact_index import FactIndex
+    from .fact_worker import FactExtractionWorker
+    from .heavy_hitters import top_counts
     from .logging_config import configure_logging, get_logger
+    from .profile_store import ProfileCache, ProfileWriter, UserProfile
+    from . import text_processing as textproc
+    from .keyword_matcher import KeywordMatcher
+    from .prefetch_pool import PrefetchPool
+    from .reply_similarity import RecentReplies
+    from .speculative import SpeculativeWarmer
+    from .retry_utils import breaker_stats
 
 # Import our modules
 
@@ -53,9 +86,31 @@ except ImportError:
 configure_logging()
 logger = get_logger(__name__)
 
+
+class QuettaTeaBot(commands.Bot):
+    async def close(self) -> None:
+        # Write out any write-behind data before the connection goes away.
+        try:
+            await data_store.close()
+        except Exception:
+            logger.exception("data store flush on shutdown failed")
+        await _fact_worker.stop()
+        try:
+            await _profile_writer.close()
+            await _user_profiles_store.close()
+        except Exception:
+            logger.exception("profile flush on shutdown failed")
+        for pool in _content_pools.values():
+            await pool.stop()
+        await _auto_replies.close()
+        _speculative.close()
+        await http_sessions.close()
+        await super().close()
+
+
 # Bot setup with intents
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = QuettaTeaBot(command_prefix="!", intents=intents)
 logger.info("Bot initialized", extra={"command_prefix": "!"})
 
 # Register TTS commands (/speak, /converse, /stopconversing, /vcleave)
@@ -102,15 +157,42 @@ async def _repost_sticky_intro(channel: discord.TextChannel) -> None:
         pass
 
 # Data storage (async-safe; serializes writes, atomic on-disk swap)
-data_store = JsonDataStore(settings.bot_data_file)
+data_store = open_data_store(
+    settings.bot_data_file,
+    backend=settings.storage_backend,
+    flush_interval=settings.data_flush_interval,
+    sqlite_path=settings.sqlite_db_file,
+    buckets=settings.data_shard_buckets,
+    codec=settings.data_codec,
+)
 bot_data = data_store.load_sync()
 
 # User profile storage — separate file so profile writes don't block bot_data
-_user_profiles_store = JsonDataStore(
+_user_profiles_store = open_data_store(
     settings.bot_data_file.parent / "user_profiles.json",
     default={},
+    backend=settings.storage_backend,
+    sqlite_path=settings.sqlite_db_file,
+    namespace="user_profiles",
+    buckets=settings.data_shard_buckets,
+    codec=settings.data_codec,
+)
+# SQLite can load one profile at a time, so only recently active users stay
+# resident; file backends rewrite whole files and keep everyone loaded.
+_user_profiles = ProfileCache(
+    loader=(
+        _user_profiles_store.get
+        if isinstance(_user_profiles_store, SqliteDataStore)
+        else None
+    ),
+    capacity=settings.profile_cache_size,
+)
+_profile_writer = ProfileWriter(
+    _user_profiles_store,
+    _user_profiles,
+    flush_interval=settings.profile_flush_interval,
+    max_dirty=settings.profile_flush_batch,
 )
-_user_profiles: dict = {}
 
 # ---------- COLOR ROLES (37 remaining after cleanup) ----------
 COLOR_ROLES = {
@@ -310,19 +392,27 @@ class NotificationView(View):
                 )
 
 
+# ==================== PREFETCHED CONTENT ====================
+# Commands serve from these in-memory pools; background tasks keep them
+# topped up. An empty pool falls back to the static question_bank lists
+# instead of making the user wait on a live fetch. OpenTDB allows one
+# request per 5s per IP, so trivia refills are spaced accordingly.
+_content_pools = {
+    "trivia": PrefetchPool(
+        "trivia", fetch_trivia_question, min_interval=6.0, key=lambda q: q["q"]
+    ),
+    "riddle": PrefetchPool("riddle", fetch_riddle, key=lambda r: r["q"]),
+    "qotd": PrefetchPool("qotd", fetch_qotd),
+    "wyr": PrefetchPool("wyr", fetch_wyr),
+}
+
 # ==================== TRIVIA GAME (API - Unlimited) ====================
 active_trivias = {}
 
 
 @bot.tree.command(name="trivia", description="Get unlimited trivia questions from API")
 async def trivia(interaction: discord.Interaction):
-    question = await fetch_trivia_question()
-    if not question:
-        question = {
-            "q": "What is the capital of Pakistan?",
-            "a": "Islamabad",
-            "options": ["Karachi", "Islamabad", "Lahore", "Quetta"],
-        }
+    question = _content_pools["trivia"].take() or random.choice(TRIVIA_QUESTIONS)
 
     embed = discord.Embed(
         title="🧠 Trivia Time!", description=question["q"], color=discord.Color.blue()
@@ -354,14 +444,16 @@ async def reveal_trivia_answer(trivia_id):
     channel = trivia_data["channel"]
 
     correct_users = []
+    changed = []
     for user_id, answer in answers.items():
         if answer.lower() == question["a"].lower():
             correct_users.append(f"<@{user_id}>")
             if user_id not in bot_data["trivia_scores"]:
                 bot_data["trivia_scores"][user_id] = 0
             bot_data["trivia_scores"][user_id] += 1
+            changed.append(("trivia_scores", user_id))
 
-    await data_store.save(bot_data)
+    await data_store.save(bot_data, changed=changed)
 
     embed = discord.Embed(
         title="🎯 Trivia Results!",
@@ -403,7 +495,11 @@ async def triviascores(interaction: discord.Interaction):
         await interaction.response.send_message("No trivia scores yet!")
         return
 
-    sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:10]
+    if isinstance(data_store, SqliteDataStore):
+        # Served from the score index instead of sorting every member.
+        sorted_scores = await data_store.top("trivia_scores", 10)
+    else:
+        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:10]
     embed = discord.Embed(title="🏆 Trivia Leaderboard", color=discord.Color.gold())
 
     for i, (user_id, score) in enumerate(sorted_scores, 1):
@@ -418,9 +514,7 @@ async def triviascores(interaction: discord.Interaction):
 
 @bot.tree.command(name="wyr", description="Get unlimited Would You Rather questions")
 async def wyr(interaction: discord.Interaction):
-    question = await fetch_wyr()
-    if not question:
-        question = random.choice(WYR_QUESTIONS)
+    question = _content_pools["wyr"].take() or random.choice(WYR_QUESTIONS)
 
     embed = discord.Embed(
         title="🤔 Would You Rather?", description=question, color=discord.Color.purple()
@@ -437,13 +531,7 @@ active_riddles = {}
 
 @bot.tree.command(name="riddle", description="Get unlimited riddles from API")
 async def riddle(interaction: discord.Interaction):
-    riddle = await fetch_riddle()
-    if not riddle:
-        riddles_list = [
-            {"q": "What has keys but no locks?", "a": "keyboard"},
-            {"q": "I speak without a mouth. What am I?", "a": "echo"},
-        ]
-        riddle = random.choice(riddles_list)
+    riddle = _content_pools["riddle"].take() or random.choice(RIDDLES)
 
     embed = discord.Embed(
         title="🤯 Riddle Time!", description=riddle["q"], color=discord.Color.orange()
@@ -535,9 +623,7 @@ async def roast(interaction: discord.Interaction, member: discord.Member = None)
 # ==================== QOTD ====================
 @bot.tree.command(name="qotd", description="Get Question of the Day")
 async def qotd(interaction: discord.Interaction):
-    question = await fetch_qotd()
-    if not question:
-        question = random.choice(QOTD_QUESTIONS)
+    question = _content_pools["qotd"].take() or random.choice(QOTD_QUESTIONS)
 
     embed = discord.Embed(
         title="💭 Question of the Day", description=question, color=discord.Color.teal()
@@ -600,7 +686,7 @@ async def on_voice_state_update(member, before, after):
 
     if before.channel is None and after.channel is not None:
         bot_data["vc_time"][server_key]["join_time"] = datetime.now().isoformat()
-        await data_store.save(bot_data)
+        await data_store.save(bot_data, changed=[("vc_time", server_key)])
         print(f"✅ {member.name} joined VC in {member.guild.name} at {datetime.now()}")
 
     elif before.channel is not None and after.channel is None:
@@ -612,7 +698,7 @@ async def on_voice_state_update(member, before, after):
 
             bot_data["vc_time"][server_key]["total_minutes"] += duration
             del bot_data["vc_time"][server_key]["join_time"]
-            await data_store.save(bot_data)
+            await data_store.save(bot_data, changed=[("vc_time", server_key)])
             print(
                 f"✅ {member.name} left VC in {member.guild.name}. Session: {duration:.1f} min, Total: {bot_data['vc_time'][server_key]['total_minutes']:.1f} min"
             )
@@ -629,7 +715,7 @@ async def vctime(interaction: discord.Interaction):
 
     if server_key not in bot_data["vc_time"]:
         bot_data["vc_time"][server_key] = {"total_minutes": 0}
-        await data_store.save(bot_data)
+        await data_store.save(bot_data, changed=[("vc_time", server_key)])
 
     total_minutes = bot_data["vc_time"][server_key].get("total_minutes", 0)
 
@@ -908,7 +994,7 @@ async def adopt(interaction: discord.Interaction):
 
     pet = random.choice(PETS)
     bot_data["pet_system"][user_id] = {"pet": pet, "hunger": 100, "happiness": 100}
-    await data_store.save(bot_data)
+    await data_store.save(bot_data, changed=[("pet_system", user_id)])
 
     embed = discord.Embed(
         title="🎉 Pet Adopted!",
@@ -1398,13 +1484,15 @@ async def on_message_delete(message):
 
 # ==================== USER PROFILE SYSTEM ====================
 
-_PROFILE_SAVE_INTERVAL = 70  # flush to disk every N messages per user
+_PROFILE_SAVE_INTERVAL = 70  # refresh signature phrases/facts every N messages
 _PROFILE_MIN_MESSAGES = 50  # minimum before persona reply activates
 _PROFILE_MAX_WORD_FREQ = 200  # cap word_freq dict size
 _PROFILE_MAX_NGRAM_FREQ = 100  # cap ngram_freq dict size
 _PROFILE_MAX_QUOTES = 10  # stored notable quotes per user
 _NGRAM_SIGNATURE_THRESHOLD = 3  # occurrences before phrase becomes signature
-_profile_dirty_counts: dict[str, int] = {}  # user_id -> messages since last save
+_FACT_QUEUE_SIZE = 100  # users waiting for background fact extraction
+_FACT_WORKERS = 2  # concurrent fact-extraction requests
+_profile_dirty_counts: dict[str, int] = {}  # user_id -> messages since refresh
 
 _STOP_WORDS = {
     "the",
@@ -1550,47 +1638,136 @@ _URDU_SIGNAL_WORDS = {
     "wala",
 }
 
+_FUNNY_SIGNALS = {"lol", "lmao", "haha", "😂", "💀", "bruh", "oof", "omg", "😭"}
+
+# Serious topic detection — skip the AI reply, not command handling.
+_SERIOUS_KEYWORDS = [
+    "death",
+    "hospital",
+    "sad",
+    "depressed",
+    "funeral",
+    "hurt",
+    "crying",
+    "suicide",
+    "cancer",
+    "died",
+    "marna",
+    "mar gaya",
+    "rona",
+    "dukh",
+    "takleef",
+    "sympathy",
+    "gonna be fine",
+    "one day u gonna be fine",
+    "missing you",
+    "cuddle",
+    "bbg",
+    # grief / loss
+    "loss",
+    "passed away",
+    "wafat",
+    "intiqal",
+    "jannat",
+    "jannah",
+    "maghfirat",
+    "sabr",
+    "inna lillahi",
+    "innalillahi",
+    "may allah",
+    "jazak allah",
+    "jazakallah",
+    "rahmat",
+    "guzar gaye",
+    "guzar gaya",
+    "nahi rahe",
+    "nahi rahi",
+    "miss him",
+    "miss her",
+    "miss them",
+    "parents",
+    "ammi",
+    "abbu",
+    "walida",
+    "walid",
+    "condolence",
+    "sorry for your loss",
+    "eid ke baad",
+]
+
+_FUNNY_KEYWORDS = [
+    "lol",
+    "lmao",
+    "haha",
+    "😂",
+    "💀",
+    "bhai",
+    "yaar",
+    "kya",
+    "oof",
+    "bruh",
+    "wtf",
+    "omg",
+    "😭",
+    "🤣",
+    "exposed",
+    "ratio",
+    "nahh",
+    "bro",
+    "skill issue",
+]
+
+_MESSAGE_SIGNALS = (
+    KeywordMatcher()
+    .add("urdu", _URDU_SIGNAL_WORDS)
+    .add("funny_signal", _FUNNY_SIGNALS)
+    .add("serious", _SERIOUS_KEYWORDS)
+    .add("funny", _FUNNY_KEYWORDS)
+)
+
+
+@lru_cache(maxsize=256)
+def _message_signals(content_lower: str) -> frozenset[str]:
+    """Labels from ``_MESSAGE_SIGNALS`` found in one lowercased message."""
+    return frozenset(_MESSAGE_SIGNALS.scan(content_lower))
 
-def _tokenize_for_profile(content: str) -> list[str]:
-    content = _re.sub(r"<a?:[A-Za-z0-9_~]+:\d+>", "", content)
-    content = _re.sub(r"https?://\S+", "", content)
-    content = _re.sub(r"<@!?\d+>", "", content)
-    content = _re.sub(r"[^\w\s]", " ", content.lower())
-    return [w for w in content.split() if len(w) >= 3]
 
+def _tokenize_for_profile(content: str) -> tuple[str, ...]:
+    return textproc.normalize_message(content).tokens
 
-def _extract_ngrams(tokens: list[str], n: int) -> list[str]:
+
+def _extract_ngrams(tokens: tuple[str, ...], n: int) -> list[str]:
     return [" ".join(tokens[i: i + n]) for i in range(len(tokens) - n + 1)]
 
 
-def _build_user_context(profile: dict) -> str:
-    parts = [f"name: {profile.get('username', profile['display_name'])}"]
+def _build_user_context(profile: UserProfile) -> str:
+    parts = [f"name: {profile.username or profile.display_name}"]
 
-    phrases = profile.get("signature_phrases", [])
+    phrases = profile.signature_phrases
     if phrases:
         parts.append(f"their phrases: {', '.join(repr(p) for p in phrases[:5])}")
 
+    word_freq = profile.word_freq
     topics = [
         w
-        for w, _ in sorted(
-            profile.get("word_freq", {}).items(), key=lambda x: x[1], reverse=True
+        for w, _ in top_counts(
+            ((w, c) for w, c in word_freq.items() if w not in _STOP_WORDS), 4
         )
-        if w not in _STOP_WORDS
-    ][:4]
+    ]
     if topics:
         parts.append(f"topics: {', '.join(topics)}")
 
-    avg = profile.get("avg_length", 0)
+    avg = profile.avg_length
     style = (
         "short punchy" if avg < 6 else ("conversational" if avg < 14 else "detailed")
     )
-    vibe = "chaotic/funny" if profile.get("funny_ratio", 0) > 0.3 else "chill"
+    vibe = "chaotic/funny" if profile.funny_ratio > 0.3 else "chill"
     urdu = (
-        "heavy roman urdu" if profile.get("urdu_ratio", 0) > 0.5 else "english-leaning"
+        "heavy roman urdu" if profile.urdu_ratio > 0.5 else "english-leaning"
     )
     parts.append(f"style: {style}, {vibe}, {urdu}")
 
-    quotes = profile.get("recent_quotes", [])
+    quotes = profile.recent_quotes
     if quotes:
         sampled = quotes[-2:]
         parts.append(f"recently said: {' / '.join(repr(q) for q in sampled)}")
@@ -1598,131 +1775,111 @@ def _build_user_context(profile: dict) -> str:
     return " | ".join(parts)
 
 
-def _retrieve_relevant_facts(profile: dict, current_message: str) -> list[str]:
-    """Score stored facts by keyword overlap with the current message, return top 3."""
-    facts = profile.get("facts", [])
-    if not facts:
-        return []
-    msg_words = set(_re.sub(r"[^\w\s]", " ", current_message.lower()).split())
-    scored = []
-    for f in facts:
-        fact_words = set(f["text"].lower().split())
-        overlap = len(fact_words & msg_words)
-        scored.append((overlap, f.get("ts", 0), f["text"]))
-    scored.sort(key=lambda x: (x[0], x[1]), reverse=True)
-    return [text for _, _, text in scored[:3]]
+def _retrieve_relevant_facts(profile: UserProfile, current_message: str) -> list[str]:
+    """Top 3 facts for the current message (BM25 with recency decay)."""
+    return profile.fact_index(_STOP_WORDS).search(current_message, 3)
+
+
+async def _merge_user_facts(user_id: str, new_fact_texts: list[str]) -> None:
+    """Merge facts from the background worker into the user's profile."""
+    import time as _time
+
+    profile = await _user_profiles.fetch(user_id)
+    if profile is None:
+        return
+    if not profile.add_facts(new_fact_texts, _time.time(), limit=30):
+        return
+    _profile_writer.mark_dirty(user_id)
+
+
+_fact_worker = FactExtractionWorker(
+    extract_user_facts,
+    _merge_user_facts,
+    max_queue=_FACT_QUEUE_SIZE,
+    concurrency=_FACT_WORKERS,
+)
 
 
 async def _update_user_profile(message: discord.Message) -> None:
-    """Passively build per-user chat profile from every message. Saves every 70 messages."""
+    """Passively build per-user chat profile from every message.
+
+    Changed profiles are persisted in batches by ``_profile_writer``; phrases
+    and facts are refreshed every 70 messages.
+    """
     user_id = str(message.author.id)
-    now_hour = str(datetime.now().hour)
+    now_hour = datetime.now().hour
     content = message.content
 
-    profile = _user_profiles.setdefault(
-        user_id,
-        {
-            "username": message.author.name,
-            "display_name": message.author.display_name,
-            "message_count": 0,
-            "word_freq": {},
-            "ngram_freq": {},
-            "signature_phrases": [],
-            "recent_quotes": [],
-            "facts": [],  # list of {"text": str, "ts": float}
-            "avg_length": 0.0,
-            "urdu_ratio": 0.0,
-            "funny_ratio": 0.0,
-            "active_hours": {},
-            "_urdu_count": 0,
-            "_funny_count": 0,
-        },
-    )
+    profile = await _user_profiles.fetch(user_id)
+    if profile is None:
+        profile = _user_profiles.put(
+            user_id,
+            UserProfile(
+                username=message.author.name,
+                display_name=message.author.display_name,
+            ),
+        )
 
-    profile["username"] = message.author.name
-    profile["display_name"] = message.author.display_name
-    profile["message_count"] += 1
-    n = profile["message_count"]
+    profile.username = message.author.name
+    profile.display_name = message.author.display_name
+    profile.message_count += 1
+    n = profile.message_count
 
-    profile["active_hours"][now_hour] = profile["active_hours"].get(now_hour, 0) + 1
+    profile.active_hours[now_hour] += 1
+    _profile_writer.mark_dirty(user_id)
 
-    tokens = _tokenize_for_profile(content)
+    normalized = textproc.normalize_message(content)
+    tokens = normalized.tokens
     if not tokens:
         return
 
     # Rolling average message length
-    profile["avg_length"] = (profile["avg_length"] * (n - 1) + len(tokens)) / n
+    profile.avg_length = (profile.avg_length * (n - 1) + len(tokens)) / n
 
-    # Word frequency
-    wf = profile["word_freq"]
+    # Word frequency (bounded top-k, see heavy_hitters.SpaceSaving)
+    words = profile.counter("word_freq", _PROFILE_MAX_WORD_FREQ)
     for w in tokens:
         if w not in _STOP_WORDS:
-            wf[w] = wf.get(w, 0) + 1
-    if len(wf) > _PROFILE_MAX_WORD_FREQ:
-        profile["word_freq"] = dict(
-            sorted(wf.items(), key=lambda x: x[1], reverse=True)[
-                :_PROFILE_MAX_WORD_FREQ
-            ]
-        )
+            words.add(sys.intern(w))
 
     # Ngram frequency (2-grams + 3-grams)
-    nf = profile["ngram_freq"]
+    ngrams = profile.counter("ngram_freq", _PROFILE_MAX_NGRAM_FREQ)
     for gram in _extract_ngrams(tokens, 2) + _extract_ngrams(tokens, 3):
-        nf[gram] = nf.get(gram, 0) + 1
-    if len(nf) > _PROFILE_MAX_NGRAM_FREQ:
-        profile["ngram_freq"] = dict(
-            sorted(nf.items(), key=lambda x: x[1], reverse=True)[
-                :_PROFILE_MAX_NGRAM_FREQ
-            ]
-        )
+        ngrams.add(sys.intern(gram))
 
     # Urdu ratio
-    content_lower = content.lower()
-    if any(w in content_lower for w in _URDU_SIGNAL_WORDS):
-        profile["_urdu_count"] += 1
-    profile["urdu_ratio"] = profile["_urdu_count"] / n
+    signals = _message_signals(normalized.lower)
+    if "urdu" in signals:
+        profile.urdu_count += 1
+    profile.urdu_ratio = profile.urdu_count / n
 
     # Funny ratio
-    funny_signals = {"lol", "lmao", "haha", "😂", "💀", "bruh", "oof", "omg", "😭"}
-    if any(k in content_lower for k in funny_signals):
-        profile["_funny_count"] += 1
-    profile["funny_ratio"] = profile["_funny_count"] / n
+    if "funny_signal" in signals:
+        profile.funny_count += 1
+    profile.funny_ratio = profile.funny_count / n
 
     # Notable quotes (long enough, not low-signal)
-    cleaned = _sanitize_ai_history_content(content)
+    cleaned = normalized.sanitized
     if len(cleaned) > 20 and not _is_low_signal_ai_message(content):
-        quotes = profile["recent_quotes"]
+        quotes = profile.recent_quotes
         quotes.append(cleaned[:200])
-        profile["recent_quotes"] = quotes[-_PROFILE_MAX_QUOTES:]
+        profile.recent_quotes = quotes[-_PROFILE_MAX_QUOTES:]
 
-    # Batch save every 70 messages
+    # Refresh derived fields every 70 messages
     dirty = _profile_dirty_counts.get(user_id, 0) + 1
     _profile_dirty_counts[user_id] = dirty
     if dirty >= _PROFILE_SAVE_INTERVAL:
-        profile["signature_phrases"] = [
+        profile.signature_phrases = [
             phrase
-            for phrase, count in sorted(
-                profile["ngram_freq"].items(), key=lambda x: x[1], reverse=True
-            )
+            for phrase, count in ngrams.top(10)
             if count >= _NGRAM_SIGNATURE_THRESHOLD
-        ][:10]
-
-        # Extract new facts from recent quotes via Groq and merge into profile
-        new_fact_texts = await extract_user_facts(profile.get("recent_quotes", []))
-        if new_fact_texts:
-            import time as _time
-
-            existing = {f["text"] for f in profile.get("facts", [])}
-            now_ts = _time.time()
-            fresh = [
-                {"text": t, "ts": now_ts}
-                for t in new_fact_texts
-                if t not in existing
-            ]
-            profile["facts"] = (profile.get("facts", []) + fresh)[-30:]
+        ]
+
+        # Fact extraction is a model round-trip; queue it off the hot path.
+        _fact_worker.submit(user_id, profile.recent_quotes)
 
         _profile_dirty_counts[user_id] = 0
-        await _user_profiles_store.save(_user_profiles)
+        _profile_writer.mark_dirty(user_id)
 
 
 # ==================== INTELLIGENT AUTO-REPLY SYSTEM ====================
@@ -1730,8 +1887,14 @@ async def _update_user_profile(message: discord.Message) -> None:
 _channel_history: dict[int, list[str]] = {}
 _channel_last_seen: dict[int, float] = {}
 _last_replied_users: dict[int, int] = {}
-_recent_bot_replies: dict[int, deque[str]] = {}
+_recent_bot_replies: dict[int, RecentReplies] = {}
+_guild_emojis = EmojiCache()
+# (channel_id, user_id) -> when the bot last answered that user there.
+_bot_threads: dict[tuple[int, int], float] = {}
+_BOT_THREAD_WINDOW = 300  # seconds a conversation counts as active
+_speculative = SpeculativeWarmer(ttl=10.0)  # Discord's typing indicator lasts ~10s
 _RECENT_REPLIES_PER_CHANNEL = 12
+_REPLY_SIMILARITY_THRESHOLD = 0.5  # shingle Jaccard that counts as a repeat
 AI_CHAT_CHANNEL_TYPES = (discord.TextChannel, discord.VoiceChannel, discord.Thread)
 _UNHINGED_CHANNELS = {"boises", "mirzapur"}
 
@@ -1744,6 +1907,11 @@ _PROACTIVE_ALLOWED_CHANNELS = {"general", "General"}
 # Channels where the bot is allowed to jump into conversations on its own
 # (random/auto replies). Everywhere else it only speaks when @mentioned.
 _AI_AUTO_REPLY_CHANNELS = {"general", "General"}
+# Auto-replies wait for this many seconds of quiet in the channel (but no
+# longer than the max wait after the burst began) and answer the latest
+# message only.
+_AUTO_REPLY_DEBOUNCE = 2.5
+_AUTO_REPLY_MAX_WAIT = 8.0
 _PROACTIVE_COOLDOWN = 10800  # 3 hrs minimum between proactive fires per channel
 LOW_SIGNAL_AI_MESSAGES = {
     "bot",
@@ -1774,7 +1942,8 @@ LOW_SIGNAL_AI_MESSAGES = {
 
 def _resolve_mentions(content: str, message: discord.Message) -> str:
     """Replace <@userid> Discord mention tokens with display names."""
-    import re
+    if "<@" not in content:
+        return content
 
     def _replace(match):
         uid = int(match.group(1))
@@ -1783,42 +1952,30 @@ def _resolve_mentions(content: str, message: discord.Message) -> str:
             return f"@{member.display_name}"
         return "@someone"
 
-    return re.sub(r"<@!?(\d+)>", _replace, content)
+    return textproc.MENTION_RE.sub(_replace, content)
 
 
 def _strip_bot_self_mentions(content: str, bot_user: discord.ClientUser | None) -> str:
     if not bot_user:
         return content
 
-    import re
-
-    content = re.sub(rf"<@!?{bot_user.id}>", "", content)
     bot_names = {
         bot_user.name,
         getattr(bot_user, "display_name", None),
         str(bot_user).split("#", 1)[0],
     }
-    for name in {n for n in bot_names if n}:
-        content = re.sub(rf"@{re.escape(name)}\b", "", content, flags=re.IGNORECASE)
-    return re.sub(r"\s+", " ", content).strip()
+    pattern = textproc.self_mention_pattern(
+        bot_user.id, frozenset(n for n in bot_names if n)
+    )
+    return " ".join(pattern.sub("", content).split())
 
 
 def _sanitize_ai_history_content(content: str) -> str:
-    import re
-
-    content = re.sub(r"<a?:[A-Za-z0-9_~]+:\d+>", "[emoji]", content)
-    content = re.sub(r":[A-Za-z0-9_~]+:", "[emoji]", content)
-    return re.sub(r"\s+", " ", content).strip()
+    return textproc.normalize_message(content).sanitized
 
 
 def _is_low_signal_ai_message(content: str) -> bool:
-    import re
-
-    text = _sanitize_ai_history_content(content).lower()
-    text = re.sub(r"<@!?\d+>|@\S+", "", text)
-    text = re.sub(r"https?://\S+", "", text).strip()
-    text_without_emoji = text.replace("[emoji]", "").strip()
-    compact = re.sub(r"[^a-z0-9]+", "", text_without_emoji)
+    compact = textproc.normalize_message(content).compact
 
     if not compact:
         return True
@@ -1830,15 +1987,42 @@ def _is_low_signal_ai_message(content: str) -> bool:
         return True
     if len(compact) <= 8 and len(set(compact)) <= 2:
         return True
-    if re.fullmatch(r"(.)\1{3,}", compact):
+    if compact == compact[0] * len(compact):
         return True
     return False
 
 
 def _has_custom_emoji_token(text: str) -> bool:
-    import re
-
-    return bool(re.search(r"<a?:[A-Za-z0-9_~]+:\d+>", text))
+    return textproc.has_custom_emoji(text)
+
+
+# (mood, trigger keywords, emoji names to try), in preference order.
+_EMOJI_MOOD_KEYWORDS = [
+    (
+        "laugh",
+        ["lol", "lmao", "haha", "😂", "🤣", "funny"],
+        ["tikkilaughing", "point_lol", "chas_agai", "dead", "bruh"],
+    ),
+    (
+        "confused",
+        ["kya", "what", "wait", "huh", "hein", "confused"],
+        ["kya", "huhhhhhh", "heinnnn", "hmmm", "interesting"],
+    ),
+    ("sad", ["sad", "cry", "😭", "dukh"], ["pepe_sad", "dukhi_meso", "cryagya"]),
+    (
+        "sus",
+        ["sus", "cooking", "cook", "plot"],
+        ["sus", "something_cooking", "whats_cooking_man"],
+    ),
+    (
+        "hype",
+        ["nice", "yay", "vibe", "real", "valid"],
+        ["yayyyyy", "cybvibe", "vibes_pakruga", "cool_smirk"],
+    ),
+]
+_EMOJI_MOODS = KeywordMatcher()
+for _mood, _keywords, _ in _EMOJI_MOOD_KEYWORDS:
+    _EMOJI_MOODS.add(_mood, _keywords)
 
 
 def _pick_ai_custom_emoji(
@@ -1846,19 +2030,11 @@ def _pick_ai_custom_emoji(
     reply: str,
     emoji_tokens_by_name: dict[str, str],
 ) -> str | None:
-    combined = f"{content_lower} {reply.lower()}"
+    moods = _EMOJI_MOODS.scan(f"{content_lower} {reply.lower()}")
     candidates: list[str] = []
-
-    if any(k in combined for k in ["lol", "lmao", "haha", "😂", "🤣", "funny"]):
-        candidates += ["tikkilaughing", "point_lol", "chas_agai", "dead", "bruh"]
-    if any(k in combined for k in ["kya", "what", "wait", "huh", "hein", "confused"]):
-        candidates += ["kya", "huhhhhhh", "heinnnn", "hmmm", "interesting"]
-    if any(k in combined for k in ["sad", "cry", "😭", "dukh"]):
-        candidates += ["pepe_sad", "dukhi_meso", "cryagya"]
-    if any(k in combined for k in ["sus", "cooking", "cook", "plot"]):
-        candidates += ["sus", "something_cooking", "whats_cooking_man"]
-    if any(k in combined for k in ["nice", "yay", "vibe", "real", "valid"]):
-        candidates += ["yayyyyy", "cybvibe", "vibes_pakruga", "cool_smirk"]
+    for mood, _, names in _EMOJI_MOOD_KEYWORDS:
+        if mood in moods:
+            candidates += names
 
     candidates += ["bruh", "kya", "hmmm", "dead", "chas_agai", "cool_smirk"]
     available = [
@@ -1869,33 +2045,94 @@ def _pick_ai_custom_emoji(
     return random.choice(available) if available else None
 
 
-def _normalize_for_similarity(text: str) -> str:
-    import re
+def _remember_bot_reply(channel_id: int, reply: str) -> None:
+    recent = _recent_bot_replies.get(channel_id)
+    if recent is None:
+        recent = _recent_bot_replies[channel_id] = RecentReplies(
+            _RECENT_REPLIES_PER_CHANNEL, _REPLY_SIMILARITY_THRESHOLD
+        )
+    recent.append(reply)
 
-    text = re.sub(r"<a?:[A-Za-z0-9_~]+:\d+>", "", text)
-    text = re.sub(r"[\W_]+", " ", text, flags=re.UNICODE)
-    return " ".join(text.lower().split())
 
+def _note_bot_thread(channel_id: int, user_id: int) -> None:
+    import time
+
+    now = time.time()
+    _bot_threads[(channel_id, user_id)] = now
+    if len(_bot_threads) > 1000:
+        for key, seen in list(_bot_threads.items()):
+            if now - seen > _BOT_THREAD_WINDOW:
+                del _bot_threads[key]
+
+
+def _in_bot_thread(channel_id: int, user_id: int) -> bool:
+    import time
+
+    seen = _bot_threads.get((channel_id, user_id))
+    return seen is not None and time.time() - seen <= _BOT_THREAD_WINDOW
+
+
+class _ReplyContext(NamedTuple):
+    emojis: GuildEmojis
+    history_source: list[str] | None
+    history: list[str]
+    user_context: str | None
+    fact_index: FactIndex | None
+    slot_held: bool
+
+
+async def _reply_context(
+    guild: discord.Guild, channel_id: int, user_id: int, *, hold_slot: bool = False
+) -> _ReplyContext:
+    """Everything a mention/comeback reply loads: the guild emoji table, the
+    channel history snapshot, the sender's profile summary and fact index,
+    and (when warming ahead of the message) a parked Gemini slot."""
+    history_source = _channel_history.get(channel_id)
+    user_context = None
+    facts = None
+    profile = await _user_profiles.fetch(str(user_id))
+    if profile is not None and profile.message_count >= _PROFILE_MIN_MESSAGES:
+        user_context = _build_user_context(profile)
+        facts = profile.fact_index(_STOP_WORDS)
+    return _ReplyContext(
+        _guild_emojis.get(guild),
+        history_source,
+        list(history_source or ()),
+        user_context,
+        facts,
+        hold_gemini_slot(_speculative.ttl) if hold_slot else False,
+    )
 
-def _is_too_similar_to_recent(candidate: str, recent: list[str]) -> bool:
-    """Reject candidate replies that are duplicates or near-duplicates of
-    something the bot already said recently in this channel."""
-    norm_candidate = _normalize_for_similarity(candidate)
-    if not norm_candidate:
-        return True
-    for prior in recent:
-        norm_prior = _normalize_for_similarity(prior)
-        if not norm_prior:
-            continue
-        if norm_candidate == norm_prior:
-            return True
-        if (
-            len(norm_candidate) >= 6
-            and len(norm_prior) >= 6
-            and (norm_candidate in norm_prior or norm_prior in norm_candidate)
-        ):
-            return True
-    return False
+
+async def _claim_reply_context(
+    message: discord.Message, history_source: list[str] | None
+) -> tuple[_ReplyContext, bool]:
+    """The context warmed while the sender was typing, or a fresh one.
+
+    A warmed history snapshot is only kept if nobody has spoken since it was
+    taken (``_channel_history`` swaps in a new list on every message)."""
+    channel_id = message.channel.id
+    warm = (
+        await _speculative.claim((channel_id, message.author.id))
+        if settings.speculative_replies
+        else None
+    )
+    if warm is None:
+        return await _reply_context(message.guild, channel_id, message.author.id), False
+    if warm.history_source is not history_source:
+        warm = warm._replace(
+            history_source=history_source, history=list(history_source or ())
+        )
+    return warm, True
+
+
+def _is_too_similar_to_recent(channel_id: int, candidate: str) -> bool:
+    """Reject candidate replies that repeat or paraphrase something the bot
+    already said recently in this channel."""
+    recent = _recent_bot_replies.get(channel_id)
+    if recent is None:
+        return not textproc.similarity_key(candidate)
+    return recent.is_too_similar(candidate)
 
 
 def _is_system_block_reply(reply: str) -> bool:
@@ -1903,25 +2140,7 @@ def _is_system_block_reply(reply: str) -> bool:
 
 
 def _fix_emoji_tokens(text: str) -> str:
-    """Repair malformed Discord custom emoji tokens the model produces:
-    - stray spaces inside the token  ("< : name : id >")
-    - a missing closing ">" (often from max_tokens truncating right at the >)
-    - dangling/truncated fragments left at the very end ("<:name:14620")
-    """
-    import re
-
-    # 1) Collapse stray spaces inside otherwise-complete tokens.
-    text = re.sub(
-        r"<\s*(a?):\s*([A-Za-z0-9_~]+)\s*:\s*(\d+)\s*>", r"<\1:\2:\3>", text
-    )
-    # 2) Add the missing ">" when the id looks complete (emoji IDs are 17+ digits).
-    text = re.sub(
-        r"<(a?):([A-Za-z0-9_~]+):(\d{17,})(?![\d>])", r"<\1:\2:\3>", text
-    )
-    # 3) Strip a dangling/truncated emoji fragment at the end of the message
-    #    (partial id < 17 digits, or no id at all) — it can't render anyway.
-    text = re.sub(r"<a?:[A-Za-z0-9_~]*(?::\d{0,16})?\s*$", "", text)
-    return text.rstrip()
+    return textproc.fix_emoji_tokens(text)
 
 
 def _typing_delay(reply: str) -> float:
@@ -1940,6 +2159,7 @@ async def maybe_send_ai_chat_reply(message):
         return
 
     now = time.time()
+    arrived = time.monotonic()
     channel_id = message.channel.id
     channel_name = message.channel.name if hasattr(message.channel, "name") else ""
     content_lower = message.content.lower() if message.content else ""
@@ -1957,7 +2177,8 @@ async def maybe_send_ai_chat_reply(message):
 
     # Capture history *before* appending the trigger so we can pass it as
     # context separately from the message we're reacting to.
-    prior_history = list(_channel_history.get(channel_id, []))
+    history_source = _channel_history.get(channel_id)
+    prior_history = list(history_source or ())
 
     # --- Bot Fathers role mention: bot reacts defensively ---
     if any(role.name == "Bot's Fathers" for role in message.role_mentions):
@@ -1988,41 +2209,43 @@ async def maybe_send_ai_chat_reply(message):
             f"{message.author.display_name}: {cleaned_content}"
         )
         _channel_history[channel_id] = _channel_history[channel_id][-15:]
-        emoji_tokens_by_name = {
-            e.name.lower(): f"<:{e.name}:{e.id}>"
-            for e in message.guild.emojis
-            if not e.animated
-        }
-        emoji_names = [token for _, token in sorted(emoji_tokens_by_name.items())][:75]
+        context, warmed = await _claim_reply_context(message, history_source)
+        emojis = context.emojis
         mention_text = cleaned_content.strip()
         # Inject bot's own recent replies so the model sees the full conversation
         bot_recent = [
             f"{bot.user.name}: {r}"
             for r in list(_recent_bot_replies.get(channel_id, ()))[-5:]
         ]
-        full_mention_history = prior_history + bot_recent
+        full_mention_history = context.history + bot_recent
 
         recent_replies_mention = list(_recent_bot_replies.get(channel_id, ()))
         if channel_name in _UNHINGED_CHANNELS:
             reply = await fetch_ai_unhinged_reply(
                 full_mention_history,
-                emoji_names,
+                emojis.tokens,
                 mention_text or cleaned_content,
                 avoid_phrases=recent_replies_mention,
+                priority="interactive",
             )
         else:
             reply = await fetch_ai_mention_reply(
                 mention_text or "(just pinged, no message)",
                 message.author.display_name,
-                emoji_names,
+                emojis.tokens,
                 full_mention_history,
                 bot_name=bot.user.name,
+                user_context=context.user_context,
+                facts=(
+                    context.fact_index.search(mention_text, 3)
+                    if context.fact_index is not None and mention_text
+                    else None
+                ),
             )
+        _speculative.record_reply(warmed, time.monotonic() - arrived)
         if reply and len(reply) > 2:
             is_block_reply = _is_system_block_reply(reply)
-            if not is_block_reply and _is_too_similar_to_recent(
-                reply, recent_replies_mention
-            ):
+            if not is_block_reply and _is_too_similar_to_recent(channel_id, reply):
                 return
             if (
                 not is_block_reply
@@ -2030,7 +2253,7 @@ async def maybe_send_ai_chat_reply(message):
                 and random.random() < 0.60
             ):
                 custom_emoji = _pick_ai_custom_emoji(
-                    content_lower, reply, emoji_tokens_by_name
+                    content_lower, reply, emojis.tokens_by_name
                 )
                 if custom_emoji:
                     reply = f"{reply.rstrip()} {custom_emoji}"
@@ -2039,11 +2262,8 @@ async def maybe_send_ai_chat_reply(message):
                 async with message.channel.typing():
                     await asyncio.sleep(_typing_delay(reply))
                 await message.reply(reply, mention_author=True)
-                if channel_id not in _recent_bot_replies:
-                    _recent_bot_replies[channel_id] = deque(
-                        maxlen=_RECENT_REPLIES_PER_CHANNEL
-                    )
-                _recent_bot_replies[channel_id].append(reply)
+                _remember_bot_reply(channel_id, reply)
+                _note_bot_thread(channel_id, message.author.id)
                 print(f"🤖 Mention reply in #{message.channel.name}: {reply[:60]}")
             except Exception:
                 logger.exception("AI mention reply failed")
@@ -2058,22 +2278,25 @@ async def maybe_send_ai_chat_reply(message):
         and message.content
         and not _is_low_signal_ai_message(message.content)
     ):
-        emoji_tokens_by_name = {
-            e.name.lower(): f"<:{e.name}:{e.id}>"
-            for e in message.guild.emojis
-            if not e.animated
-        }
-        emoji_names = [token for _, token in sorted(emoji_tokens_by_name.items())][:75]
+        context, warmed = await _claim_reply_context(message, history_source)
+        emojis = context.emojis
         reply = await fetch_ai_comeback_reply(
             ref.resolved.content[:200],
             cleaned_content,
             message.author.display_name,
-            emoji_names,
+            emojis.tokens,
+            user_context=context.user_context,
+            facts=(
+                context.fact_index.search(cleaned_content, 3)
+                if context.fact_index is not None
+                else None
+            ),
         )
+        _speculative.record_reply(warmed, time.monotonic() - arrived)
         if reply and len(reply) > 2:
             if not _has_custom_emoji_token(reply) and random.random() < 0.55:
                 custom_emoji = _pick_ai_custom_emoji(
-                    content_lower, reply, emoji_tokens_by_name)
+                    content_lower, reply, emojis.tokens_by_name)
                 if custom_emoji:
                     reply = f"{reply.rstrip()} {custom_emoji}"
             try:
@@ -2081,10 +2304,8 @@ async def maybe_send_ai_chat_reply(message):
                 async with message.channel.typing():
                     await asyncio.sleep(_typing_delay(reply))
                 await message.reply(reply, mention_author=True)
-                if channel_id not in _recent_bot_replies:
-                    _recent_bot_replies[channel_id] = deque(
-                        maxlen=_RECENT_REPLIES_PER_CHANNEL)
-                _recent_bot_replies[channel_id].append(reply)
+                _remember_bot_reply(channel_id, reply)
+                _note_bot_thread(channel_id, message.author.id)
                 print(f"🤖 Comeback in #{message.channel.name}: {reply[:60]}")
             except Exception:
                 logger.exception("AI comeback reply failed")
@@ -2111,64 +2332,29 @@ async def maybe_send_ai_chat_reply(message):
     if channel_name not in _AI_AUTO_REPLY_CHANNELS:
         return
 
+    # Collapse bursts: one reply decision per channel, made on the latest
+    # message once the channel has been quiet for a moment.
+    _auto_replies.submit(
+        channel_id, (message, prior_history, cleaned_content, content_lower)
+    )
+
+
+async def _send_auto_reply(candidate) -> None:
+    """Decide on and send an unprompted reply to the last message of a burst.
+
+    Runs from ``_auto_replies``; a newer message in the channel cancels it
+    while it is still generating or showing the typing indicator.
+    """
+    message, prior_history, cleaned_content, content_lower = candidate
+    channel_id = message.channel.id
+    channel_name = message.channel.name
+
     if _is_low_signal_ai_message(message.content):
         return
 
     # Serious topic detection — skip only the AI reply, not command handling.
-    serious_keywords = [
-        "death",
-        "hospital",
-        "sad",
-        "depressed",
-        "funeral",
-        "hurt",
-        "crying",
-        "suicide",
-        "cancer",
-        "died",
-        "marna",
-        "mar gaya",
-        "rona",
-        "dukh",
-        "takleef",
-        "sympathy",
-        "gonna be fine",
-        "one day u gonna be fine",
-        "missing you",
-        "cuddle",
-        "bbg",
-        # grief / loss
-        "loss",
-        "passed away",
-        "wafat",
-        "intiqal",
-        "jannat",
-        "jannah",
-        "maghfirat",
-        "sabr",
-        "inna lillahi",
-        "innalillahi",
-        "may allah",
-        "jazak allah",
-        "jazakallah",
-        "rahmat",
-        "guzar gaye",
-        "guzar gaya",
-        "nahi rahe",
-        "nahi rahi",
-        "miss him",
-        "miss her",
-        "miss them",
-        "parents",
-        "ammi",
-        "abbu",
-        "walida",
-        "walid",
-        "condolence",
-        "sorry for your loss",
-        "eid ke baad",
-    ]
-    if any(k in content_lower for k in serious_keywords):
+    signals = _message_signals(content_lower)
+    if "serious" in signals:
         return
 
     # Avoid replying to same person twice in a row per channel
@@ -2180,28 +2366,7 @@ async def maybe_send_ai_chat_reply(message):
     is_active_chat = len(prior_history) >= 3
 
     # Probability based on message vibe
-    funny_keywords = [
-        "lol",
-        "lmao",
-        "haha",
-        "😂",
-        "💀",
-        "bhai",
-        "yaar",
-        "kya",
-        "oof",
-        "bruh",
-        "wtf",
-        "omg",
-        "😭",
-        "🤣",
-        "exposed",
-        "ratio",
-        "nahh",
-        "bro",
-        "skill issue",
-    ]
-    is_funny = any(k in content_lower for k in funny_keywords)
+    is_funny = "funny" in signals
     base_chance = 0.06 if is_funny else 0.02
     if is_active_chat:
         base_chance *= 1.5
@@ -2212,28 +2377,22 @@ async def maybe_send_ai_chat_reply(message):
     if random.random() >= base_chance:
         return
 
-    emoji_tokens_by_name = {
-        e.name.lower(): f"<:{e.name}:{e.id}>"
-        for e in message.guild.emojis
-        if not e.animated
-    }
-    emoji_names = [token for _, token in sorted(emoji_tokens_by_name.items())][:75]
+    emojis = _guild_emojis.get(message.guild)
 
     recent_replies = list(_recent_bot_replies.get(channel_id, ()))
 
     if channel_name in _UNHINGED_CHANNELS:
         reply = await fetch_ai_unhinged_reply(
             prior_history,
-            emoji_names,
+            emojis.tokens,
             cleaned_content,
             avoid_phrases=recent_replies,
         )
     else:
         # Use persona reply if this user has a mature profile, fallback to generic
-        profile = _user_profiles.get(str(user_id))
+        profile = await _user_profiles.fetch(str(user_id))
         has_persona = (
-            profile is not None and profile.get(
-                "message_count", 0) >= _PROFILE_MIN_MESSAGES
+            profile is not None and profile.message_count >= _PROFILE_MIN_MESSAGES
         )
 
         if has_persona:
@@ -2241,25 +2400,28 @@ async def maybe_send_ai_chat_reply(message):
             user_context = _build_user_context(profile)
             reply = await fetch_ai_persona_reply(
                 prior_history,
-                emoji_names,
+                emojis.tokens,
                 cleaned_content,
                 user_context,
                 avoid_phrases=recent_replies,
                 facts=relevant_facts,
+                emoji_hint=emojis.hint,
             )
             if not reply or len(reply) <= 2:
                 reply = await fetch_ai_chat_reply(
                     prior_history,
-                    emoji_names,
+                    emojis.tokens,
                     cleaned_content,
                     avoid_phrases=recent_replies,
+                    emoji_hint=emojis.hint,
                 )
         else:
             reply = await fetch_ai_chat_reply(
                 prior_history,
-                emoji_names,
+                emojis.tokens,
                 cleaned_content,
                 avoid_phrases=recent_replies,
+                emoji_hint=emojis.hint,
             )
 
     if not reply or len(reply) <= 2:
@@ -2268,7 +2430,7 @@ async def maybe_send_ai_chat_reply(message):
     is_block_reply = _is_system_block_reply(reply)
 
     # Anti-repetition guard: drop near-duplicates of the bot's recent replies.
-    if not is_block_reply and _is_too_similar_to_recent(reply, recent_replies):
+    if not is_block_reply and _is_too_similar_to_recent(channel_id, reply):
         logger.info(
             "AI reply suppressed as repetitive",
             extra={"channel_id": channel_id, "reply": reply[:60]},
@@ -2280,7 +2442,9 @@ async def maybe_send_ai_chat_reply(message):
         return
 
     if not is_block_reply and not _has_custom_emoji_token(reply) and random.random() < 0.70:
-        custom_emoji = _pick_ai_custom_emoji(content_lower, reply, emoji_tokens_by_name)
+        custom_emoji = _pick_ai_custom_emoji(
+            content_lower, reply, emojis.tokens_by_name
+        )
         if custom_emoji:
             reply = f"{reply.rstrip()} {custom_emoji}"
 
@@ -2288,16 +2452,21 @@ async def maybe_send_ai_chat_reply(message):
         reply = _fix_emoji_tokens(reply)
         async with message.channel.typing():
             await asyncio.sleep(_typing_delay(reply))
-        await message.reply(reply, mention_author=False)
-        _last_replied_users[channel_id] = user_id
-        if channel_id not in _recent_bot_replies:
-            _recent_bot_replies[channel_id] = deque(maxlen=_RECENT_REPLIES_PER_CHANNEL)
-        _recent_bot_replies[channel_id].append(reply)
+        # Past this point a newer message no longer cancels the reply.
+        async with _auto_replies.sending(channel_id):
+            await message.reply(reply, mention_author=False)
+            _last_replied_users[channel_id] = user_id
+            _remember_bot_reply(channel_id, reply)
         print(f"🤖 AI replied in #{message.channel.name}: {reply[:60]}")
     except Exception:
         logger.exception("AI chat reply failed")
 
 
+_auto_replies = BurstDebouncer(
+    _send_auto_reply, window=_AUTO_REPLY_DEBOUNCE, max_wait=_AUTO_REPLY_MAX_WAIT
+)
+
+
 @bot.event
 async def on_message(message):
     global sticky_message_id
@@ -2667,6 +2836,19 @@ async def heartbeat_log():
             "guilds": len(bot.guilds),
             "latency_ms": round(bot.latency * 1000, 1),
             "user": str(bot.user) if bot.user else None,
+            "data_store": data_store.stats(),
+            "profiles": {**_profile_writer.stats(), **_user_profiles.stats()},
+            "fact_extraction": _fact_worker.stats(),
+            "http": http_sessions.stats(),
+            "gemini_keys": gemini_key_stats(),
+            "gemini_queue": gemini_queue_stats(),
+            "auto_reply_debounce": _auto_replies.stats(),
+            "speculative": _speculative.stats(),
+            "circuits": breaker_stats(),
+            "single_flight": single_flight.stats(),
+            "hedged_fetch": hedge_stats(),
+            "host_limits": host_limiter.stats(),
+            "prefetch": {name: pool.stats() for name, pool in _content_pools.items()},
         },
     )
 
@@ -2716,10 +2898,14 @@ async def on_ready():
         heartbeat_log.start()
     if not proactive_chat_check.is_running():
         proactive_chat_check.start()
-
-    # Load user profiles from disk
-    loaded = await _user_profiles_store.load()
-    _user_profiles.update(loaded)
+    _fact_worker.start()
+    await http_sessions.open()
+    for pool in _content_pools.values():
+        pool.start()
+
+    # Load user profiles from disk (on_ready also fires after reconnects)
+    if not _user_profiles.lazy and not _user_profiles.loaded:
+        _user_profiles.load_all(await _user_profiles_store.load())
     logger.info("user profiles loaded", extra={"count": len(_user_profiles)})
 
     logger.info(
@@ -2788,6 +2974,33 @@ async def on_ready():
             pass
 
 
+@bot.event
+async def on_guild_emojis_update(guild, before, after):
+    _guild_emojis.invalidate(guild.id)
+
+
+@bot.event
+async def on_guild_remove(guild):
+    _guild_emojis.invalidate(guild.id)
+
+
+@bot.event
+async def on_typing(channel, user, when):
+    """Speculative mode: someone the bot is talking to started typing, so
+    load what their reply will need before the message lands."""
+    if (
+        not settings.speculative_replies
+        or user.bot
+        or not getattr(channel, "guild", None)
+        or not _in_bot_thread(channel.id, user.id)
+    ):
+        return
+    _speculative.warm(
+        (channel.id, user.id),
+        lambda: _reply_context(channel.guild, channel.id, user.id, hold_slot=True),
+    )
+
+
 @bot.event
 async def on_invite_create(invite: discord.Invite):
     """Keep invite cache up to date when new invites are created."""
@@ -9,8 +9,10 @@ import discord
 from discord import app_commands
 
 try:
+    from api_helpers import single_flight
     from config import settings
 except ImportError:
+    from .api_helpers import single_flight
     from .config import settings
 
 
@@ -326,7 +328,15 @@ def _search_youtube_sync(query: str, limit: int = SEARCH_LIMIT) -> list[SearchRe
 
 
 async def search_youtube(query: str, limit: int = SEARCH_LIMIT) -> list[SearchResult]:
-    return await asyncio.to_thread(_search_youtube_sync, query, limit)
+    # Autocomplete fires per keystroke and often for the same text from
+    # several members; identical searches share one yt-dlp call.
+    return await single_flight.do(
+        ("ytsearch", query.strip().casefold(), limit),
+        asyncio.to_thread,
+        _search_youtube_sync,
+        query,
+        limit,
+    )
 
 
 async def autocomplete_song_names(
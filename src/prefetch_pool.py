@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchPool:
+    """Ready-to-serve items of one content type, refilled in the background.
+
+    ``take`` pops an item from memory (or returns None when the pool is
+    empty, so the caller can use its static fallback). Once fewer than
+    ``watermark`` items are left, a background task fetches until the pool
+    holds ``capacity`` again. Upstream calls are spaced at least
+    ``min_interval`` seconds apart, and back off exponentially (up to
+    ``max_backoff``) while the source keeps failing. Items whose ``key``
+    was seen in the last ``history`` fetched items are dropped as repeats.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Awaitable[Any]],
+        *,
+        watermark: int = 3,
+        capacity: int = 8,
+        min_interval: float = 2.0,
+        max_backoff: float = 300.0,
+        history: int = 200,
+        key: Callable[[Any], Hashable] = lambda item: item,
+    ):
+        self.name = name
+        self.watermark = watermark
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self.max_backoff = max_backoff
+        self._fetch = fetch
+        self._key = key
+        self._items: deque[Any] = deque()
+        self._recent: deque[Hashable] = deque(maxlen=history)
+        self._recent_keys: set[Hashable] = set()
+        self._wanted = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._failures = 0
+        self.served = 0
+        self.misses = 0
+        self.fetched = 0
+        self.duplicates = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def take(self) -> Any | None:
+        if len(self._items) - 1 < self.watermark:
+            self._wanted.set()
+        if not self._items:
+            self.misses += 1
+            return None
+        self.served += 1
+        return self._items.popleft()
+
+    def _remember(self, key: Hashable) -> bool:
+        """Record ``key``; False if it was already among the recent ones."""
+        if key in self._recent_keys:
+            return False
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_keys.discard(self._recent[0])
+        self._recent.append(key)
+        self._recent_keys.add(key)
+        return True
+
+    async def fetch_one(self) -> bool:
+        """One upstream call; True if it added a new item to the pool."""
+        try:
+            item = await self._fetch()
+        except Exception:
+            logger.exception("Prefetch failed", extra={"pool": self.name})
+            item = None
+        if item is None:
+            self.errors += 1
+            self._failures += 1
+            return False
+        self._failures = 0
+        self.fetched += 1
+        if not self._remember(self._key(item)):
+            self.duplicates += 1
+            return False
+        self._items.append(item)
+        return True
+
+    def _pause(self) -> float:
+        if not self._failures:
+            return self.min_interval
+        return min(self.max_backoff, self.min_interval * 2**self._failures)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wanted.wait()
+            # Bounded attempts per round so a source that keeps returning
+            # repeats can't be hammered forever.
+            for _ in range(self.capacity * 3):
+                if len(self._items) >= self.capacity:
+                    break
+                await self.fetch_one()
+                await asyncio.sleep(self._pause())
+            if len(self._items) >= self.watermark:
+                self._wanted.clear()
+            else:
+                await asyncio.sleep(self.max_backoff)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wanted.set()
+            self._task = asyncio.create_task(self._run(), name=f"prefetch-{self.name}")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "ready": len(self._items),
+            "served": self.served,
+            "misses": self.misses,
+            "fetched": self.fetched,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+        }
@@ -0,0 +1,236 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Mapping
+
+
+class StaleWorkError(Exception):
+    """The work's deadline passed before a slot was free; it was dropped."""
+
+
+@dataclass(slots=True)
+class _ClassState:
+    rank: int
+    limit: int
+    deadline: float
+    running: int = 0
+    admitted: int = 0
+    dropped: int = 0
+    max_waiting: int = 0
+    wait: float | None = None  # EWMA of queue wait for admitted work, seconds
+    held: deque[asyncio.TimerHandle] = field(default_factory=deque)
+    holds_used: int = 0
+    holds_expired: int = 0
+    holds_reclaimed: int = 0
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    rank: int
+    seq: int
+    name: str = field(compare=False)
+    expires: float = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+def _granted(future: asyncio.Future[None]) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+class PriorityScheduler:
+    """Admit work to a shared backend by priority class.
+
+    At most ``max_concurrency`` slots are held at once, and each class may
+    hold at most its own ``limit`` of them, so a flood of low-priority work
+    can never take the slots interactive work needs. Waiting work is
+    admitted lowest ``rank`` first, FIFO within a class. Work still queued
+    when its deadline (the class default, or the one passed to ``slot``)
+    passes is dropped with ``StaleWorkError`` instead of running late.
+
+    ``hold`` parks an idle slot for work that is expected shortly; the
+    next ``slot`` of that class takes it without queueing. At most
+    ``max_held`` slots are parked at once, and a parked slot is given back
+    as soon as queued work needs it, so holds only ever use spare capacity.
+
+    ``classes`` maps name -> ``(rank, limit, deadline_seconds)``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        classes: Mapping[str, tuple[int, int, float]],
+        *,
+        max_held: int = 1,
+        wait_alpha: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self._classes = {
+            name: _ClassState(rank, min(limit, max_concurrency), deadline)
+            for name, (rank, limit, deadline) in classes.items()
+        }
+        self.max_held = max_held
+        self._alpha = wait_alpha
+        self._clock = clock
+        self._running = 0
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _can_run(self, state: _ClassState) -> bool:
+        return self._running < self.max_concurrency and state.running < state.limit
+
+    def _admit(self, state: _ClassState) -> None:
+        self._running += 1
+        state.running += 1
+        state.admitted += 1
+
+    def _record_wait(self, state: _ClassState, waited: float) -> None:
+        state.wait = (
+            waited
+            if state.wait is None
+            else self._alpha * waited + (1 - self._alpha) * state.wait
+        )
+
+    def _dispatch(self) -> None:
+        if not self._waiters or self._running >= self.max_concurrency:
+            return
+        now = self._clock()
+        kept: list[_Waiter] = []
+        # Scan in priority order; a class at its cap doesn't block the
+        # classes behind it.
+        for waiter in sorted(self._waiters):
+            if waiter.future.done():
+                continue
+            state = self._classes[waiter.name]
+            if waiter.expires <= now:
+                state.dropped += 1
+                waiter.future.set_exception(StaleWorkError(waiter.name))
+            elif self._can_run(state):
+                self._admit(state)
+                waiter.future.set_result(None)
+            else:
+                kept.append(waiter)
+        self._waiters = kept
+
+    def _release(self, state: _ClassState) -> None:
+        self._running -= 1
+        state.running -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self, name: str, deadline: float | None = None
+    ) -> AsyncIterator[None]:
+        """Hold one slot of class ``name`` for the body of the ``async with``.
+
+        Raises ``StaleWorkError`` if no slot frees up within ``deadline``
+        seconds (the class default when None).
+        """
+        state = self._classes[name]
+        if state.held:
+            state.held.popleft().cancel()
+            state.holds_used += 1
+            state.admitted += 1
+            self._record_wait(state, 0.0)
+        elif not self._waiters and self._can_run(state):
+            self._admit(state)
+            self._record_wait(state, 0.0)
+        else:
+            await self._wait(name, state, deadline)
+        try:
+            yield
+        finally:
+            self._release(state)
+
+    def hold(self, name: str, ttl: float) -> bool:
+        """Take an idle slot of class ``name`` and keep it for up to ``ttl``
+        seconds for the next ``slot(name)``. Never jumps queued work."""
+        state = self._classes[name]
+        if self._waiters or not self._can_run(state) or self._held() >= self.max_held:
+            return False
+        self._running += 1
+        state.running += 1
+        handle: asyncio.TimerHandle
+
+        def expire() -> None:
+            self._expire_hold(state, handle)
+
+        handle = asyncio.get_running_loop().call_later(ttl, expire)
+        state.held.append(handle)
+        return True
+
+    def _expire_hold(self, state: _ClassState, handle: asyncio.TimerHandle) -> None:
+        state.held.remove(handle)
+        state.holds_expired += 1
+        self._release(state)
+
+    def _held(self) -> int:
+        return sum(len(state.held) for state in self._classes.values())
+
+    def _reclaim_hold(self, waiting: _ClassState) -> None:
+        """Give a parked slot back if that is all that keeps ``waiting`` out."""
+        if self._running < self.max_concurrency or waiting.running >= waiting.limit:
+            return
+        for state in self._classes.values():
+            if state.held:
+                state.held.popleft().cancel()
+                state.holds_reclaimed += 1
+                self._running -= 1
+                state.running -= 1
+                return
+
+    async def _wait(
+        self, name: str, state: _ClassState, deadline: float | None
+    ) -> None:
+        timeout = state.deadline if deadline is None else deadline
+        queued_at = self._clock()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(
+            _Waiter(state.rank, next(self._seq), name, queued_at + timeout, future)
+        )
+        state.max_waiting = max(state.max_waiting, self._waiting(name))
+        self._reclaim_hold(state)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # A slot granted in the same tick the timer fired is still used.
+            if not _granted(future):
+                if not future.done():
+                    future.cancel()
+                    state.dropped += 1
+                raise StaleWorkError(name) from None
+        except asyncio.CancelledError:
+            if _granted(future):
+                self._release(state)
+            future.cancel()
+            raise
+        self._record_wait(state, self._clock() - queued_at)
+
+    def _waiting(self, name: str) -> int:
+        return sum(1 for w in self._waiters if w.name == name and not w.future.done())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._running,
+            "classes": {
+                name: {
+                    "waiting": self._waiting(name),
+                    "max_waiting": state.max_waiting,
+                    "running": state.running,
+                    "admitted": state.admitted,
+                    "dropped": state.dropped,
+                    "held": len(state.held),
+                    "holds_used": state.holds_used,
+                    "holds_expired": state.holds_expired,
+                    "holds_reclaimed": state.holds_reclaimed,
+                    "wait_ms": (
+                        round(state.wait * 1000) if state.wait is not None else None
+                    ),
+                }
+                for name, state in self._classes.items()
+            },
+        }
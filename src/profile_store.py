@@ -0,0 +1,455 @@
+import asyncio
+import logging
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable
+
+try:
+    from fact_index import FactIndex
+    from heavy_hitters import SpaceSaving
+except ImportError:  # pragma: no cover
+    from .fact_index import FactIndex
+    from .heavy_hitters import SpaceSaving
+
+try:
+    from data_store import JsonDataStore
+except ImportError:  # pragma: no cover
+    from .data_store import JsonDataStore
+
+logger = logging.getLogger(__name__)
+
+ProfileLoader = Callable[[str], Awaitable[dict[str, Any] | None]]
+
+
+def _interned(counts: dict[str, Any] | None) -> dict[str, int]:
+    return {sys.intern(str(k)): int(v) for k, v in (counts or {}).items()}
+
+
+def _hour_histogram(hours: dict[str, Any] | None) -> array:
+    histogram = array("I", bytes(4 * 24))
+    for hour, count in (hours or {}).items():
+        try:
+            histogram[int(hour) % 24] = int(count)
+        except (TypeError, ValueError):
+            continue
+    return histogram
+
+
+@dataclass(slots=True, eq=False)
+class UserProfile:
+    """In-memory form of one user's chat profile.
+
+    Slotted, with interned word/n-gram keys and a 24-slot ``array`` for the
+    hour histogram, so a resident profile costs far less than the nested
+    dicts it is persisted as. ``from_dict``/``to_dict`` round-trip the
+    on-disk layout (including keys this class does not know about).
+    """
+
+    username: str
+    display_name: str
+    message_count: int = 0
+    word_freq: dict[str, int] = field(default_factory=dict)
+    ngram_freq: dict[str, int] = field(default_factory=dict)
+    signature_phrases: list[str] = field(default_factory=list)
+    recent_quotes: list[str] = field(default_factory=list)
+    facts: list[dict[str, Any]] = field(default_factory=list)
+    avg_length: float = 0.0
+    urdu_ratio: float = 0.0
+    funny_ratio: float = 0.0
+    active_hours: array = field(default_factory=lambda: _hour_histogram(None))
+    urdu_count: int = 0
+    funny_count: int = 0
+    extra: dict[str, Any] = field(default_factory=dict)
+    _counters: dict[str, SpaceSaving] = field(default_factory=dict, repr=False)
+    _fact_index: FactIndex | None = field(default=None, repr=False)
+
+    _KNOWN = frozenset(
+        {
+            "username",
+            "display_name",
+            "message_count",
+            "word_freq",
+            "ngram_freq",
+            "signature_phrases",
+            "recent_quotes",
+            "facts",
+            "avg_length",
+            "urdu_ratio",
+            "funny_ratio",
+            "active_hours",
+            "_urdu_count",
+            "_funny_count",
+        }
+    )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "UserProfile":
+        username = str(data.get("username") or data.get("display_name") or "")
+        return cls(
+            username=username,
+            display_name=str(data.get("display_name") or username),
+            message_count=int(data.get("message_count", 0)),
+            word_freq=_interned(data.get("word_freq")),
+            ngram_freq=_interned(data.get("ngram_freq")),
+            signature_phrases=list(data.get("signature_phrases", [])),
+            recent_quotes=list(data.get("recent_quotes", [])),
+            facts=list(data.get("facts", [])),
+            avg_length=float(data.get("avg_length", 0.0)),
+            urdu_ratio=float(data.get("urdu_ratio", 0.0)),
+            funny_ratio=float(data.get("funny_ratio", 0.0)),
+            active_hours=_hour_histogram(data.get("active_hours")),
+            urdu_count=int(data.get("_urdu_count", 0)),
+            funny_count=int(data.get("_funny_count", 0)),
+            extra={k: v for k, v in data.items() if k not in cls._KNOWN},
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data = dict(self.extra)
+        data.update(
+            {
+                "username": self.username,
+                "display_name": self.display_name,
+                "message_count": self.message_count,
+                "word_freq": dict(self.word_freq),
+                "ngram_freq": dict(self.ngram_freq),
+                "signature_phrases": list(self.signature_phrases),
+                "recent_quotes": list(self.recent_quotes),
+                "facts": [dict(f) for f in self.facts],
+                "avg_length": self.avg_length,
+                "urdu_ratio": self.urdu_ratio,
+                "funny_ratio": self.funny_ratio,
+                "active_hours": {
+                    str(hour): count
+                    for hour, count in enumerate(self.active_hours)
+                    if count
+                },
+                "_urdu_count": self.urdu_count,
+                "_funny_count": self.funny_count,
+            }
+        )
+        return data
+
+    def absorb(self, earlier: "UserProfile") -> None:
+        """Fold in ``earlier``, the persisted history of a profile that was
+        started from scratch because it was not resident yet."""
+        n_self, n_earlier = self.message_count, earlier.message_count
+        total = n_self + n_earlier
+        for name in ("word_freq", "ngram_freq"):
+            counts = dict(getattr(earlier, name))
+            for key, count in getattr(self, name).items():
+                counts[key] = counts.get(key, 0) + count
+            setattr(self, name, counts)
+        self._counters.clear()
+        if total:
+            self.avg_length = (
+                self.avg_length * n_self + earlier.avg_length * n_earlier
+            ) / total
+        self.message_count = total
+        self.urdu_count += earlier.urdu_count
+        self.funny_count += earlier.funny_count
+        self.urdu_ratio = self.urdu_count / total if total else 0.0
+        self.funny_ratio = self.funny_count / total if total else 0.0
+        for hour, count in enumerate(earlier.active_hours):
+            self.active_hours[hour] += count
+        self.signature_phrases = self.signature_phrases or earlier.signature_phrases
+        self.recent_quotes = earlier.recent_quotes + self.recent_quotes
+        known = {f.get("text") for f in self.facts}
+        self.facts = [f for f in earlier.facts if f.get("text") not in known] + (
+            self.facts
+        )
+        self._fact_index = None
+        self.extra = {**earlier.extra, **self.extra}
+
+    def counter(self, name: str, capacity: int) -> SpaceSaving:
+        """Top-k counter that updates ``word_freq``/``ngram_freq`` in place."""
+        counts = getattr(self, name)
+        counter = self._counters.get(name)
+        if counter is None or counter.counts is not counts:
+            counter = self._counters[name] = SpaceSaving(capacity, counts)
+        return counter
+
+    def fact_index(self, stop_words: Iterable[str] = ()) -> FactIndex:
+        """BM25 index over ``facts``; rebuilt if facts changed behind its back."""
+        index = self._fact_index
+        if index is None or len(index) != len(self.facts):
+            index = self._fact_index = FactIndex(stop_words)
+            for fact in self.facts:
+                index.add(str(fact.get("text", "")), float(fact.get("ts", 0)))
+        return index
+
+    def add_facts(self, texts: Iterable[str], ts: float, *, limit: int) -> int:
+        """Append new fact texts (keeping the newest ``limit``), updating the
+        index incrementally. Returns how many facts were new."""
+        existing = {f["text"] for f in self.facts}
+        fresh = []
+        for text in texts:
+            if text not in existing:
+                existing.add(text)
+                fresh.append({"text": text, "ts": ts})
+        if not fresh:
+            return 0
+        index = self._fact_index
+        if index is not None and len(index) != len(self.facts):
+            index = self._fact_index = None
+        self.facts.extend(fresh)
+        if index is not None:
+            for fact in fresh:
+                index.add(fact["text"], ts)
+        overflow = len(self.facts) - limit
+        if overflow > 0:
+            for fact in self.facts[:overflow]:
+                if index is not None:
+                    index.discard(fact["text"])
+            del self.facts[:overflow]
+        return len(fresh)
+
+
+class ProfileCache:
+    """Resident ``UserProfile`` objects, optionally bounded by an LRU.
+
+    With a ``loader`` (a per-user lookup such as ``SqliteDataStore.get``)
+    only the ``capacity`` most recently used profiles stay in memory and
+    cold ones are loaded on demand by ``fetch``. Without one every profile
+    stays resident, because file backends rewrite all records on save.
+    Pinned (unsaved) profiles are never evicted.
+    """
+
+    def __init__(
+        self, *, loader: ProfileLoader | None = None, capacity: int | None = None
+    ):
+        self._loader = loader
+        self._capacity = capacity if loader is not None else None
+        self._profiles: OrderedDict[str, UserProfile] = OrderedDict()
+        self._pinned: set[str] = set()
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._evictions = 0
+        self._loaded = False
+        # Non-lazy only: profiles created from scratch before ``load_all``.
+        self._created_before_load: set[str] = set()
+
+    @property
+    def lazy(self) -> bool:
+        return self._loader is not None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._profiles
+
+    def load_all(self, records: dict[str, Any]) -> None:
+        """Make every persisted record resident (non-lazy start-up).
+
+        Runs once; later calls are ignored. A profile created before it ran
+        started from nothing, so its persisted record is merged under it
+        rather than skipped (which would let the next save overwrite the
+        history). Other resident profiles are never merged into."""
+        if self._loaded:
+            return
+        for user_id, data in records.items():
+            if not isinstance(data, dict):
+                continue
+            resident = self._profiles.get(user_id)
+            if resident is None:
+                self._profiles[user_id] = UserProfile.from_dict(data)
+            elif user_id in self._created_before_load:
+                resident.absorb(UserProfile.from_dict(data))
+        self._loaded = True
+        self._created_before_load.clear()
+        self.trim()
+
+    def get(self, user_id: str) -> UserProfile | None:
+        """Return a resident profile without touching the store."""
+        profile = self._profiles.get(user_id)
+        if profile is not None:
+            self._profiles.move_to_end(user_id)
+        return profile
+
+    async def fetch(self, user_id: str) -> UserProfile | None:
+        """Return a profile, loading it from the store if it is cold."""
+        profile = self.get(user_id)
+        if profile is not None:
+            self._hits += 1
+            return profile
+        self._misses += 1
+        if self._loader is None:
+            return None
+        data = await self._loader(user_id)
+        self._loads += 1
+        # Another task may have created the profile while we awaited.
+        profile = self.get(user_id)
+        if profile is None and isinstance(data, dict):
+            profile = self.put(user_id, UserProfile.from_dict(data))
+        return profile
+
+    def put(self, user_id: str, profile: UserProfile) -> UserProfile:
+        if not self.lazy and not self._loaded:
+            self._created_before_load.add(user_id)
+        self._profiles[user_id] = profile
+        self._profiles.move_to_end(user_id)
+        self.trim()
+        return profile
+
+    def pin(self, user_id: str) -> None:
+        self._pinned.add(user_id)
+
+    def unpin(self, user_ids: Iterable[str]) -> None:
+        self._pinned.difference_update(user_ids)
+        self.trim()
+
+    def trim(self) -> None:
+        """Evict least recently used, unpinned profiles over capacity."""
+        if self._capacity is None:
+            return
+        excess = len(self._profiles) - self._capacity
+        if excess <= 0:
+            return
+        for user_id in list(self._profiles):
+            if excess <= 0:
+                break
+            if user_id in self._pinned:
+                continue
+            del self._profiles[user_id]
+            self._evictions += 1
+            excess -= 1
+
+    def export(self, user_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Persisted form of what a save of ``user_ids`` needs.
+
+        Lazy caches write row by row, so only those users are exported;
+        otherwise the store may rewrite whole files and needs everyone.
+        """
+        if not self.lazy:
+            return {uid: p.to_dict() for uid, p in self._profiles.items()}
+        return {
+            uid: self._profiles[uid].to_dict()
+            for uid in user_ids
+            if uid in self._profiles
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "resident": len(self._profiles),
+            "capacity": self._capacity,
+            "hits": self._hits,
+            "misses": self._misses,
+            "loads": self._loads,
+            "evictions": self._evictions,
+        }
+
+
+class ProfileWriter:
+    """Batch-persist user profiles by tracking which user ids changed.
+
+    Callers mark a user dirty after each update; only dirty records are
+    handed to the store (as ``changed=[(user_id,), ...]``). A flush runs
+    ``flush_interval`` seconds after the first unsaved change, or straight
+    away once ``max_dirty`` users are waiting, and on ``close()``.
+    """
+
+    def __init__(
+        self,
+        store: JsonDataStore,
+        profiles: ProfileCache,
+        *,
+        flush_interval: float = 30.0,
+        max_dirty: int = 50,
+    ):
+        self._store = store
+        self._profiles = profiles
+        self._flush_interval = flush_interval
+        self._max_dirty = max(1, max_dirty)
+        self._dirty: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._flushes = 0
+        self._records_flushed = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def dirty(self) -> set[str]:
+        return set(self._dirty)
+
+    def mark_dirty(self, user_id: str) -> None:
+        """Record that ``user_id``'s profile changed and schedule a flush."""
+        self._dirty.add(user_id)
+        self._profiles.pin(user_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop (e.g. at import); close() will persist it
+        if len(self._dirty) >= self._max_dirty:
+            self._cancel_timer()
+            self._flush_task = loop.create_task(self._flush_later(0))
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later(self._flush_interval))
+
+    async def _flush_later(self, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Profile flush failed")
+
+    def _cancel_timer(self) -> None:
+        task = self._flush_task
+        self._flush_task = None
+        if task is not None and not task.done():
+            task.cancel()
+
+    async def flush(self) -> int:
+        """Write every dirty profile now; returns how many were written."""
+        if not self._dirty:
+            return 0
+        user_ids, self._dirty = self._dirty, set()
+        changed = [(user_id,) for user_id in user_ids]
+        started = time.perf_counter()
+        try:
+            await self._store.save(self._profiles.export(user_ids), changed=changed)
+        except Exception:
+            # Keep them dirty so the next flush retries.
+            self._dirty |= user_ids
+            raise
+        # Saved profiles may now be evicted, unless they changed again.
+        self._profiles.unpin(user_ids - self._dirty)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._flushes += 1
+        self._records_flushed += len(user_ids)
+        self._last_flush_ms = elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        logger.debug(
+            "Flushed user profiles",
+            extra={"records": len(user_ids), "elapsed_ms": round(elapsed_ms, 2)},
+        )
+        return len(user_ids)
+
+    async def close(self) -> None:
+        """Cancel the pending timer and write anything still dirty."""
+        self._cancel_timer()
+        await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        avg = self._total_flush_ms / self._flushes if self._flushes else 0.0
+        return {
+            "dirty": len(self._dirty),
+            "flushes": self._flushes,
+            "records_flushed": self._records_flushed,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "avg_flush_ms": round(avg, 2),
+            "max_flush_ms": round(self._max_flush_ms, 2),
+        }
@@ -63,6 +63,49 @@ WYR_QUESTIONS = [
     "Would you rather be able to control fire or water?",
 ]
 
+# ==================== TRIVIA (offline fallback) ====================
+TRIVIA_QUESTIONS = [
+    {
+        "q": "What is the capital of Pakistan?",
+        "a": "Islamabad",
+        "options": ["Karachi", "Islamabad", "Lahore", "Quetta"],
+    },
+    {
+        "q": "Which is the highest mountain in Pakistan?",
+        "a": "K2",
+        "options": ["Nanga Parbat", "K2", "Tirich Mir", "Broad Peak"],
+    },
+    {
+        "q": "Which planet is known as the Red Planet?",
+        "a": "Mars",
+        "options": ["Venus", "Jupiter", "Mars", "Mercury"],
+    },
+    {
+        "q": "How many continents are there on Earth?",
+        "a": "7",
+        "options": ["5", "6", "7", "8"],
+    },
+    {
+        "q": "What is the largest ocean on Earth?",
+        "a": "Pacific Ocean",
+        "options": [
+            "Atlantic Ocean",
+            "Indian Ocean",
+            "Arctic Ocean",
+            "Pacific Ocean",
+        ],
+    },
+]
+
+# ==================== RIDDLES (offline fallback) ====================
+RIDDLES = [
+    {"q": "What has keys but no locks?", "a": "keyboard"},
+    {"q": "I speak without a mouth. What am I?", "a": "echo"},
+    {"q": "What gets wetter the more it dries?", "a": "towel"},
+    {"q": "What has hands but can't clap?", "a": "clock"},
+    {"q": "What has to be broken before you can use it?", "a": "egg"},
+]
+
 # ==================== CONVERSATION STARTERS ====================
 CONVERSATION_STARTERS = [
     "What's the most interesting thing that happened to you this week?",
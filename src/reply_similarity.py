@@ -0,0 +1,78 @@
+from collections import deque
+from typing import Iterator, NamedTuple
+
+try:
+    from text_processing import similarity_key
+except ImportError:  # pragma: no cover
+    from .text_processing import similarity_key
+
+
+def shingles(normalized: str) -> frozenset[str]:
+    """Word unigrams plus adjacent bigrams of an already-normalized reply.
+
+    Unigrams catch reordered paraphrases ("chai chalo yaar" / "yaar chalo
+    chai"); bigrams keep replies that merely share common words apart.
+    """
+    words = normalized.split()
+    return frozenset(words).union(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    overlap = len(a & b)
+    return overlap / (len(a) + len(b) - overlap)
+
+
+class _Entry(NamedTuple):
+    text: str
+    normalized: str
+    shingles: frozenset[str]
+
+
+class RecentReplies:
+    """The bot's last ``maxlen`` replies in one channel, with their normalized
+    forms and shingle sets computed once on ``append``.
+
+    Iterating yields the raw reply texts, so it can stand in for the plain
+    deque the callers used to pass as ``avoid_phrases``. ``is_too_similar``
+    checks a candidate against the window in O(window): exact and substring
+    duplicates as before, plus shingle Jaccard >= ``threshold`` for
+    paraphrased repeats.
+    """
+
+    def __init__(self, maxlen: int, threshold: float = 0.5):
+        self.threshold = threshold
+        self._entries: deque[_Entry] = deque(maxlen=maxlen)
+
+    def append(self, reply: str) -> None:
+        normalized = similarity_key(reply)
+        self._entries.append(_Entry(reply, normalized, shingles(normalized)))
+
+    def __iter__(self) -> Iterator[str]:
+        return (entry.text for entry in self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_too_similar(self, candidate: str) -> bool:
+        """Reject candidate replies that are duplicates or near-duplicates of
+        something the bot already said recently in this channel."""
+        normalized = similarity_key(candidate)
+        if not normalized:
+            return True
+        candidate_shingles = shingles(normalized)
+        for prior in self._entries:
+            if not prior.normalized:
+                continue
+            if normalized == prior.normalized:
+                return True
+            if (
+                len(normalized) >= 6
+                and len(prior.normalized) >= 6
+                and (normalized in prior.normalized or prior.normalized in normalized)
+            ):
+                return True
+            if jaccard(candidate_shingles, prior.shingles) >= self.threshold:
+                return True
+        return False
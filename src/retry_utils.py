@@ -1,6 +1,9 @@
 import asyncio
 import logging
+import math
 import random
+import time
+from collections import deque
 from typing import Any, Awaitable, Callable, Optional, Sequence, Type, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -27,6 +30,143 @@ class HttpStatusError(Exception):
         super().__init__(f"HTTP status {status}")
 
 
+class CircuitOpenError(RetryError):
+    """Raised without calling the endpoint while its circuit is open."""
+
+
+class RateLimitedError(RetryError):
+    """Raised without calling the endpoint when ``pace`` declines an attempt."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one upstream endpoint.
+
+    ``failure_threshold`` consecutive failures open the circuit; calls then
+    fail fast for ``reset_timeout`` seconds, after which one probe is let
+    through (half-open). A successful probe closes the circuit, a failed
+    one re-opens it. Latencies of successful calls, and of timed-out ones
+    (at least their deadline), feed ``timeout``, which suggests
+    ``p95 * timeout_factor`` clamped to ``[min_timeout, default]``; the
+    half-open probe always gets the full ``default``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        latency_window: int = 50,
+        min_samples: int = 10,
+        timeout_factor: float = 2.0,
+        min_timeout: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_samples = min_samples
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the probe when half-open)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency: float | None = None) -> None:
+        if latency is not None:
+            self._latencies.append(latency)
+        self._failures = 0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(
+        self, latency: float | None = None, *, final: bool = True
+    ) -> None:
+        """A failed attempt. Pass ``latency`` for timeouts so a slowing
+        endpoint pushes ``timeout`` up instead of timing out forever. Only a
+        call's ``final`` attempt counts towards opening the circuit, except
+        for the half-open probe, which fails on its first attempt."""
+        if latency is not None:
+            self._latencies.append(latency)
+        if not final and self._state != self.HALF_OPEN:
+            return
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def record_ignored(self) -> None:
+        """The call ended in a way that says nothing about the endpoint."""
+        self._probe_in_flight = False
+
+    def p95(self) -> float | None:
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def timeout(self, default: float) -> float:
+        """Per-attempt timeout: ``default`` until enough latency is seen."""
+        p95 = self.p95()
+        if p95 is None or self._state == self.HALF_OPEN:
+            return default
+        return min(default, max(self.min_timeout, p95 * self.timeout_factor))
+
+    def stats(self) -> dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "rejected": self.rejected,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **kwargs: Any) -> CircuitBreaker:
+    """The shared breaker for ``name`` (created with ``kwargs`` on first use)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+    return breaker
+
+
+def breaker_stats() -> dict[str, dict[str, Any]]:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+
 async def retry_async(
     func: Callable[..., Awaitable[Any]],
     *args: Any,
@@ -40,16 +180,51 @@ async def retry_async(
     ),
     logger: Optional[logging.Logger] = None,
     log_message: str = "Transient error, retrying",
+    breaker: Optional[CircuitBreaker] = None,
+    pace: Optional[Callable[[], Awaitable[bool]]] = None,
     **kwargs: Any,
 ) -> Any:
-    """Retry an async operation with exponential backoff."""
+    """Retry an async operation with exponential backoff.
+
+    With a ``breaker``, each call counts as at most one failure (retries
+    that still fail only report their latency) and an open circuit raises
+    ``CircuitOpenError`` (a ``RetryError``) straight away.
+
+    ``pace`` (e.g. a per-host rate limiter) is awaited before every attempt,
+    ahead of the breaker and outside the timed call, so its wait never counts
+    as upstream latency. If it returns False the call raises
+    ``RateLimitedError``; a skipped first attempt leaves the breaker
+    untouched, a skipped retry counts the earlier failure as final.
+    """
     logger = logger or logging.getLogger(__name__)
     attempt = 0
     while True:
+        if pace is not None and not await pace():
+            if breaker is not None and attempt:
+                breaker.record_failure()  # the call still failed upstream
+            raise RateLimitedError("Attempt skipped by rate limiter")
+        if breaker is not None and not breaker.allow():
+            logger.warning(
+                "Circuit open, failing fast",
+                extra={"endpoint": breaker.name, "attempt": attempt},
+            )
+            raise CircuitOpenError(f"Circuit open for {breaker.name}")
+        started = time.monotonic()
         try:
             result = await func(*args, **kwargs)
+            if breaker is not None:
+                breaker.record_success(time.monotonic() - started)
             return result
         except tuple(retry_exceptions) as exc:
+            if breaker is not None:
+                breaker.record_failure(
+                    (
+                        time.monotonic() - started
+                        if isinstance(exc, asyncio.TimeoutError)
+                        else None
+                    ),
+                    final=attempt >= retries,
+                )
             if attempt >= retries:
                 logger.error(
                     "Retry attempts exhausted",
@@ -68,3 +243,7 @@ async def retry_async(
             )
             await asyncio.sleep(delay_seconds)
             attempt += 1
+        except BaseException:
+            if breaker is not None:
+                breaker.record_ignored()
+            raise
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Warm:
+    task: asyncio.Task[Any]
+    expiry: asyncio.TimerHandle
+
+
+class SpeculativeWarmer:
+    """Build reply context while a user is still typing.
+
+    ``warm(key, build)`` starts ``build()`` in the background (once per key)
+    and keeps the result for ``ttl`` seconds, about as long as Discord shows
+    a typing indicator. ``claim(key)`` takes it when the message arrives,
+    waiting for the build if it is still running, or returns None if
+    nothing was warmed. ``record_reply`` collects time-to-generation for
+    warm and cold replies so ``stats`` can show what speculation saves.
+    """
+
+    def __init__(self, *, ttl: float = 10.0, ewma_alpha: float = 0.2):
+        self.ttl = ttl
+        self._alpha = ewma_alpha
+        self._warm: dict[Hashable, _Warm] = {}
+        self._latency: dict[bool, float] = {}
+        self.started = 0
+        self.hits = 0
+        self.expired = 0
+        self.failed = 0
+
+    def warm(
+        self, key: Hashable, build: Callable[[], Coroutine[Any, Any, Any]]
+    ) -> bool:
+        """Start warming ``key`` unless it is already warm."""
+        if key in self._warm:
+            return False
+        loop = asyncio.get_running_loop()
+        task: asyncio.Task[Any] = asyncio.create_task(build())
+        self._warm[key] = _Warm(task, loop.call_later(self.ttl, self._expire, key))
+        self.started += 1
+        return True
+
+    def _expire(self, key: Hashable) -> None:
+        entry = self._warm.pop(key, None)
+        if entry is not None:
+            entry.task.cancel()
+            self.expired += 1
+
+    async def claim(self, key: Hashable) -> Any | None:
+        entry = self._warm.pop(key, None)
+        if entry is None:
+            return None
+        entry.expiry.cancel()
+        try:
+            context = await entry.task
+        except asyncio.CancelledError:
+            if entry.task.cancelled():
+                return None
+            raise
+        except Exception:
+            self.failed += 1
+            logger.exception("Speculative warm-up failed")
+            return None
+        self.hits += 1
+        return context
+
+    def record_reply(self, warm: bool, seconds: float) -> None:
+        """Time from the message arriving to the reply text being generated
+        (before any typing delay, which is the same for warm and cold)."""
+        prior = self._latency.get(warm)
+        self._latency[warm] = (
+            seconds
+            if prior is None
+            else self._alpha * seconds + (1 - self._alpha) * prior
+        )
+
+    def close(self) -> None:
+        for key in list(self._warm):
+            self._expire(key)
+
+    def stats(self) -> dict[str, Any]:
+        warm_s = self._latency.get(True)
+        cold_s = self._latency.get(False)
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "expired": self.expired,
+            "failed": self.failed,
+            "warm_reply_ms": round(warm_s * 1000) if warm_s is not None else None,
+            "cold_reply_ms": round(cold_s * 1000) if cold_s is not None else None,
+            "saved_ms": (
+                round((cold_s - warm_s) * 1000)
+                if warm_s is not None and cold_s is not None
+                else None
+            ),
+        }
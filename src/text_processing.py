@@ -0,0 +1,132 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+CUSTOM_EMOJI_RE = re.compile(r"<a?:[A-Za-z0-9_~]+:\d+>")
+MENTION_RE = re.compile(r"<@!?(\d+)>")
+WHITESPACE_RE = re.compile(r"\s+")
+
+# One scan over the raw message finds every span the normalized forms treat
+# specially. Alternation order matters: a custom emoji has to win over the
+# ":name:" shortcode inside it.
+_SEGMENT_RE = re.compile(
+    r"(?P<emoji><a?:[A-Za-z0-9_~]+:\d+>)"
+    r"|(?P<mention><@!?\d+>)"
+    r"|(?P<url>(?i:https?://)\S+)"
+    r"|(?P<shortcode>:[A-Za-z0-9_~]+:)"
+    r"|(?P<at>@\S+)"
+)
+_ANY_EMOJI_RE = re.compile(r"<a?:[A-Za-z0-9_~]+:\d+>|:[A-Za-z0-9_~]+:")
+_TOKEN_STRIP_RE = re.compile(r"<a?:[A-Za-z0-9_~]+:\d+>|https?://\S+|<@!?\d+>")
+_WORD_RE = re.compile(r"\w+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_SIMILARITY_WORD_RE = re.compile(r"[^\W_]+")
+
+_EMOJI_TOKEN_SPACES_RE = re.compile(r"<\s*(a?):\s*([A-Za-z0-9_~]+)\s*:\s*(\d+)\s*>")
+_EMOJI_TOKEN_UNCLOSED_RE = re.compile(r"<(a?):([A-Za-z0-9_~]+):(\d{17,})(?![\d>])")
+_EMOJI_TOKEN_DANGLING_RE = re.compile(r"<a?:[A-Za-z0-9_~]*(?::\d{0,16})?\s*$")
+
+
+class NormalizedText(NamedTuple):
+    """Every derived form of one message, built in a single pass.
+
+    ``sanitized`` has emoji replaced by ``[emoji]`` and whitespace collapsed
+    (what goes into AI history and quotes). ``tokens`` are the lowercase
+    words of 3+ chars with emoji, links and mentions removed (profile
+    stats). ``compact`` is the lowercase ``[a-z0-9]`` residue once emoji,
+    links and mentions are gone (low-signal checks).
+    """
+
+    lower: str
+    sanitized: str
+    tokens: tuple[str, ...]
+    compact: str
+
+
+@lru_cache(maxsize=256)
+def normalize_message(content: str) -> NormalizedText:
+    """Normalize ``content`` once; repeat calls for the same text are cached.
+
+    ``on_message`` feeds the same content to the profile updater and the
+    auto-reply path, so the second caller gets the first caller's result.
+    """
+    sanitized: list[str] = []
+    words: list[str] = []
+    residue: list[str] = []
+    pos = 0
+    for match in _SEGMENT_RE.finditer(content):
+        start, end = match.span()
+        if start > pos:
+            plain = content[pos:start]
+            sanitized.append(plain)
+            words.append(plain)
+            residue.append(plain)
+        kind = match.lastgroup
+        segment = match.group()
+        if kind == "emoji" or kind == "shortcode":
+            sanitized.append("[emoji]")
+            if kind == "shortcode":
+                words.append(segment)
+        elif kind == "mention":
+            sanitized.append(segment)
+        else:  # url or @word
+            sanitized.append(
+                _ANY_EMOJI_RE.sub("[emoji]", segment) if ":" in segment else segment
+            )
+            if kind == "at":
+                words.append(_TOKEN_STRIP_RE.sub("", segment))
+        pos = end
+    if pos == 0:
+        sanitized.append(content)
+        words.append(content)
+        residue.append(content)
+    elif pos < len(content):
+        plain = content[pos:]
+        sanitized.append(plain)
+        words.append(plain)
+        residue.append(plain)
+
+    return NormalizedText(
+        lower=content.lower(),
+        sanitized=" ".join("".join(sanitized).split()),
+        tokens=tuple(
+            w for w in _WORD_RE.findall("".join(words).lower()) if len(w) >= 3
+        ),
+        compact=_NON_ALNUM_RE.sub("", "".join(residue).lower()),
+    )
+
+
+def similarity_key(text: str) -> str:
+    """Lowercase words of ``text`` with custom emoji and punctuation dropped."""
+    text = CUSTOM_EMOJI_RE.sub("", text)
+    return " ".join(_SIMILARITY_WORD_RE.findall(text.lower()))
+
+
+def has_custom_emoji(text: str) -> bool:
+    return CUSTOM_EMOJI_RE.search(text) is not None
+
+
+def fix_emoji_tokens(text: str) -> str:
+    """Repair malformed Discord custom emoji tokens the model produces:
+    - stray spaces inside the token  ("< : name : id >")
+    - a missing closing ">" (often from max_tokens truncating right at the >)
+    - dangling/truncated fragments left at the very end ("<:name:14620")
+    """
+    if "<" not in text:
+        return text.rstrip()
+    # 1) Collapse stray spaces inside otherwise-complete tokens.
+    text = _EMOJI_TOKEN_SPACES_RE.sub(r"<\1:\2:\3>", text)
+    # 2) Add the missing ">" when the id looks complete (emoji IDs are 17+ digits).
+    text = _EMOJI_TOKEN_UNCLOSED_RE.sub(r"<\1:\2:\3>", text)
+    # 3) Strip a dangling/truncated emoji fragment at the end of the message
+    #    (partial id < 17 digits, or no id at all) — it can't render anyway.
+    text = _EMOJI_TOKEN_DANGLING_RE.sub("", text)
+    return text.rstrip()
+
+
+@lru_cache(maxsize=8)
+def self_mention_pattern(user_id: int, names: frozenset[str]) -> re.Pattern[str]:
+    """Pattern matching ``<@id>`` and ``@name`` mentions of one account."""
+    alternatives = [rf"<@!?{user_id}>"]
+    alternatives += [rf"@{re.escape(name)}\b" for name in sorted(names)]
+    return re.compile("|".join(alternatives), re.IGNORECASE)
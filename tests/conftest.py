@@ -73,3 +73,13 @@ def pytest_sessionfinish(session, exitstatus):
 def project_root():
     """Fixture to get project root directory"""
     return Path(__file__).parent.parent
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Fresh circuit breakers per test; the registry is module-level state."""
+    from src import retry_utils
+
+    retry_utils._breakers.clear()
+    yield
+    retry_utils._breakers.clear()
@@ -15,7 +15,9 @@ from src.question_bank import (
     WYR_QUESTIONS,
     CONVERSATION_STARTERS,
     COMPLIMENTS,
+    RIDDLES,
     ROASTS,
+    TRIVIA_QUESTIONS,
     get_random_question,
 )
 
@@ -47,6 +49,16 @@ class TestQuestionBankData:
         for r in ROASTS:
             assert isinstance(r, str), f"Expected str, got {type(r)}"
 
+    def test_trivia_answers_are_options(self):
+        assert TRIVIA_QUESTIONS
+        for q in TRIVIA_QUESTIONS:
+            assert q["a"] in q["options"], q["q"]
+
+    def test_riddles_have_answers(self):
+        assert RIDDLES
+        for r in RIDDLES:
+            assert r["q"] and r["a"]
+
     def test_no_duplicate_qotd(self):
         assert len(QOTD_QUESTIONS) == len(set(QOTD_QUESTIONS))
 
@@ -1,3 +1,7 @@
+import asyncio
+import time
+
+import pytest
 from pydantic import SecretStr
 
 from src import api_helpers
@@ -105,7 +109,9 @@ async def test_fetch_ai_chat_reply_returns_gemini_response(monkeypatch):
 
     captured = {}
 
-    async def fake_gemini_request(system, user, max_tokens=200, temperature=0.7):
+    async def fake_gemini_request(
+        system, user, max_tokens=200, temperature=0.7, priority="interactive"
+    ):
         captured["system"] = system
         captured["user"] = user
         return "bro got cooked 💀"
@@ -130,7 +136,9 @@ async def test_fetch_ai_chat_reply_passes_avoid_phrases(monkeypatch):
 
     captured = {}
 
-    async def fake_gemini_request(system, user, max_tokens=200, temperature=0.7):
+    async def fake_gemini_request(
+        system, user, max_tokens=200, temperature=0.7, priority="interactive"
+    ):
         captured["system"] = system
         captured["user"] = user
         return "fresh reply"
@@ -173,7 +181,9 @@ async def test_fetch_ai_summary_passes_messages_to_gemini(monkeypatch):
 
     captured = {}
 
-    async def fake_gemini_request(system, user, max_tokens=200, temperature=0.7):
+    async def fake_gemini_request(
+        system, user, max_tokens=200, temperature=0.7, priority="interactive"
+    ):
         captured["user"] = user
         captured["max_tokens"] = max_tokens
         return "Summary text"
@@ -191,3 +201,274 @@ def test_http_status_error_stores_status_and_body():
     assert err.status == 503
     assert err.body == "service unavailable"
     assert "503" in str(err)
+
+
+def test_is_unsafe_ai_output_matches_whole_words_only():
+    assert api_helpers._is_unsafe_ai_output("bas KAR, mar   ja")
+    assert api_helpers._is_unsafe_ai_output("katl dunga tujhe")
+    assert not api_helpers._is_unsafe_ai_output("umar jaan")
+    assert not api_helpers._is_unsafe_ai_output("skys are blue")
+
+
+def test_validate_reply_drops_banned_phrases():
+    assert api_helpers._validate_reply("Great question yaar") is None
+    assert api_helpers._validate_reply("chai pe chalo") == "chai pe chalo"
+
+
+async def test_fetch_ai_chat_reply_uses_precomputed_emoji_hint(monkeypatch):
+    monkeypatch.setattr(
+        api_helpers.settings, "gemini_api_key_1", SecretStr("fake-gemini-key")
+    )
+
+    captured = {}
+
+    async def fake_gemini_request(
+        system, user, max_tokens=200, temperature=0.7, priority="interactive"
+    ):
+        captured["system"] = system
+        return "theek hai"
+
+    monkeypatch.setattr(api_helpers, "_gemini_request", fake_gemini_request)
+
+    await api_helpers.fetch_ai_chat_reply(
+        ["context"], ("<:a:1>",), "hi", emoji_hint="<:cached:2>"
+    )
+
+    assert "<:cached:2>" in captured["system"]
+    assert "<:a:1>" not in captured["system"]
+
+
+class _FakeResponse:
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self._body = body
+        self.headers = headers or {}
+
+    async def text(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSessions:
+    def __init__(self, responses):
+        self.responses = responses
+        self.keys_used = []
+
+    def get(self):
+        return self
+
+    def post(self, url, params=None, **kwargs):
+        self.keys_used.append(params["key"])
+        return self.responses[params["key"]]
+
+
+async def test_gemini_request_moves_past_rate_limited_key(monkeypatch):
+    monkeypatch.setattr(api_helpers.settings, "gemini_api_key_1", SecretStr("k1"))
+    monkeypatch.setattr(api_helpers.settings, "gemini_api_key_2", SecretStr("k2"))
+    monkeypatch.setattr(api_helpers, "_key_scheduler", None)
+    ok_body = (
+        '{"candidates": [{"content": {"parts": [{"text": "chai time"}]}}],'
+        ' "usageMetadata": {"totalTokenCount": 42}}'
+    )
+    sessions = _FakeSessions(
+        {
+            "k1": _FakeResponse(429, '{"retryDelay": "12s"}'),
+            "k2": _FakeResponse(200, ok_body),
+        }
+    )
+    monkeypatch.setattr(api_helpers, "http_sessions", sessions)
+    # Make k1 look healthiest so it is picked first.
+    scheduler = api_helpers._get_key_scheduler(2)
+    scheduler.release(scheduler.try_acquire(1, exclude={1}), latency=0.01)
+
+    assert await api_helpers._gemini_request("sys", "user") == "chai time"
+
+    assert sessions.keys_used == ["k1", "k2"]
+    keys = scheduler.stats()["keys"]
+    assert keys[0]["rate_limited"] == 1
+    assert keys[0]["cooling_down"] > 10
+    assert keys[1]["served"] == 1
+
+
+async def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = api_helpers.SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    async def fetch(url):
+        calls.append(url)
+        await release.wait()
+        return {"question": "chai or coffee?"}
+
+    tasks = [
+        asyncio.create_task(flight.do(("json", "wyr"), fetch, "wyr")) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == ["wyr"]
+    assert results[0] is results[1] is results[2]
+    assert flight.stats() == {"started": 1, "joined": 2, "in_flight": 0}
+
+
+async def test_single_flight_survives_a_caller_giving_up():
+    flight = api_helpers.SingleFlight()
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "done"
+
+    impatient = asyncio.create_task(
+        asyncio.wait_for(flight.do("k", slow), timeout=0.01)
+    )
+    patient = asyncio.create_task(flight.do("k", slow))
+    with pytest.raises(asyncio.TimeoutError):
+        await impatient
+    release.set()
+
+    assert await patient == "done"
+
+
+async def test_single_flight_cancels_a_call_nobody_waits_for():
+    flight = api_helpers.SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flight.do("k", slow), timeout=0.01)
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_single_flight_starts_fresh_after_completion():
+    flight = api_helpers.SingleFlight()
+
+    async def value(v):
+        return v
+
+    assert await flight.do("k", value, 1) == 1
+    assert await flight.do("k", value, 2) == 2
+    assert flight.stats()["started"] == 2
+
+
+async def test_hedged_fetch_starts_fallback_when_primary_hangs():
+    hedge = api_helpers.HedgedFetch("t", default_delay=0.01)
+    primary_cancelled = asyncio.Event()
+
+    async def hanging():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+
+    async def fallback():
+        return "fallback"
+
+    result = await hedge.run([("primary", hanging), ("fallback", fallback)])
+
+    assert result == "fallback"
+    await asyncio.wait_for(primary_cancelled.wait(), 1)
+    assert hedge.stats()["wins"] == {"fallback": 1}
+    assert hedge.stats()["hedged"] == 1
+
+
+async def test_hedged_fetch_hands_over_immediately_on_failure():
+    hedge = api_helpers.HedgedFetch("t", default_delay=10)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def empty():
+        return None
+
+    async def fallback():
+        return "ok"
+
+    result = await asyncio.wait_for(
+        hedge.run([("a", broken), ("b", empty), ("c", fallback)]), 1
+    )
+    assert result == "ok"
+    assert hedge.stats()["hedged"] == 0
+
+
+async def test_hedged_fetch_race_returns_fastest_and_none_when_exhausted():
+    hedge = api_helpers.HedgedFetch("t", default_delay=10)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "slow"
+
+    async def fast():
+        return "fast"
+
+    async def empty():
+        return None
+
+    assert await hedge.run([("slow", slow), ("fast", fast)], race=True) == "fast"
+    assert await hedge.run([("a", empty), ("b", empty)]) is None
+    assert hedge.stats()["exhausted"] == 1
+
+
+async def test_hedged_fetch_delay_tracks_primary_p95():
+    hedge = api_helpers.HedgedFetch("t", min_delay=0.0, max_delay=5.0, min_samples=3)
+
+    async def quick():
+        return "x"
+
+    assert hedge.delay() == hedge.default_delay
+    for _ in range(3):
+        await hedge.run([("primary", quick)])
+    assert hedge.delay() < 0.1
+
+
+async def test_gemini_request_dropped_when_stale_in_queue(monkeypatch):
+    from src.priority_scheduler import PriorityScheduler
+
+    scheduler = PriorityScheduler(
+        1, {"interactive": (0, 1, 5.0), "background": (1, 1, 0.01)}
+    )
+    monkeypatch.setattr(api_helpers, "_gemini_scheduler", scheduler)
+    sent = []
+
+    async def fake_send(*args):
+        sent.append(args)
+        return "ok"
+
+    monkeypatch.setattr(api_helpers, "_gemini_send", fake_send)
+
+    async with scheduler.slot("interactive"):
+        result = await api_helpers._gemini_request("s", "u", priority="background")
+
+    assert result is None
+    assert sent == []
+    assert await api_helpers._gemini_request("s", "u") == "ok"
+
+
+async def test_host_rate_limiter_spaces_callers_sharing_a_host():
+    limiter = api_helpers.HostRateLimiter({"opentdb.com": 0.05}, max_wait=0.08)
+
+    started = time.monotonic()
+    assert await limiter.acquire("opentdb.com")
+    assert await limiter.acquire("opentdb.com")
+    assert time.monotonic() - started >= 0.05
+    assert await limiter.acquire("example.com")  # unlisted hosts are not spaced
+
+    # The next free slot is now more than max_wait away: skip, don't queue.
+    limiter._next["opentdb.com"] = time.monotonic() + 1.0
+    assert not await limiter.acquire("opentdb.com")
+    assert limiter.stats() == {"waited": 1, "skipped": 1}
@@ -0,0 +1,108 @@
+import asyncio
+
+from src.burst_debouncer import BurstDebouncer
+
+
+async def _settle(seconds=0.05):
+    await asyncio.sleep(seconds)
+
+
+async def test_burst_fires_once_on_latest_item():
+    seen = []
+
+    async def handler(item):
+        seen.append(item)
+
+    debouncer = BurstDebouncer(handler, window=0.02, max_wait=1.0)
+    for item in ("a", "b", "c"):
+        debouncer.submit("general", item)
+        await asyncio.sleep(0.005)
+    await _settle()
+
+    assert seen == ["c"]
+    assert debouncer.stats()["fired"] == 1
+
+
+async def test_keys_are_debounced_independently():
+    seen = []
+
+    async def handler(item):
+        seen.append(item)
+
+    debouncer = BurstDebouncer(handler, window=0.01)
+    debouncer.submit(1, "one")
+    debouncer.submit(2, "two")
+    await _settle()
+
+    assert sorted(seen) == ["one", "two"]
+
+
+async def test_steady_stream_still_fires_after_max_wait():
+    seen = []
+
+    async def handler(item):
+        seen.append(item)
+
+    debouncer = BurstDebouncer(handler, window=0.03, max_wait=0.05)
+    for i in range(10):
+        debouncer.submit("general", i)
+        await asyncio.sleep(0.01)
+
+    assert seen  # fired mid-stream despite never being quiet for the window
+    await debouncer.close()
+
+
+async def test_newer_item_cancels_stale_generation():
+    started, finished = [], []
+    gate = asyncio.Event()
+
+    async def handler(item):
+        started.append(item)
+        await gate.wait()
+        finished.append(item)
+
+    debouncer = BurstDebouncer(handler, window=0.01)
+    debouncer.submit("general", "old")
+    await _settle(0.03)
+    debouncer.submit("general", "new")
+    gate.set()
+    await _settle()
+
+    assert started == ["old", "new"]
+    assert finished == ["new"]
+    assert debouncer.stats()["cancelled_stale"] == 1
+
+
+async def test_sending_handler_is_not_cancelled():
+    delivered = []
+    gate = asyncio.Event()
+
+    async def handler(item):
+        async with debouncer.sending("general"):
+            await gate.wait()
+            delivered.append(item)
+
+    debouncer = BurstDebouncer(handler, window=0.01)
+    debouncer.submit("general", "old")
+    await _settle(0.03)
+    debouncer.submit("general", "new")
+    gate.set()
+    await _settle()
+
+    assert delivered == ["old", "new"]
+    assert debouncer.stats()["cancelled_stale"] == 0
+
+
+async def test_close_drops_pending_bursts():
+    seen = []
+
+    async def handler(item):
+        seen.append(item)
+
+    debouncer = BurstDebouncer(handler, window=0.01)
+    debouncer.submit("general", "x")
+    await debouncer.close()
+    await _settle()
+
+    assert seen == []
+    assert debouncer.stats()["pending"] == 0
@@ -1,10 +1,21 @@
 import asyncio
 import json
+import time
 from pathlib import Path
 
 import pytest
 
-from src.data_store import JsonDataStore
+from src import data_store
+from src.data_store import (
+    JournaledDataStore,
+    JsonDataStore,
+    ShardedDataStore,
+    SqliteDataStore,
+    available_codecs,
+    get_codec,
+    migrate_json_to_sqlite,
+    open_data_store,
+)
 
 
 def test_load_sync_creates_default_file(tmp_path: Path):
@@ -21,9 +32,37 @@ def test_load_sync_recovers_from_corrupt_json(tmp_path: Path):
     target = tmp_path / "bot_data.json"
     target.write_text("not valid json {{{", encoding="utf-8")
 
-    data = JsonDataStore(target).load_sync()
+    store = JsonDataStore(target)
+    data = store.load_sync()
 
     assert data == {"pet_system": {}, "vc_time": {}, "trivia_scores": {}}
+    assert store.last_recovery["recovered_entries"] == 0
+
+
+def test_load_sync_salvages_entries_before_damage(tmp_path: Path):
+    target = tmp_path / "user_profiles.json"
+    intact = '{\n  "1": {"n": 1},\n  "2": {"n": [1, 2]},\n'
+    target.write_text(intact + '  "3": {"n": co 3}\n}\n', encoding="utf-8")
+
+    store = JsonDataStore(target, default={})
+    data = store.load_sync()
+
+    assert data == {"1": {"n": 1}, "2": {"n": [1, 2]}}
+    assert store.last_recovery["recovered_entries"] == 2
+    # Corrupt original is kept, and the repaired file parses again.
+    backups = list(tmp_path.glob("user_profiles.json.corrupt-*"))
+    assert len(backups) == 1
+    assert "co 3" in backups[0].read_text(encoding="utf-8")
+    assert json.loads(target.read_text(encoding="utf-8")) == data
+
+
+def test_salvage_fills_missing_default_namespaces(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    target.write_text('{"pet_system": {"u": 1}, "vc_time": {"x": ', encoding="utf-8")
+
+    data = JsonDataStore(target).load_sync()
+
+    assert data == {"pet_system": {"u": 1}, "vc_time": {}, "trivia_scores": {}}
 
 
 async def test_async_save_round_trips(tmp_path: Path):
@@ -97,3 +136,439 @@ async def test_save_accepts_arbitrary_json_compatible_payload(
     store = JsonDataStore(tmp_path / "bot_data.json")
     await store.save(payload)
     assert await store.load() == payload
+
+
+async def test_write_behind_coalesces_saves_into_one_write(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JsonDataStore(target, flush_interval=0.05)
+    data = {"vc_time": {}}
+
+    for i in range(5):
+        data["vc_time"]["u"] = i
+        await store.save(data)
+
+    assert not target.exists()
+    assert store.dirty
+
+    await asyncio.sleep(0.15)
+
+    assert json.loads(target.read_text(encoding="utf-8")) == {"vc_time": {"u": 4}}
+    stats = store.stats()
+    assert stats["save_requests"] == 5
+    assert stats["coalesced_writes"] == 4
+    assert stats["disk_writes"] == 1
+
+
+async def test_save_serializes_snapshot_not_live_data(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    target = tmp_path / "bot_data.json"
+    store = JsonDataStore(target)
+    store.load_sync()
+    data = {"vc_time": {"u": 1}, "trivia_scores": {}}
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    original = store._write_sync
+
+    def slow_write(snapshot):
+        loop.call_soon_threadsafe(started.set)
+        time.sleep(0.05)
+        original(snapshot)
+
+    monkeypatch.setattr(store, "_write_sync", slow_write)
+    task = asyncio.create_task(store.save(data))
+    await started.wait()
+    for i in range(200):
+        data["vc_time"][f"x{i}"] = i
+    await task
+
+    assert json.loads(target.read_text(encoding="utf-8")) == {
+        "vc_time": {"u": 1},
+        "trivia_scores": {},
+    }
+
+
+async def test_snapshot_copies_a_replaced_key_even_at_a_reused_address(
+    tmp_path: Path,
+):
+    store = JsonDataStore(tmp_path / "bot_data.json")
+    store.load_sync()
+    data = {"vc_time": {"u": 1}, "trivia_scores": {"u": 2}}
+    await store.save(data)
+
+    # Freed first, so the replacement is likely allocated at the same id.
+    del data["trivia_scores"]
+    data["trivia_scores"] = {"u": 9}
+    await store.save(data, changed=[("vc_time", "u")])
+
+    saved = json.loads((tmp_path / "bot_data.json").read_text(encoding="utf-8"))
+    assert saved["trivia_scores"] == {"u": 9}
+
+
+async def test_snapshot_reuses_untouched_top_level_keys(tmp_path: Path):
+    store = JsonDataStore(tmp_path / "bot_data.json")
+    store.load_sync()
+    data = {"vc_time": {"u": 1}, "trivia_scores": {"u": 2}, "pet_system": {}}
+
+    await store.save(data)
+    data["vc_time"]["u"] = 5
+    await store.save(data, changed=[("vc_time", "u")])
+
+    stats = store.stats()
+    assert stats["snapshot_copied"] == 4
+    assert stats["snapshot_reused"] == 2
+    assert json.loads((tmp_path / "bot_data.json").read_text(encoding="utf-8")) == {
+        "vc_time": {"u": 5},
+        "trivia_scores": {"u": 2},
+        "pet_system": {},
+    }
+
+
+async def test_write_behind_flush_writes_pending_immediately(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JsonDataStore(target, flush_interval=60)
+
+    store.mark_dirty({"trivia_scores": {"u": 3}})
+    await store.flush()
+
+    assert json.loads(target.read_text(encoding="utf-8")) == {"trivia_scores": {"u": 3}}
+    assert not store.dirty
+    await store.close()
+
+
+async def test_write_behind_load_sees_pending_data(tmp_path: Path):
+    store = JsonDataStore(tmp_path / "bot_data.json", flush_interval=60)
+
+    await store.save({"pet_system": {"u": "cat"}})
+
+    assert await store.load() == {"pet_system": {"u": "cat"}}
+    await store.close()
+
+
+async def test_close_flushes_and_cancels_timer(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JsonDataStore(target, flush_interval=60)
+
+    store.mark_dirty({"vc_time": {"u": 1}})
+    await store.close()
+
+    assert json.loads(target.read_text(encoding="utf-8")) == {"vc_time": {"u": 1}}
+    assert store.stats()["disk_writes"] == 1
+
+
+async def test_save_with_empty_changed_list_skips_write(tmp_path: Path):
+    store = JsonDataStore(tmp_path / "bot_data.json")
+    store.load_sync()
+
+    await store.save({"vc_time": {"u": 1}}, changed=[])
+
+    assert store.stats()["disk_writes"] == 0
+
+
+async def test_journal_appends_changes_and_replays_on_load(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JournaledDataStore(target)
+    data = store.load_sync()
+
+    data["vc_time"]["a_1"] = {"total_minutes": 5}
+    await store.save(data, changed=[("vc_time", "a_1")])
+    data["trivia_scores"]["u"] = 2
+    await store.save(data, changed=[("trivia_scores", "u")])
+    del data["vc_time"]["a_1"]
+    await store.save(data, changed=[("vc_time", "a_1")])
+
+    # Snapshot untouched; the changes live only in the journal.
+    assert json.loads(target.read_text(encoding="utf-8"))["trivia_scores"] == {}
+    assert len(store.journal_path.read_text(encoding="utf-8").splitlines()) == 3
+
+    assert JournaledDataStore(target).load_sync() == data
+
+
+async def test_journal_compacts_into_snapshot(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JournaledDataStore(target, compact_every=2)
+    data = store.load_sync()
+
+    for i in range(3):
+        data["trivia_scores"][str(i)] = i
+        await store.save(data, changed=[("trivia_scores", str(i))])
+
+    assert json.loads(target.read_text(encoding="utf-8")) == data
+    assert store.journal_path.read_text(encoding="utf-8") == ""
+    assert store.stats()["compactions"] == 1
+
+
+def test_journal_ignores_torn_final_record(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JournaledDataStore(target)
+    store.load_sync()
+    store.journal_path.write_text(
+        '{"op":"set","path":["vc_time","u"],"value":3}\n{"op":"set","pa',
+        encoding="utf-8",
+    )
+
+    assert JournaledDataStore(target).load_sync()["vc_time"] == {"u": 3}
+
+
+async def test_journal_appends_after_torn_record_survive_reload(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JournaledDataStore(target)
+    data = store.load_sync()
+    data["vc_time"]["a"] = 1
+    await store.save(data, changed=[("vc_time", "a")])
+    with store.journal_path.open("a", encoding="utf-8") as f:
+        f.write('{"op":"set","pa')
+
+    store = JournaledDataStore(target)
+    data = store.load_sync()
+    data["vc_time"]["b"] = 2
+    await store.save(data, changed=[("vc_time", "b")])
+    data["vc_time"]["c"] = 3
+    await store.save(data, changed=[("vc_time", "c")])
+
+    assert JournaledDataStore(target).load_sync()["vc_time"] == {
+        "a": 1,
+        "b": 2,
+        "c": 3,
+    }
+
+
+def test_open_data_store_selects_backend(tmp_path: Path):
+    assert type(open_data_store(tmp_path / "a.json")) is JsonDataStore
+    assert isinstance(
+        open_data_store(tmp_path / "b.json", backend="journal"), JournaledDataStore
+    )
+    with pytest.raises(ValueError):
+        open_data_store(tmp_path / "c.json", backend="nope")
+
+
+async def test_sqlite_store_round_trips_and_updates_single_rows(tmp_path: Path):
+    store = SqliteDataStore(tmp_path / "bot.sqlite3")
+    data = store.load_sync()
+    assert data == {"pet_system": {}, "vc_time": {}, "trivia_scores": {}}
+
+    data["vc_time"]["u_g"] = {"total_minutes": 12.5}
+    data["pet_system"]["u"] = {"pet": "Cat", "hunger": 90}
+    await store.save(data)
+    data["trivia_scores"]["u"] = 3
+    await store.save(data, changed=[("trivia_scores", "u")])
+    del data["pet_system"]["u"]
+    await store.save(data, changed=[("pet_system", "u")])
+
+    assert SqliteDataStore(tmp_path / "bot.sqlite3").load_sync() == data
+
+
+async def test_sqlite_store_reuses_one_connection(tmp_path: Path, monkeypatch):
+    store = SqliteDataStore(tmp_path / "bot.sqlite3")
+    connects = []
+    connect = store._connect
+    monkeypatch.setattr(store, "_connect", lambda: connects.append(1) or connect())
+
+    data = store.load_sync()
+    data["trivia_scores"]["u"] = 1
+    await store.save(data, changed=[("trivia_scores", "u")])
+    assert await store.get("u", "trivia_scores") == 1
+    assert await store.top("trivia_scores") == [("u", 1)]
+    assert len(connects) == 1
+
+    await store.close()
+    assert store._conn is None
+
+
+async def test_sqlite_leaderboard_uses_score_order(tmp_path: Path):
+    store = SqliteDataStore(tmp_path / "bot.sqlite3")
+    data = store.load_sync()
+    data["trivia_scores"].update({"a": 2, "b": 9, "c": 5})
+    await store.save(data)
+
+    assert await store.top("trivia_scores", 2) == [("b", 9), ("c", 5)]
+    with pytest.raises(ValueError):
+        await store.top("pet_system")
+
+
+async def test_sqlite_profile_namespace_shares_database(tmp_path: Path):
+    db = tmp_path / "bot.sqlite3"
+    bot_store = SqliteDataStore(db)
+    profiles = SqliteDataStore(db, default={}, namespace="user_profiles")
+    bot_store.load_sync()
+    profiles.load_sync()
+
+    await profiles.save({"42": {"message_count": 7}}, changed=[("42",)])
+
+    assert await profiles.get("42") == {"message_count": 7}
+    assert "user_profiles" not in bot_store.load_sync()
+
+
+def test_sqlite_imports_legacy_json_once(tmp_path: Path):
+    legacy = tmp_path / "bot_data.json"
+    legacy.write_text(json.dumps({"trivia_scores": {"u": 4}}), encoding="utf-8")
+
+    store = open_data_store(legacy, backend="sqlite")
+    assert isinstance(store, SqliteDataStore)
+    assert store.load_sync()["trivia_scores"] == {"u": 4}
+
+    # Later edits to the JSON file are ignored once imported.
+    legacy.write_text(json.dumps({"trivia_scores": {"u": 99}}), encoding="utf-8")
+    assert open_data_store(legacy, backend="sqlite").load_sync()["trivia_scores"] == {
+        "u": 4
+    }
+
+
+async def test_sqlite_save_before_load_is_not_overwritten_by_seed(
+    tmp_path: Path,
+):
+    legacy = tmp_path / "bot_data.json"
+    legacy.write_text(json.dumps({"trivia_scores": {"u": 4}}), encoding="utf-8")
+    store = open_data_store(legacy, backend="sqlite")
+
+    data = {"trivia_scores": {"u": 7}}
+    await store.save(data, changed=[("trivia_scores", "u")])
+
+    assert store.load_sync()["trivia_scores"] == {"u": 7}
+    assert open_data_store(legacy, backend="sqlite").load_sync()["trivia_scores"] == {
+        "u": 7
+    }
+
+
+def test_migrate_json_to_sqlite_counts_entries(tmp_path: Path):
+    bot_json = tmp_path / "bot_data.json"
+    profiles_json = tmp_path / "user_profiles.json"
+    bot_json.write_text(
+        json.dumps({"vc_time": {"a": {"total_minutes": 1}}, "trivia_scores": {}}),
+        encoding="utf-8",
+    )
+    profiles_json.write_text(json.dumps({"1": {}, "2": {}}), encoding="utf-8")
+    db = tmp_path / "bot.sqlite3"
+
+    counts = migrate_json_to_sqlite(bot_json, profiles_json, db)
+
+    assert counts == {"vc_time": 1, "trivia_scores": 0, "user_profiles": 2}
+    profiles = SqliteDataStore(db, default={}, namespace="user_profiles")
+    assert profiles.load_sync() == {"1": {}, "2": {}}
+    with pytest.raises(FileExistsError):
+        migrate_json_to_sqlite(bot_json, profiles_json, db)
+
+
+def test_sharded_store_migrates_single_file(tmp_path: Path):
+    legacy = tmp_path / "bot_data.json"
+    original = {
+        "vc_time": {"a": {"total_minutes": 3}},
+        "pet_system": {"u": {"pet": "Cat"}},
+        "trivia_scores": {},
+        "version": 2,
+    }
+    legacy.write_text(json.dumps(original), encoding="utf-8")
+
+    store = ShardedDataStore(legacy)
+    assert store.load_sync() == original
+
+    names = sorted(p.name for p in store.shard_dir.glob("*.json"))
+    assert names == [
+        "_manifest.json",
+        "_root.json",
+        "pet_system.json",
+        "trivia_scores.json",
+        "vc_time.json",
+    ]
+    assert ShardedDataStore(legacy).load_sync() == original
+
+
+async def test_sharded_save_only_rewrites_touched_shard(tmp_path: Path):
+    store = ShardedDataStore(tmp_path / "bot_data.json")
+    data = store.load_sync()
+    pets = store.shard_dir / "pet_system.json"
+    pets_before = pets.stat().st_mtime_ns
+    writes = store.stats()["disk_writes"]
+
+    data["vc_time"]["a"] = {"total_minutes": 1}
+    await store.save(data, changed=[("vc_time", "a")])
+
+    assert pets.stat().st_mtime_ns == pets_before
+    assert json.loads((store.shard_dir / "vc_time.json").read_text()) == {
+        "a": {"total_minutes": 1}
+    }
+    assert store.stats()["disk_writes"] == writes + 1
+
+
+async def test_sharded_buckets_split_by_key_and_rebucket(tmp_path: Path):
+    path = tmp_path / "user_profiles.json"
+    store = ShardedDataStore(path, default={}, namespace="profiles", buckets=4)
+    data = store.load_sync()
+    for uid in ("1", "2", "3", "4", "5"):
+        data[uid] = {"message_count": int(uid)}
+    await store.save(data)
+
+    writes = store.stats()["disk_writes"]
+    data["3"]["message_count"] = 30
+    await store.save(data, changed=[("3",)])
+    assert store.stats()["disk_writes"] == writes + 1
+
+    # Changing the bucket count re-lays the shards without losing entries.
+    rebucketed = ShardedDataStore(path, default={}, namespace="profiles", buckets=2)
+    assert rebucketed.load_sync() == data
+    assert len(list(rebucketed.shard_dir.glob("profiles.*.json"))) == 2
+
+
+@pytest.mark.parametrize("buckets", [0, 2])
+@pytest.mark.parametrize("changed", [[("inventory",)], None])
+async def test_sharded_removed_namespace_stays_gone(tmp_path: Path, buckets, changed):
+    path = tmp_path / "bot_data.json"
+    store = ShardedDataStore(path, buckets=buckets)
+    data = store.load_sync()
+    data["inventory"] = {"u1": ["tea"], "u2": ["rusk"]}
+    await store.save(data)
+
+    del data["inventory"]
+    await store.save(data, changed=changed)
+
+    reloaded = ShardedDataStore(path, buckets=buckets).load_sync()
+    assert reloaded.get("inventory", {}) == {}
+
+
+async def test_sharded_write_behind_flushes_per_shard(tmp_path: Path):
+    store = ShardedDataStore(tmp_path / "bot_data.json", flush_interval=60)
+    data = store.load_sync()
+
+    data["trivia_scores"]["u"] = 1
+    await store.save(data, changed=[("trivia_scores", "u")])
+    data["trivia_scores"]["u"] = 2
+    await store.save(data, changed=[("trivia_scores", "u")])
+    assert store.dirty
+
+    await store.close()
+
+    assert not store.dirty
+    assert ShardedDataStore(tmp_path / "bot_data.json").load_sync()[
+        "trivia_scores"
+    ] == {"u": 2}
+    assert store.stats()["coalesced_writes"] == 1
+
+
+async def test_default_codec_writes_compact_json(tmp_path: Path):
+    target = tmp_path / "bot_data.json"
+    store = JsonDataStore(target)
+
+    await store.save({"vc_time": {"u": {"total_minutes": 1}}})
+
+    assert target.read_text(encoding="utf-8") == (
+        '{"vc_time":{"u":{"total_minutes":1}}}\n'
+    )
+
+
+@pytest.mark.parametrize("name", sorted(available_codecs()))
+async def test_every_codec_round_trips_and_autodetects(tmp_path: Path, name: str):
+    target = tmp_path / "bot_data.json"
+    payload = {"vc_time": {"u": {"total_minutes": 1.5}}, "names": ["é", "☕"]}
+
+    await JsonDataStore(target, codec=name).save(payload)
+
+    # A store configured with a different codec still reads the file.
+    assert JsonDataStore(target, codec="json-pretty").load_sync() == payload
+
+
+def test_missing_optional_codec_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(data_store, "msgpack", None)
+
+    assert get_codec("msgpack").name == "json"
+    with pytest.raises(ValueError):
+        get_codec("yaml")
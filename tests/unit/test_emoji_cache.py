@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from src.emoji_cache import HINT_EMOJIS, EmojiCache, GuildEmojis
+
+
+def _emoji(name, emoji_id, animated=False):
+    return SimpleNamespace(name=name, id=emoji_id, animated=animated)
+
+
+def _guild(guild_id, emojis):
+    return SimpleNamespace(id=guild_id, emojis=emojis)
+
+
+def test_table_skips_animated_and_sorts_by_name():
+    table = GuildEmojis.from_emojis(
+        [_emoji("Kya", 2), _emoji("bruh", 1), _emoji("dance", 3, animated=True)]
+    )
+
+    assert table.tokens_by_name == {"kya": "<:Kya:2>", "bruh": "<:bruh:1>"}
+    assert table.tokens == ("<:bruh:1>", "<:Kya:2>")
+    assert table.hint == "<:bruh:1>, <:Kya:2>"
+
+
+def test_hint_is_capped_and_defaults_when_empty():
+    table = GuildEmojis.from_emojis([_emoji(f"e{i:02}", i) for i in range(40)])
+
+    assert len(table.hint.split(", ")) == HINT_EMOJIS
+    assert GuildEmojis.from_emojis([]).hint == "none available"
+
+
+def test_cache_reuses_table_until_invalidated():
+    cache = EmojiCache()
+    guild = _guild(1, [_emoji("chai", 10)])
+    first = cache.get(guild)
+
+    guild.emojis = [_emoji("chai", 10), _emoji("samosa", 11)]
+    assert cache.get(guild) is first
+
+    cache.invalidate(1)
+    assert "samosa" in cache.get(guild).tokens_by_name
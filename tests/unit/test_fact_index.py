@@ -0,0 +1,56 @@
+from src.fact_index import FactIndex
+
+DAY = 86400.0
+NOW = 1_000 * DAY
+
+
+def build(*facts):
+    index = FactIndex({"the", "is", "a"})
+    for text, ts in facts:
+        index.add(text, ts)
+    return index
+
+
+def test_rare_matching_terms_rank_first():
+    index = build(
+        ("likes chai", NOW),
+        ("plays cricket on weekends", NOW),
+        ("likes biryani", NOW),
+        ("is a university student", NOW),
+    )
+
+    results = index.search("anyone up for cricket?", 2, now=NOW)
+
+    assert results[0] == "plays cricket on weekends"
+
+
+def test_recency_decay_prefers_newer_equal_match():
+    index = build(("likes chai", NOW - 90 * DAY), ("loves chai", NOW))
+
+    assert index.search("chai time", 1, now=NOW) == ["loves chai"]
+
+
+def test_tops_up_with_newest_facts_when_few_match():
+    index = build(("old fact", NOW - 5), ("newer fact", NOW - 1), ("likes chai", 0))
+
+    results = index.search("chai", 3, now=NOW)
+
+    assert results == ["likes chai", "newer fact", "old fact"]
+
+
+def test_stop_words_do_not_match():
+    index = build(("is a gamer", NOW), ("the night owl", NOW))
+
+    assert index.tokenize("the night is young") == ["night", "young"]
+    assert index._postings.keys() == {"gamer", "night", "owl"}
+
+
+def test_discard_removes_postings():
+    index = build(("likes chai", NOW), ("likes biryani", NOW))
+
+    assert index.discard("likes chai")
+    assert not index.discard("likes chai")
+
+    assert len(index) == 1
+    assert "chai" not in index._postings
+    assert index.search("chai", 3, now=NOW) == ["likes biryani"]
@@ -0,0 +1,92 @@
+import asyncio
+
+from src.fact_worker import FactExtractionWorker
+
+
+async def test_results_are_merged_in_background():
+    merged = {}
+
+    async def extract(quotes):
+        return [f"said {q}" for q in quotes]
+
+    worker = FactExtractionWorker(extract, merged.__setitem__)
+    worker.start()
+
+    assert worker.submit("1", ["hi"])
+    await worker.join()
+
+    assert merged == {"1": ["said hi"]}
+    assert worker.stats()["completed"] == 1
+    await worker.stop()
+
+
+async def test_repeat_submissions_for_queued_user_are_deduped():
+    seen = []
+
+    async def extract(quotes):
+        seen.append(quotes)
+        return []
+
+    worker = FactExtractionWorker(extract, lambda *_: None)
+
+    assert worker.submit("1", ["old"])
+    assert not worker.submit("1", ["new"])
+    assert worker.stats()["queue_depth"] == 1
+
+    worker.start()
+    await worker.join()
+
+    assert seen == [["new"]]
+    assert worker.stats()["deduped"] == 1
+    await worker.stop()
+
+
+async def test_concurrency_limit_and_bounded_queue():
+    active = 0
+    peak = 0
+    release = asyncio.Event()
+
+    async def extract(quotes):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await release.wait()
+        active -= 1
+        return []
+
+    worker = FactExtractionWorker(extract, lambda *_: None, max_queue=3, concurrency=2)
+    for user_id in "abcd":
+        worker.submit(user_id, ["q"])
+    assert worker.stats()["dropped"] == 1
+
+    worker.start()
+    await asyncio.sleep(0.01)
+    assert peak == 2
+    release.set()
+    await worker.join()
+
+    assert worker.stats()["completed"] == 3
+    await worker.stop()
+
+
+async def test_failed_extraction_is_counted_and_worker_keeps_running():
+    calls = []
+
+    async def extract(quotes):
+        calls.append(quotes)
+        if quotes == ["boom"]:
+            raise RuntimeError("model down")
+        return ["ok"]
+
+    merged = {}
+    worker = FactExtractionWorker(extract, merged.__setitem__)
+    worker.start()
+    worker.submit("1", ["boom"])
+    worker.submit("2", ["fine"])
+    await worker.join()
+
+    stats = worker.stats()
+    assert stats["failed"] == 1
+    assert stats["completed"] == 1
+    assert merged == {"2": ["ok"]}
+    await worker.stop()
@@ -0,0 +1,70 @@
+import random
+
+from src.heavy_hitters import SpaceSaving, top_counts
+
+
+def test_counts_exactly_below_capacity():
+    counter = SpaceSaving(5)
+    for word in ["a", "b", "a", "c", "a", "b"]:
+        counter.add(word)
+
+    assert counter.counts == {"a": 3, "b": 2, "c": 1}
+    assert counter.top(2) == [("a", 3), ("b", 2)]
+
+
+def test_new_key_evicts_minimum_and_inherits_it_as_error():
+    counter = SpaceSaving(2)
+    counter.add("a", 5)
+    counter.add("b")
+
+    assert counter.add("c") == 2
+
+    assert counter.counts == {"a": 5, "c": 1}
+    assert counter.error("c") == 1
+    assert counter.estimate("c") == 2
+
+
+def test_churn_does_not_inflate_observed_counts():
+    counter = SpaceSaving(10)
+    for i in range(300):
+        counter.add(f"gram{i}")
+
+    assert all(count == 1 for _, count in counter.top(10))
+    assert max(counter.estimate(key) for key in counter.counts) > 1
+
+
+def test_updates_the_wrapped_dict_in_place():
+    profile = {"word_freq": {"chai": 4}}
+    counter = SpaceSaving(3, profile["word_freq"])
+    counter.add("chai")
+    counter.add("biryani")
+
+    assert profile["word_freq"] == {"chai": 5, "biryani": 1}
+
+
+def test_oversized_input_is_trimmed_to_top_capacity():
+    counts = {str(i): i for i in range(10)}
+
+    counter = SpaceSaving(3, counts)
+
+    assert counts == {"9": 9, "8": 8, "7": 7}
+    assert len(counter) == 3
+
+
+def test_heavy_hitters_survive_a_long_tail():
+    rng = random.Random(7)
+    counter = SpaceSaving(20)
+    for _ in range(5000):
+        counter.add(rng.choice(["chai", "cricket", "exam"]))
+        counter.add(f"noise{rng.randrange(2000)}")
+
+    top = {key for key, _ in counter.top(3)}
+    assert top == {"chai", "cricket", "exam"}
+    assert len(counter) == 20
+    assert len(counter._heap) <= 4 * 20 + 16
+
+
+def test_top_counts_accepts_pairs():
+    pairs = [("x", 1), ("y", 3), ("z", 2)]
+
+    assert top_counts(pairs, 2) == [("y", 3), ("z", 2)]
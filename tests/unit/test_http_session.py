@@ -0,0 +1,88 @@
+import asyncio
+
+from aiohttp import web
+
+from src.http_session import HttpSessions
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def test_get_returns_one_shared_session():
+    sessions = HttpSessions()
+    try:
+        assert sessions.get() is sessions.get()
+        assert sessions.stats()["open"] is True
+    finally:
+        await sessions.close()
+    assert sessions.stats()["open"] is False
+
+
+async def test_closed_session_is_replaced():
+    sessions = HttpSessions()
+    first = sessions.get()
+    await sessions.close()
+
+    second = sessions.get()
+    try:
+        assert second is not first
+        assert not second.closed
+    finally:
+        await sessions.close()
+
+
+def test_session_from_another_loop_is_closed_when_replaced():
+    sessions = HttpSessions()
+
+    async def open_session():
+        return sessions.get()
+
+    async def replace_session(old):
+        new = sessions.get()
+        await asyncio.sleep(0)
+        assert new is not old
+        assert old.closed
+        await sessions.close()
+
+    old = asyncio.run(open_session())
+    assert not old.closed
+    asyncio.run(replace_session(old))
+
+
+async def test_connector_limits_come_from_constructor():
+    sessions = HttpSessions(limit=7, limit_per_host=3)
+    try:
+        connector = sessions.get().connector
+        assert connector.limit == 7
+        assert connector.limit_per_host == 3
+    finally:
+        await sessions.close()
+
+
+async def test_keep_alive_connections_are_reused():
+    async def handler(request):
+        return web.Response(text="ok")
+
+    runner, url = await _serve(handler)
+    sessions = HttpSessions()
+    try:
+        for _ in range(3):
+            async with sessions.get().get(url) as resp:
+                assert await resp.text() == "ok"
+    finally:
+        await sessions.close()
+        await runner.cleanup()
+
+    stats = sessions.stats()
+    assert stats["requests"] == 3
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+    assert stats["reuse_rate"] == 0.667
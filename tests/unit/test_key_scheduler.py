@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from src.key_scheduler import KeyScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(clock, keys=2, rpm=2, tpm=1000, cooldown=60.0):
+    return KeyScheduler(
+        keys,
+        requests_per_minute=rpm,
+        tokens_per_minute=tpm,
+        cooldown=cooldown,
+        clock=clock,
+    )
+
+
+def test_token_bucket_refills_over_period():
+    bucket = TokenBucket(60, 60.0, now=0.0)
+    bucket.take(60, 0.0)
+
+    assert bucket.wait_time(30, 0.0) == pytest.approx(30.0)
+    assert bucket.wait_time(30, 30.0) == 0.0
+
+
+def test_prefers_faster_key():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    first = scheduler.try_acquire(10)
+    scheduler.release(first, latency=2.0)
+    second = scheduler.try_acquire(10)
+    scheduler.release(second, latency=0.2)
+
+    assert scheduler.try_acquire(10) == second
+
+
+def test_request_budget_is_enforced_per_key():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, keys=1, rpm=2)
+
+    assert scheduler.try_acquire(1) == 0
+    assert scheduler.try_acquire(1) == 0
+    assert scheduler.try_acquire(1) is None
+
+    clock.now += 30  # half a minute refills one request
+    assert scheduler.try_acquire(1) == 0
+
+
+def test_token_budget_is_enforced_and_corrected_by_usage():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, keys=1, rpm=100, tpm=1000)
+
+    index = scheduler.try_acquire(300)
+    scheduler.release(index, tokens_used=900, tokens_reserved=300)
+
+    assert scheduler.try_acquire(300) is None
+    assert scheduler.try_acquire(100) == 0
+
+
+def test_rate_limited_key_cools_down():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, keys=2, rpm=100)
+    index = scheduler.try_acquire(1)
+    scheduler.rate_limited(index, retry_after=20)
+
+    other = 1 - index
+    assert {scheduler.try_acquire(1) for _ in range(3)} == {other}
+
+    clock.now += 21
+    assert scheduler.try_acquire(1, exclude={other}) == index
+
+
+def test_exclude_skips_keys():
+    scheduler = _scheduler(FakeClock(), keys=2, rpm=100)
+
+    assert scheduler.try_acquire(1, exclude={0}) == 1
+    assert scheduler.try_acquire(1, exclude={0, 1}) is None
+
+
+async def test_waiters_are_served_in_arrival_order():
+    scheduler = KeyScheduler(1, requests_per_minute=600, tokens_per_minute=10**6)
+    for _ in range(600):
+        scheduler.try_acquire(1)
+
+    order = []
+
+    async def waiter(name):
+        await scheduler.acquire(1)
+        order.append(name)
+
+    tasks = [asyncio.create_task(waiter(n)) for n in ("a", "b", "c")]
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=2)
+
+    assert order == ["a", "b", "c"]
+    assert scheduler.stats()["queued_total"] == 3
+
+
+async def test_waiter_behind_an_excluded_head_gets_the_ready_key():
+    scheduler = KeyScheduler(2, requests_per_minute=600, tokens_per_minute=10**6)
+    for _ in range(600):
+        scheduler.try_acquire(1, exclude={1})  # key 0 is exhausted for a minute
+
+    head = asyncio.create_task(scheduler.acquire(1, exclude={1}))
+    await asyncio.sleep(0)
+    while scheduler.try_acquire(1, exclude={0}) is not None:
+        pass  # key 1 too, so the next caller has to queue behind the head
+    behind = asyncio.create_task(scheduler.acquire(1, exclude={0}))
+    await asyncio.sleep(0)
+
+    scheduler.release(1)
+    scheduler._keys[1].requests.give(1, scheduler._clock())
+    scheduler._dispatch()
+
+    assert await asyncio.wait_for(behind, timeout=1) == 1
+    assert not head.done()
+    head.cancel()
+
+
+async def test_cancelled_grant_is_handed_back_without_a_failure():
+    scheduler = KeyScheduler(1, requests_per_minute=1, tokens_per_minute=10**6)
+    scheduler.try_acquire(1)
+
+    waiter = asyncio.create_task(scheduler.acquire(1))
+    await asyncio.sleep(0)
+    scheduler._keys[0].requests.give(1, scheduler._clock())
+    scheduler.release(0)  # grants the key to the waiter...
+    waiter.cancel()  # ...which is cancelled before it runs
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    state = scheduler._keys[0]
+    assert state.failures == 0
+    assert state.in_flight == 0
+    assert scheduler.try_acquire(1) == 0
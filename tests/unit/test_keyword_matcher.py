@@ -0,0 +1,56 @@
+from src.keyword_matcher import KeywordMatcher
+
+
+def test_scan_returns_every_label_with_a_hit():
+    matcher = (
+        KeywordMatcher()
+        .add("funny", ["lol", "bruh"])
+        .add("serious", ["passed away", "hospital"])
+        .add("urdu", ["yaar"])
+    )
+
+    assert matcher.scan("yaar lol he passed away") == {"funny", "serious", "urdu"}
+    assert matcher.scan("nothing to see") == set()
+
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher().add("a", ["she"]).add("b", ["he"]).add("c", ["hers"])
+
+    assert matcher.scan("ushers") == {"a", "b", "c"}
+
+
+def test_keyword_inside_failed_longer_prefix_is_found():
+    matcher = KeywordMatcher().add("long", ["abcx"]).add("short", ["bcd"])
+
+    assert matcher.scan("abcd") == {"short"}
+
+
+def test_same_keyword_can_carry_several_labels():
+    matcher = KeywordMatcher().add("funny", ["lol"]).add("signal", ["lol"])
+
+    assert matcher.scan("lol") == {"funny", "signal"}
+
+
+def test_whole_word_keywords_respect_boundaries():
+    matcher = KeywordMatcher().add("unsafe", ["kys"], word_start=True, word_end=True)
+
+    assert matcher.scan("kys") == {"unsafe"}
+    assert matcher.scan("bro, kys.") == {"unsafe"}
+    assert matcher.scan("skys") == set()
+    assert matcher.scan("kyss") == set()
+
+
+def test_word_start_keywords_match_as_prefixes():
+    matcher = KeywordMatcher().add("slur", ["chakka"], word_start=True)
+
+    assert matcher.scan("chakkay") == {"slur"}
+    assert matcher.scan("xchakka") == set()
+
+
+def test_adding_keywords_after_a_scan_rebuilds():
+    matcher = KeywordMatcher().add("a", ["one"])
+    assert matcher.scan("two") == set()
+
+    matcher.add("b", ["two"])
+
+    assert matcher.scan("two") == {"b"}
@@ -113,3 +113,28 @@ def test_base_ytdlp_options_includes_defaults():
     assert options["format"] == "bestaudio/best"
     assert options["noplaylist"] is True
     assert options["source_address"] == "0.0.0.0"
+
+
+async def test_concurrent_identical_searches_share_one_lookup(monkeypatch):
+    import asyncio
+    import threading
+
+    calls = []
+    release = threading.Event()
+
+    def fake_search(query, limit):
+        calls.append(query)
+        release.wait(1)
+        return ["result"]
+
+    monkeypatch.setattr(music_player, "_search_youtube_sync", fake_search)
+
+    tasks = [
+        asyncio.create_task(music_player.search_youtube(q, 10))
+        for q in ("Pasoori", "pasoori ", "PASOORI")
+    ]
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [["result"]] * 3
+    assert len(calls) == 1
@@ -0,0 +1,108 @@
+import asyncio
+import itertools
+
+from src.prefetch_pool import PrefetchPool
+
+
+def _counter_fetch(calls):
+    counter = itertools.count()
+
+    async def fetch():
+        calls.append(None)
+        return f"q{next(counter)}"
+
+    return fetch
+
+
+async def _wait_for(predicate, timeout=1.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_empty_pool_misses_and_requests_refill():
+    pool = PrefetchPool("wyr", _counter_fetch([]), min_interval=0)
+
+    assert pool.take() is None
+    assert pool.stats()["misses"] == 1
+
+
+async def test_background_task_fills_to_capacity_and_serves_from_memory():
+    calls = []
+    pool = PrefetchPool(
+        "wyr", _counter_fetch(calls), watermark=2, capacity=4, min_interval=0
+    )
+    pool.start()
+    await _wait_for(lambda: len(pool) == 4)
+
+    assert pool.take() == "q0"
+    assert pool.take() == "q1"
+    assert len(calls) == 4  # still at watermark: no refill yet
+
+    pool.take()
+    await _wait_for(lambda: len(pool) == 4)
+    assert pool.stats()["served"] == 3
+    await pool.stop()
+
+
+async def test_recent_duplicates_are_dropped():
+    answers = iter(["a", "b", "a", "c"])
+
+    async def fetch():
+        return next(answers)
+
+    pool = PrefetchPool("qotd", fetch, min_interval=0)
+    for _ in range(4):
+        await pool.fetch_one()
+
+    assert [pool.take() for _ in range(3)] == ["a", "b", "c"]
+    assert pool.stats()["duplicates"] == 1
+
+
+async def test_history_is_bounded():
+    answers = iter(["a", "b", "a"])
+
+    async def fetch():
+        return next(answers)
+
+    pool = PrefetchPool("qotd", fetch, history=1)
+    for _ in range(3):
+        await pool.fetch_one()
+
+    assert len(pool) == 3
+
+
+async def test_dict_items_are_deduped_by_key():
+    async def fetch():
+        return {"q": "same?", "a": "yes"}
+
+    pool = PrefetchPool("riddle", fetch, key=lambda r: r["q"])
+    assert await pool.fetch_one()
+    assert not await pool.fetch_one()
+
+
+async def test_failures_back_off_exponentially():
+    async def fetch():
+        raise RuntimeError("upstream down")
+
+    pool = PrefetchPool("trivia", fetch, min_interval=1.0, max_backoff=5.0)
+    assert pool._pause() == 1.0
+    for expected in (2.0, 4.0, 5.0):
+        assert not await pool.fetch_one()
+        assert pool._pause() == expected
+    assert pool.stats()["errors"] == 3
+
+
+async def test_stop_cancels_refill_task():
+    gate = asyncio.Event()
+
+    async def fetch():
+        await gate.wait()
+
+    pool = PrefetchPool("wyr", fetch)
+    pool.start()
+    await asyncio.sleep(0)
+    await pool.stop()
+    await pool.stop()  # idempotent
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from src.priority_scheduler import PriorityScheduler, StaleWorkError
+
+CLASSES = {
+    "interactive": (0, 3, 5.0),
+    "ambient": (1, 1, 5.0),
+    "background": (2, 1, 5.0),
+}
+
+
+async def _hold(scheduler, name, release, started=None, deadline=None):
+    async with scheduler.slot(name, deadline):
+        if started is not None:
+            started.append(name)
+        await release.wait()
+
+
+async def test_class_cap_leaves_slots_for_interactive_work():
+    scheduler = PriorityScheduler(3, CLASSES)
+    release = asyncio.Event()
+    started = []
+    tasks = [
+        asyncio.create_task(_hold(scheduler, "background", release, started))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    assert started == ["background"]
+    async with scheduler.slot("interactive"):
+        assert scheduler.stats()["running"] == 2
+    assert scheduler.stats()["classes"]["background"]["waiting"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.stats()["classes"]["background"]["admitted"] == 3
+
+
+async def test_waiters_are_admitted_by_rank_then_arrival():
+    scheduler = PriorityScheduler(1, CLASSES)
+    release = asyncio.Event()
+    order = []
+    blocker = asyncio.create_task(_hold(scheduler, "interactive", release))
+    await asyncio.sleep(0)
+
+    async def job(name, tag):
+        async with scheduler.slot(name):
+            order.append(tag)
+
+    jobs = [
+        asyncio.create_task(job("ambient", "ambient")),
+        asyncio.create_task(job("interactive", "first")),
+        asyncio.create_task(job("interactive", "second")),
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocker, *jobs)
+
+    assert order == ["first", "second", "ambient"]
+
+
+async def test_stale_work_is_dropped_not_run():
+    scheduler = PriorityScheduler(1, CLASSES)
+    release = asyncio.Event()
+    blocker = asyncio.create_task(_hold(scheduler, "interactive", release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(StaleWorkError):
+        async with scheduler.slot("ambient", deadline=0.01):
+            pytest.fail("stale work ran")
+
+    release.set()
+    await blocker
+    stats = scheduler.stats()
+    assert stats["classes"]["ambient"]["dropped"] == 1
+    assert stats["running"] == 0
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = PriorityScheduler(1, CLASSES)
+    release = asyncio.Event()
+    blocker = asyncio.create_task(_hold(scheduler, "interactive", release))
+    await asyncio.sleep(0)
+
+    waiter = asyncio.create_task(_hold(scheduler, "ambient", asyncio.Event()))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    await blocker
+    async with scheduler.slot("background"):
+        assert scheduler.stats()["running"] == 1
+    assert scheduler.stats()["running"] == 0
+
+
+async def test_held_slot_is_taken_by_next_request_of_its_class():
+    scheduler = PriorityScheduler(2, CLASSES)
+    assert scheduler.hold("interactive", ttl=1.0)
+    assert scheduler.stats()["running"] == 1
+
+    async with scheduler.slot("interactive"):
+        assert scheduler.stats()["running"] == 1
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["classes"]["interactive"]["holds_used"] == 1
+
+
+async def test_unused_hold_expires_and_frees_the_slot():
+    scheduler = PriorityScheduler(1, CLASSES)
+    assert scheduler.hold("interactive", ttl=0.01)
+    assert not scheduler.hold("interactive", ttl=0.01)  # no idle slot left
+
+    await asyncio.sleep(0.05)
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["classes"]["interactive"]["holds_expired"] == 1
+
+
+async def test_holds_are_capped():
+    scheduler = PriorityScheduler(3, CLASSES, max_held=1)
+    assert scheduler.hold("interactive", ttl=1.0)
+    assert not scheduler.hold("interactive", ttl=1.0)
+    assert scheduler.stats()["running"] == 1
+
+
+async def test_queued_work_reclaims_a_held_slot():
+    scheduler = PriorityScheduler(1, CLASSES)
+    assert scheduler.hold("interactive", ttl=10.0)
+
+    async with scheduler.slot("background", deadline=0.01):
+        pass  # admitted straight away, not after the hold's ttl
+    stats = scheduler.stats()["classes"]["interactive"]
+    assert stats["held"] == 0
+    assert stats["holds_reclaimed"] == 1
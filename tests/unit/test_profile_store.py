@@ -0,0 +1,218 @@
+import asyncio
+import json
+from pathlib import Path
+
+from src.data_store import JsonDataStore, SqliteDataStore
+from src.profile_store import ProfileCache, ProfileWriter, UserProfile
+
+
+class RecordingStore:
+    def __init__(self):
+        self.calls = []
+
+    async def save(self, data, changed=None):
+        self.calls.append(sorted(changed))
+
+
+async def test_flush_writes_only_dirty_profiles():
+    store = RecordingStore()
+    writer = ProfileWriter(store, ProfileCache(), flush_interval=60)
+
+    writer.mark_dirty("1")
+    writer.mark_dirty("3")
+    writer.mark_dirty("1")
+
+    assert await writer.flush() == 2
+    assert store.calls == [[("1",), ("3",)]]
+    assert writer.dirty == set()
+    await writer.close()
+    assert len(store.calls) == 1
+
+
+async def test_timer_flushes_after_interval():
+    store = RecordingStore()
+    writer = ProfileWriter(store, ProfileCache(), flush_interval=0.05)
+
+    writer.mark_dirty("1")
+    assert store.calls == []
+    await asyncio.sleep(0.15)
+
+    assert store.calls == [[("1",)]]
+    assert writer.stats()["flushes"] == 1
+
+
+async def test_batch_threshold_flushes_without_waiting():
+    store = RecordingStore()
+    writer = ProfileWriter(store, ProfileCache(), flush_interval=60, max_dirty=3)
+
+    for user_id in "012":
+        writer.mark_dirty(user_id)
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert store.calls == [[("0",), ("1",), ("2",)]]
+    await writer.close()
+
+
+async def test_failed_flush_keeps_profiles_dirty():
+    class FailingStore:
+        async def save(self, data, changed=None):
+            raise OSError("disk full")
+
+    writer = ProfileWriter(FailingStore(), ProfileCache(), flush_interval=60)
+    writer.mark_dirty("1")
+
+    try:
+        await writer.flush()
+    except OSError:
+        pass
+
+    assert writer.dirty == {"1"}
+    writer._cancel_timer()
+
+
+async def test_close_persists_pending_profiles(tmp_path: Path):
+    target = tmp_path / "user_profiles.json"
+    store = JsonDataStore(target, default={})
+    store.load_sync()
+    profiles = ProfileCache()
+    profiles.put("1", UserProfile("ali", "Ali", message_count=4))
+    writer = ProfileWriter(store, profiles, flush_interval=60)
+
+    writer.mark_dirty("1")
+    await writer.close()
+
+    saved = json.loads(target.read_text(encoding="utf-8"))
+    assert saved["1"]["message_count"] == 4
+    stats = writer.stats()
+    assert stats["records_flushed"] == 1
+    assert stats["max_flush_ms"] >= stats["last_flush_ms"] >= 0
+
+
+def test_user_profile_round_trips_persisted_layout():
+    data = {
+        "username": "ali",
+        "display_name": "Ali",
+        "message_count": 3,
+        "word_freq": {"chai": 2},
+        "ngram_freq": {"chai pi lo": 1},
+        "signature_phrases": [],
+        "recent_quotes": ["chai pi lo yaar"],
+        "facts": [{"text": "likes chai", "ts": 1.0}],
+        "avg_length": 4.0,
+        "urdu_ratio": 0.5,
+        "funny_ratio": 0.0,
+        "active_hours": {"9": 2, "23": 1},
+        "_urdu_count": 1,
+        "_funny_count": 0,
+        "legacy_field": True,
+    }
+
+    profile = UserProfile.from_dict(data)
+
+    assert profile.active_hours[9] == 2
+    assert profile.to_dict() == data
+    assert not hasattr(profile, "__dict__")
+
+
+def test_cache_evicts_least_recently_used_unpinned_profiles():
+    async def loader(user_id):
+        return None
+
+    cache = ProfileCache(loader=loader, capacity=2)
+    cache.pin("a")
+    for user_id in "abc":
+        cache.put(user_id, UserProfile(user_id, user_id))
+
+    assert "a" in cache and "b" not in cache and "c" in cache
+
+    cache.unpin(["a"])
+    cache.get("c")
+    cache.put("d", UserProfile("d", "d"))
+
+    assert [uid for uid in "abcd" if uid in cache] == ["c", "d"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_cache_without_loader_keeps_everything_resident():
+    cache = ProfileCache(capacity=1)
+    cache.load_all({"a": {"username": "a"}, "b": {"username": "b"}})
+
+    assert len(cache) == 2
+    assert set(cache.export(["a"])) == {"a", "b"}
+
+
+def test_load_all_merges_history_under_profiles_created_before_it():
+    cache = ProfileCache()
+    early = cache.put("a", UserProfile("ali", "Ali", message_count=1))
+    early.word_freq["chai"] = 1
+    early.active_hours[9] = 1
+
+    cache.load_all(
+        {
+            "a": {
+                "username": "ali",
+                "message_count": 80,
+                "word_freq": {"chai": 10, "cricket": 4},
+                "active_hours": {"9": 5},
+                "facts": [{"text": "plays cricket", "ts": 1.0}],
+            }
+        }
+    )
+
+    profile = cache.get("a")
+    assert profile is early
+    assert profile.message_count == 81
+    assert profile.word_freq == {"chai": 11, "cricket": 4}
+    assert profile.active_hours[9] == 6
+    assert [f["text"] for f in profile.facts] == ["plays cricket"]
+
+
+def test_load_all_runs_once():
+    cache = ProfileCache()
+    records = {"a": {"username": "ali", "message_count": 80}}
+    cache.load_all(records)
+    cache.put("b", UserProfile("sara", "Sara", message_count=1))
+
+    cache.load_all(records)  # on_ready again after a reconnect
+    cache.load_all({**records, "b": {"username": "sara", "message_count": 5}})
+
+    assert cache.loaded
+    assert cache.get("a").message_count == 80
+    assert cache.get("b").message_count == 1
+
+
+async def test_lazy_cache_loads_cold_profiles_from_sqlite(tmp_path: Path):
+    store = SqliteDataStore(
+        tmp_path / "bot.sqlite3", default={}, namespace="user_profiles"
+    )
+    store.load_sync()
+    await store.save({"1": {"username": "ali", "message_count": 60}})
+    cache = ProfileCache(loader=store.get, capacity=1)
+    writer = ProfileWriter(store, cache, flush_interval=60)
+
+    profile = await cache.fetch("1")
+    assert profile.message_count == 60
+
+    cache.put("2", UserProfile("sara", "Sara", message_count=1))
+    writer.mark_dirty("2")
+    assert set(cache.export(["2"])) == {"2"}
+    await writer.close()
+
+    assert "1" not in cache
+    assert (await cache.fetch("1")).username == "ali"
+    assert (await store.get("2"))["message_count"] == 1
+    assert cache.stats()["loads"] == 2
+
+
+def test_add_facts_keeps_index_in_step_with_fact_list():
+    profile = UserProfile("ali", "Ali")
+    profile.add_facts(["likes chai"], 1.0, limit=2)
+    index = profile.fact_index()
+
+    assert profile.add_facts(["likes chai", "plays cricket"], 2.0, limit=2) == 1
+    assert profile.add_facts(["studies physics"], 3.0, limit=2) == 1
+
+    assert [f["text"] for f in profile.facts] == ["plays cricket", "studies physics"]
+    assert profile.fact_index() is index
+    assert index.search("chai", 3) == ["studies physics", "plays cricket"]
@@ -0,0 +1,51 @@
+from src.reply_similarity import RecentReplies, jaccard, shingles
+
+
+def test_shingles_are_words_and_adjacent_bigrams():
+    assert shingles("chai peene chalo") == {
+        "chai",
+        "peene",
+        "chalo",
+        "chai peene",
+        "peene chalo",
+    }
+
+
+def test_jaccard_of_empty_sets_is_zero():
+    assert jaccard(frozenset(), frozenset({"a"})) == 0.0
+
+
+def test_exact_and_substring_duplicates_are_rejected():
+    recent = RecentReplies(5)
+    recent.append("Bhai ye toh scene hai!")
+
+    assert recent.is_too_similar("bhai ye toh scene hai")
+    assert recent.is_too_similar("scene hai")
+
+
+def test_paraphrased_repeat_is_rejected():
+    recent = RecentReplies(5)
+    recent.append("chai peene chalo yaar")
+
+    assert recent.is_too_similar("yaar chalo chai peene")
+
+
+def test_unrelated_reply_sharing_common_words_passes():
+    recent = RecentReplies(5)
+    recent.append("yaar exam kal hai")
+
+    assert not recent.is_too_similar("yaar biryani khani hai aaj")
+
+
+def test_empty_candidate_is_rejected():
+    assert RecentReplies(5).is_too_similar("<:dead:123> !!!")
+
+
+def test_window_is_bounded_and_iterates_raw_texts():
+    recent = RecentReplies(2)
+    for reply in ["pehla jawab", "doosra jawab", "teesra <:x:1>"]:
+        recent.append(reply)
+
+    assert list(recent) == ["doosra jawab", "teesra <:x:1>"]
+    assert len(recent) == 2
+    assert not recent.is_too_similar("pehla")
@@ -2,7 +2,13 @@ import asyncio
 
 import pytest
 
-from src.retry_utils import RetryError, retry_async
+from src.retry_utils import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitedError,
+    RetryError,
+    retry_async,
+)
 
 
 async def _succeed_after_one_retry(counter):
@@ -40,3 +46,150 @@ def test_retry_async_does_not_retry_non_retryable_exception():
 
     with pytest.raises(CustomError):
         asyncio.run(retry_async(fail_once, retries=2, delay=0.01, backoff=1.0))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failed_calls_and_fails_fast():
+    clock = FakeClock()
+    breaker = CircuitBreaker("opentdb", failure_threshold=2, clock=clock)
+    calls = {"n": 0}
+
+    async def down():
+        calls["n"] += 1
+        raise asyncio.TimeoutError("down")
+
+    with pytest.raises(RetryError):
+        asyncio.run(retry_async(down, retries=2, delay=0.0, breaker=breaker))
+    assert calls["n"] == 3
+    assert breaker.state == CircuitBreaker.CLOSED  # one failed call, not three
+
+    with pytest.raises(RetryError):
+        asyncio.run(retry_async(down, retries=2, delay=0.0, breaker=breaker))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(retry_async(down, retries=2, delay=0.0, breaker=breaker))
+    assert calls["n"] == 6
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "gemini", failure_threshold=1, reset_timeout=30, clock=clock
+    )
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_probe_failure_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "gemini", failure_threshold=3, reset_timeout=30, clock=clock
+    )
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_non_retryable_errors_do_not_count_as_failures():
+    breaker = CircuitBreaker("api", failure_threshold=1)
+
+    async def bad_input():
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError):
+        asyncio.run(retry_async(bad_input, breaker=breaker))
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_timeout_tracks_p95_latency_within_bounds():
+    breaker = CircuitBreaker(
+        "api", latency_window=10, min_samples=5, timeout_factor=2.0, min_timeout=1.0
+    )
+    assert breaker.timeout(15) == 15
+
+    for latency in [0.5, 0.6, 0.7, 0.8, 3.0]:
+        breaker.record_success(latency)
+    assert breaker.timeout(15) == 6.0
+
+    for _ in range(10):  # the slow samples age out of the window
+        breaker.record_success(0.1)
+    assert breaker.timeout(15) == 1.0
+
+
+def test_timeouts_push_the_timeout_back_up():
+    breaker = CircuitBreaker("api", min_samples=10, min_timeout=1.0)
+    for _ in range(20):
+        breaker.record_success(0.3)
+    assert breaker.timeout(8) == 1.0
+
+    for _ in range(5):  # upstream slowed past the learned deadline
+        breaker.record_failure(1.0, final=False)
+    assert breaker.timeout(8) == 2.0
+
+
+def test_half_open_probe_gets_the_default_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "api", failure_threshold=1, min_samples=1, min_timeout=0.5, clock=clock
+    )
+    breaker.record_success(0.3)
+    breaker.record_failure()
+    clock.now += 31
+
+    assert breaker.allow()
+    assert breaker.timeout(8) == 8
+
+
+def test_pace_runs_outside_the_breaker_timed_call():
+    breaker = CircuitBreaker("api", min_samples=1)
+    calls = []
+
+    async def slow_pace():
+        await asyncio.sleep(0.05)
+        return True
+
+    async def request():
+        calls.append(1)
+        return "ok"
+
+    result = asyncio.run(retry_async(request, breaker=breaker, pace=slow_pace))
+    assert result == "ok"
+    assert max(breaker._latencies) < 0.05  # the pacing wait is not latency
+
+
+def test_skipped_pace_never_touches_the_breaker():
+    breaker = CircuitBreaker("api", min_samples=1)
+    calls = []
+
+    async def skip():
+        return False
+
+    async def request():
+        calls.append(1)
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(retry_async(request, breaker=breaker, pace=skip))
+    assert calls == []
+    assert not breaker._latencies
+    assert breaker.state == "closed"
@@ -0,0 +1,71 @@
+import asyncio
+
+from src.speculative import SpeculativeWarmer
+
+
+async def test_claim_returns_warmed_context_once():
+    builds = []
+
+    async def build():
+        builds.append(None)
+        return "ctx"
+
+    warmer = SpeculativeWarmer(ttl=1.0)
+    assert warmer.warm("k", build)
+    assert not warmer.warm("k", build)  # already warming
+
+    assert await warmer.claim("k") == "ctx"
+    assert await warmer.claim("k") is None
+    assert len(builds) == 1
+    assert warmer.stats()["hits"] == 1
+
+
+async def test_claim_waits_for_build_still_in_progress():
+    release = asyncio.Event()
+
+    async def build():
+        await release.wait()
+        return "ctx"
+
+    warmer = SpeculativeWarmer(ttl=1.0)
+    warmer.warm("k", build)
+    claim = asyncio.create_task(warmer.claim("k"))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await claim == "ctx"
+
+
+async def test_unclaimed_warm_up_expires():
+    async def build():
+        await asyncio.sleep(10)
+
+    warmer = SpeculativeWarmer(ttl=0.01)
+    warmer.warm("k", build)
+    await asyncio.sleep(0.03)
+
+    assert await warmer.claim("k") is None
+    assert warmer.stats()["expired"] == 1
+
+
+async def test_failed_build_is_a_miss():
+    async def build():
+        raise RuntimeError("db down")
+
+    warmer = SpeculativeWarmer()
+    warmer.warm("k", build)
+
+    assert await warmer.claim("k") is None
+    assert warmer.stats()["failed"] == 1
+    warmer.close()
+
+
+def test_stats_report_time_saved():
+    warmer = SpeculativeWarmer()
+    warmer.record_reply(False, 2.0)
+    warmer.record_reply(True, 0.5)
+
+    stats = warmer.stats()
+    assert stats["cold_reply_ms"] == 2000
+    assert stats["warm_reply_ms"] == 500
+    assert stats["saved_ms"] == 1500
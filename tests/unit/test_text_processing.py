@@ -0,0 +1,69 @@
+from src.text_processing import (
+    fix_emoji_tokens,
+    has_custom_emoji,
+    normalize_message,
+    self_mention_pattern,
+    similarity_key,
+)
+
+
+def test_sanitized_replaces_emoji_and_collapses_whitespace():
+    result = normalize_message("hello   <:chai:123456789012345678>\n:smile: there")
+
+    assert result.sanitized == "hello [emoji] [emoji] there"
+
+
+def test_sanitized_keeps_mentions_and_links():
+    result = normalize_message("<@123> see https://x.com/a")
+
+    assert result.sanitized == "<@123> see https://x.com/a"
+
+
+def test_tokens_drop_emoji_links_and_mentions():
+    result = normalize_message(
+        "Yaar <@!42> CHAI peeni hai <a:dance:1234> https://tenor.com/xyz ok"
+    )
+
+    assert result.tokens == ("yaar", "chai", "peeni", "hai")
+
+
+def test_tokens_keep_shortcode_names_and_at_words():
+    result = normalize_message("@everyone :fire: biryani!!!")
+
+    assert result.tokens == ("everyone", "fire", "biryani")
+
+
+def test_compact_is_residue_without_emoji_links_and_mentions():
+    assert normalize_message("<@1> @bob https://a.b <:x:99> :y: Lol!!").compact == "lol"
+    assert normalize_message("<:x:99> :wave:").compact == ""
+
+
+def test_normalize_message_is_cached():
+    assert normalize_message("same text") is normalize_message("same text")
+
+
+def test_similarity_key_ignores_case_punctuation_and_custom_emoji():
+    assert similarity_key("Kya_baat, HAI! <:dead:123>") == "kya baat hai"
+
+
+def test_has_custom_emoji():
+    assert has_custom_emoji("lol <a:dead:123>")
+    assert not has_custom_emoji("lol :dead:")
+
+
+def test_fix_emoji_tokens_repairs_spaces_and_missing_bracket():
+    assert fix_emoji_tokens("hi < : kya : 123 >") == "hi <:kya:123>"
+    assert (
+        fix_emoji_tokens("hi <:kya:123456789012345678 ok")
+        == "hi <:kya:123456789012345678> ok"
+    )
+
+
+def test_fix_emoji_tokens_strips_truncated_tail():
+    assert fix_emoji_tokens("bas kar <:bruh:14620") == "bas kar"
+
+
+def test_self_mention_pattern_matches_id_and_names():
+    pattern = self_mention_pattern(7, frozenset({"Chai Bot"}))
+
+    assert pattern.sub("", "<@!7> hi @chai bot and @other") == " hi  and @other"